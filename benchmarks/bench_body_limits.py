@@ -0,0 +1,120 @@
+"""
+Request body limit load test — server RSS under concurrent oversized uploads.
+
+Starts the app on a threaded local server in a child process and hits it with
+concurrent clients uploading bodies far over the route limits: declared
+Content-Length uploads to /api/chat and chunked uploads to /generate-pdf. The
+server's peak RSS is sampled throughout. The "unlimited" run lifts every limit
+to show what the same traffic costs without them.
+
+    python -m benchmarks.bench_body_limits
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import psutil
+
+CLIENTS = 8
+UPLOAD_SIZES = (16 * 1024 * 1024, 48 * 1024 * 1024)
+CHUNK = 64 * 1024
+
+
+def serve(port, unlimited, ready):
+    os.environ['CHAT_DB_DIR'] = tempfile.mkdtemp()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    import server.app as server_module
+    from server import body_limits
+
+    if unlimited:
+        huge = 1 << 40
+        body_limits.DEFAULT_BODY_LIMIT = huge
+        body_limits.ROUTE_BODY_LIMITS.update({k: huge for k in body_limits.ROUTE_BODY_LIMITS})
+        server_module.app.config['MAX_CONTENT_LENGTH'] = None
+        server_module._body_budget.per_ip = huge * CLIENTS
+    httpd = make_server('127.0.0.1', port, server_module.app, threaded=True)
+    ready.set()
+    httpd.serve_forever()
+
+
+def upload(port, path, chunked, size):
+    """Send an oversized JSON body; return the response status (or 'reset')."""
+    head = [f'POST {path} HTTP/1.1', f'Host: 127.0.0.1:{port}', 'Content-Type: application/json']
+    head.append('Transfer-Encoding: chunked' if chunked else f'Content-Length: {size}')
+    body = b'{"recruiter_name": "x", "message": "' + b'a' * (size - 40)
+    body += b'"}'.ljust(size - len(body), b' ')
+    sock = socket.create_connection(('127.0.0.1', port), timeout=60)
+    try:
+        sock.sendall(('\r\n'.join(head) + '\r\n\r\n').encode())
+        for i in range(0, len(body), CHUNK):
+            part = body[i:i + CHUNK]
+            sock.sendall(b'%x\r\n%s\r\n' % (len(part), part) if chunked else part)
+        if chunked:
+            sock.sendall(b'0\r\n\r\n')
+        status = sock.recv(64).split(b' ')[1].decode()
+    except (OSError, IndexError):
+        status = 'reset'
+    finally:
+        sock.close()
+    return status
+
+
+def run(unlimited, size):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    # spawn, not fork: the server must not inherit this process's upload buffers
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Event()
+    proc = ctx.Process(target=serve, args=(port, unlimited, ready), daemon=True)
+    proc.start()
+    ready.wait(30)
+    server = psutil.Process(proc.pid)
+    baseline = server.memory_info().rss
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], server.memory_info().rss)
+            time.sleep(0.02)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.perf_counter()
+    jobs = [('/api/chat', False), ('/generate-pdf', True)] * (CLIENTS // 2)
+    with ThreadPoolExecutor(CLIENTS) as pool:
+        statuses = list(pool.map(lambda job: upload(port, *job, size), jobs))
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    proc.terminate()
+    proc.join()
+    counts = {s: statuses.count(s) for s in sorted(set(statuses))}
+    return baseline, peak[0], elapsed, counts
+
+
+def main():
+    mb = 1024 * 1024
+    print(f'{CLIENTS} concurrent uploads per run')
+    print(f'{"upload":>7} {"limits":>7} {"base RSS":>9} {"peak RSS":>9} {"growth":>8} {"seconds":>8}  statuses')
+    for size in UPLOAD_SIZES:
+        for unlimited in (False, True):
+            baseline, peak, elapsed, counts = run(unlimited, size)
+            label = 'off' if unlimited else 'on'
+            print(f'{size // mb:>6}M {label:>7} {baseline / mb:>8.0f}M {peak / mb:>8.0f}M '
+                  f'{(peak - baseline) / mb:>7.0f}M {elapsed:>8.2f}  {counts}')
+
+
+if __name__ == '__main__':
+    main()
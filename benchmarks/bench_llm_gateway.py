@@ -0,0 +1,79 @@
+"""
+LLM gateway benchmark — caller threads held and upstream load when OpenAI is slow or failing.
+
+Concurrent callers each make a series of chat calls against the local OpenAI
+stub, once with a default OpenAI client (SDK retries, no concurrency cap) and
+once through the gateway as the app configures it for one worker. Reports how
+long each call held its caller (a server thread, in the app), how the calls
+ended, and how many requests reached the upstream.
+
+    python -m benchmarks.bench_llm_gateway
+"""
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from openai import OpenAI
+
+from server.llm_gateway import LLMGateway, CircuitBreaker, make_openai_client
+from server.openai_stub import OpenAIStub
+
+CALLERS = 8
+CALLS_EACH = 5
+SCENARIOS = (
+    ('slow (2 s)', dict(latency_ms=2000, distribution='lognormal', sigma=0.3)),
+    ('failing (100% 503)', dict(latency_ms=200, distribution='fixed', error_rate=1.0, error=503)),
+    ('flaky (30% 503)', dict(latency_ms=300, distribution='lognormal', error_rate=0.3, error=503)),
+)
+
+
+def load(call):
+    def caller(i):
+        results = []
+        for j in range(CALLS_EACH):
+            start = time.perf_counter()
+            try:
+                call([{'role': 'user', 'content': f'question {i}.{j}'}])
+                outcome = 'ok'
+            except Exception as e:
+                outcome = type(e).__name__
+            results.append((time.perf_counter() - start, outcome))
+        return results
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        results = [r for rs in pool.map(caller, range(CALLERS)) for r in rs]
+    held = sorted(r[0] for r in results)
+    return held, Counter(r[1] for r in results)
+
+
+def main():
+    print(f'{CALLERS} concurrent callers x {CALLS_EACH} calls per run')
+    print(f'{"upstream":>20} {"client":>8} {"p50 s":>7} {"p95 s":>7} {"thread-s":>9} '
+          f'{"upstream reqs":>14} {"peak":>5}  outcomes')
+    for label, stub_options in SCENARIOS:
+        for mode in ('default', 'gateway'):
+            with OpenAIStub(seed=1, **stub_options) as stub:
+                if mode == 'default':
+                    client = OpenAI(api_key='local', base_url=stub.base_url)
+
+                    def call(messages):
+                        return client.chat.completions.create(model='m', messages=messages)
+                else:
+                    gateway = LLMGateway(lambda c=make_openai_client('local', stub.base_url): c,
+                                         breaker=CircuitBreaker())
+                    call = lambda messages: gateway.complete(model='m', messages=messages)
+                held, outcomes = load(call)
+                stats = stub.stats()
+            print(f'{label:>20} {mode:>8} {statistics.median(held):>7.2f} {held[int(len(held) * 0.95)]:>7.2f} '
+                  f'{sum(held):>9.1f} {stats["requests"]:>14} {stats["peak_in_flight"]:>5}  '
+                  f'{dict(outcomes)}')
+
+
+if __name__ == '__main__':
+    main()
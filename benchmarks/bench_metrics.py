@@ -0,0 +1,87 @@
+"""
+Metrics benchmark — series count, exposition size and scrape cost.
+
+Feeds the same synthetic traffic (including junk methods and odd status codes,
+as scanners send) into the old unbounded REQUEST_COUNT/REQUEST_LATENCY layout
+and into server.metrics' normalized labels, each in its own registry, then
+times rendering the exposition and serving it from ExpositionCache.
+
+    python -m benchmarks.bench_metrics
+"""
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+from server.metrics import (
+    LATENCY_HISTOGRAMS, BoundedLabel, ExpositionCache, method_label, status_label,
+)
+from server.route_policy import ENDPOINT_CLASSES
+
+REQUESTS = 50000
+SCRAPES = 200
+ENDPOINTS = [*ENDPOINT_CLASSES, 'chat', 'generate_pdf', 'track_event', 'track_batch', 'plan',
+             'inventory', 'update_inventory', 'get_stats', 'stats_timeseries', None]
+
+
+def traffic(rng):
+    for _ in range(REQUESTS):
+        endpoint = rng.choice(ENDPOINTS)
+        if rng.random() < 0.05:
+            method, status = rng.choice(['PROPFIND', 'TRACE', 'CONNECT', f'X{rng.randrange(500)}']), 405
+        else:
+            method = rng.choice(['GET', 'GET', 'GET', 'POST', 'HEAD'])
+            status = rng.choice([200, 200, 200, 304, 404, 400]) if rng.random() < 0.97 else rng.randrange(100, 600)
+        yield method, endpoint or 'unknown', status, rng.lognormvariate(-5, 1.5)
+
+
+def unbounded(registry, requests):
+    count = Counter('http_requests_total', 'Total HTTP requests', ['method', 'endpoint', 'status'],
+                    registry=registry)
+    latency = Histogram('http_request_duration_seconds', 'HTTP request latency in seconds', ['endpoint'],
+                        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10], registry=registry)
+    for method, endpoint, status, seconds in requests:
+        count.labels(method=method, endpoint=endpoint, status=status).inc()
+        latency.labels(endpoint=endpoint).observe(seconds)
+
+
+def bounded(registry, requests):
+    count = Counter('http_requests_total', 'Total HTTP requests', ['method', 'endpoint', 'status'],
+                    registry=registry)
+    latency = {cls: Histogram(name, 'HTTP request latency in seconds', ['endpoint'],
+                              buckets=buckets, registry=registry)
+               for cls, (name, buckets) in LATENCY_HISTOGRAMS.items()}
+    endpoint_label = BoundedLabel(100)
+    for method, endpoint, status, seconds in requests:
+        endpoint = endpoint_label(endpoint)
+        count.labels(method=method_label(method), endpoint=endpoint, status=status_label(status)).inc()
+        latency[ENDPOINT_CLASSES.get(endpoint, 'api')].labels(endpoint=endpoint).observe(seconds)
+
+
+def scrape_ms(get):
+    start = time.perf_counter()
+    for _ in range(SCRAPES):
+        get()
+    return (time.perf_counter() - start) / SCRAPES * 1000
+
+
+def main():
+    print(f'{REQUESTS:,} requests, {SCRAPES} scrapes each')
+    print(f'{"layout":>18} {"series":>7} {"bytes":>8} {"scrape ms":>10}')
+    for name, record in (('unbounded', unbounded), ('bounded', bounded)):
+        registry = CollectorRegistry()
+        record(registry, traffic(random.Random(1)))
+        body = generate_latest(registry)
+        series = sum(len(m.samples) for m in registry.collect())
+        print(f'{name:>18} {series:>7,} {len(body):>8,} {scrape_ms(lambda: generate_latest(registry)):>10.3f}')
+    cache = ExpositionCache(lambda: generate_latest(registry), ttl=5)
+    print(f'{"bounded, cached":>18} {series:>7,} {len(body):>8,} {scrape_ms(cache.get):>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
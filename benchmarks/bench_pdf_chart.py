@@ -0,0 +1,87 @@
+"""
+Yard chart benchmark — uploaded chartImage PNG vs. the server-drawn vector chart.
+
+Compares request payload size, /generate-pdf server time and PDF size for the
+legacy path (900×260 canvas PNG, base64 in the JSON body) and the compact
+``yard`` summary the client sends now. The PNG is drawn with Pillow without
+rotated, antialiased labels, so it is smaller than a browser canvas export and
+the payload comparison errs in the PNG's favour.
+
+    python -m benchmarks.bench_pdf_chart
+"""
+import base64
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from PIL import Image, ImageDraw
+
+from server.app import app
+from benchmarks.bench_planner import CATALOG
+
+RUNS = 15
+
+
+def make_yard(n, seed=1):
+    """Bunk summaries shaped like the client's buildYardSummary()."""
+    rng = random.Random(seed)
+    yard = []
+    for i in range(n):
+        entry = CATALOG[i % len(CATALOG)]
+        yard.append({
+            'name': entry['name'][:10],
+            'current': int(entry['capacity'] * rng.random()),
+            'capacity': entry['capacity'],
+            'flagged': rng.random() < 0.2,
+        })
+    return yard
+
+
+def render_png(yard):
+    """Approximate the old canvas chart: dark panel, one filled bar per bunk."""
+    w, h = 900, 260
+    img = Image.new('RGB', (w, h), '#0f1629')
+    draw = ImageDraw.Draw(img)
+    bar_w = max(min(36, (w - 80) / len(yard) - 4), 1)
+    for i, b in enumerate(yard):
+        x = 40 + i * (bar_w + 4)
+        pct = b['current'] / b['capacity']
+        draw.rectangle([x, 35, x + bar_w, 230], fill='#1a2233')
+        draw.rectangle([x, 230 - 195 * pct, x + bar_w, 230], fill='#22c55e' if pct >= 0.5 else '#ef4444')
+        draw.text((x, 234), b['name'], fill='#94a3b8')
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buf.getvalue()).decode()
+
+
+def time_post(client, payload):
+    body = json.dumps(payload)
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        resp = client.post('/generate-pdf', data=body, content_type='application/json')
+        samples.append(time.perf_counter() - start)
+        assert resp.status_code == 200
+    return len(body), statistics.median(samples), len(resp.data)
+
+
+def main():
+    client = app.test_client()
+    base = {'items': [], 'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0, 'totalBunks': 0}
+    print(f'{"bunks":>6} {"path":>7} {"payload":>10} {"server ms":>10} {"pdf":>10}')
+    for n in (20, 100, 500):
+        yard = make_yard(n)
+        for label, extra in (('png', {'chartImage': render_png(yard)}), ('vector', {'yard': yard})):
+            size, seconds, pdf = time_post(client, dict(base, **extra))
+            print(f'{n:>6} {label:>7} {size:>9,}B {seconds * 1000:>10.1f} {pdf:>9,}B')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Large-order PDF benchmark — one line-item Table vs. page-sized lazy chunks.
+
+Builds the ORDER LINE ITEMS section for 1k and 10k line items both ways and
+reports build time and peak RSS growth (each build runs in a forked child so
+peaks don't mix), then times the full /generate-pdf endpoint (spooled output,
+streamed in 64 KB chunks) at 10k items.
+
+    python -m benchmarks.bench_pdf_stream
+"""
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import psutil
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate
+
+from server.app import app, PDF_SPOOL_MAX_BYTES
+from server.pdf_tables import line_item_tables
+
+
+def make_items(n):
+    items = []
+    for i in range(n):
+        current, capacity = i % 100, 100
+        items.append({
+            'name': f'Product {i}', 'category': 'Dimensional', 'current': current,
+            'capacity': capacity, 'toOrder': capacity - current, 'unitPrice': 3.48,
+            'unitWeight': 9, 'totalCost': (capacity - current) * 3.48,
+            'dims': {'w': 3.5, 'h': 1.5, 'l': 96},
+        })
+    return items
+
+
+def build(items, single, out):
+    doc = SimpleDocTemplate(out, pagesize=letter)
+    rows = len(items) if single else None
+    kwargs = {'rows_per_chunk': rows} if rows else {}
+    doc.build(line_item_tables(items, 0, 0, 0, **kwargs))
+
+
+def _measure(items, single, results):
+    out = io.BytesIO() if single else tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+    base_rss = psutil.Process().memory_info().rss
+    start = time.perf_counter()
+    build(items, single, out)
+    seconds = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((seconds, max(peak_rss - base_rss, 0), out.tell()))
+
+
+def measure(items, single):
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    child = ctx.Process(target=_measure, args=(items, single, results))
+    child.start()
+    outcome = results.get()
+    child.join()
+    return outcome
+
+
+def main():
+    print(f'{"items":>7} {"layout":>8} {"seconds":>8} {"peak rss":>10} {"pdf":>10}')
+    for n in (1_000, 10_000):
+        items = make_items(n)
+        for label, single in (('single', True), ('chunked', False)):
+            seconds, peak, size = measure(items, single)
+            print(f'{n:>7,} {label:>8} {seconds:>8.2f} {peak / 1e6:>8.1f}MB {size / 1e6:>8.2f}MB')
+
+    n = 10_000
+    body = json.dumps({'items': make_items(n), 'totalWeight': 0, 'totalCost': 0,
+                       'totalPieces': 0, 'totalBunks': n})
+    client = app.test_client()
+    start = time.perf_counter()
+    resp = client.post('/generate-pdf', data=body, content_type='application/json', buffered=False)
+    chunks = iter(resp.response)
+    first = next(chunks)
+    first_byte = time.perf_counter() - start
+    total = len(first) + sum(len(c) for c in chunks)
+    resp.close()
+    print(f'\n/generate-pdf {n:,} items: first byte {first_byte:.2f}s, '
+          f'done {time.perf_counter() - start:.2f}s, {total / 1e6:.2f}MB '
+          f'(Content-Length {int(resp.headers["Content-Length"]) / 1e6:.2f}MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Line-item table benchmark — scaling of the PDF table builder from 10 to 10k items.
+
+Compares the previous builder (one Table, per-row TEXTCOLOR commands, row
+heights measured by ReportLab) with server.pdf_tables.line_item_tables
+(one NumPy pass for colors, run-grouped style commands, fixed-height,
+page-sized chunks). Reports time to construct the flowables, time to render
+the section, and In Stock color commands emitted.
+
+    python -m benchmarks.bench_pdf_table
+"""
+import io
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+from server.pdf_graphics import ACCENT, get_fill_color
+from server.pdf_tables import (
+    LINE_ITEM_HEADER, LINE_ITEM_WIDTHS, line_item_tables, fill_bands, _band_style,
+)
+from benchmarks.bench_pdf_stream import make_items
+
+
+def legacy_table(items):
+    """The single-Table builder generate_pdf() used before pdf_tables."""
+    table_data = [LINE_ITEM_HEADER]
+    for i, item in enumerate(items, 1):
+        pct = item['current'] / item['capacity'] if item['capacity'] > 0 else 0
+        table_data.append([
+            str(i), item['name'], item['category'], str(item['current']),
+            str(item['capacity']), str(item['toOrder']), f"${item['unitPrice']:.2f}",
+            f"{item['unitWeight']} lbs", f"${item['totalCost']:,.2f}",
+        ])
+    table_data.append(['', '', '', '', '', '0', '', '0 lbs', '$0.00'])
+    t = Table(table_data, colWidths=LINE_ITEM_WIDTHS, repeatRows=1)
+    style_cmds = [
+        ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fafafa')]),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]
+    for i, item in enumerate(items, 1):
+        pct = item['current'] / item['capacity'] if item['capacity'] > 0 else 0
+        style_cmds.append(('TEXTCOLOR', (3, i), (3, i), get_fill_color(pct)))
+    t.setStyle(TableStyle(style_cmds))
+    return [t], len(items)
+
+
+def fast_tables(items, frame_height):
+    chunks = line_item_tables(items, 0, 0, 0, frame_height)
+    # Force the lazy builds so construction is timed here, not during render
+    for chunk in chunks:
+        chunk._get()
+    return chunks, len(_band_style(fill_bands(items)))
+
+
+def run(builder, items):
+    doc = SimpleDocTemplate(io.BytesIO())
+    start = time.perf_counter()
+    if builder is legacy_table:
+        flowables, color_cmds = builder(items)
+    else:
+        flowables, color_cmds = builder(items, doc.height)
+    built = time.perf_counter() - start
+    doc.build(list(flowables))
+    return built, time.perf_counter() - start, color_cmds
+
+
+def shuffled_items(n, seed=1):
+    """Line items with stock levels in random order, so color runs are realistic."""
+    items = make_items(n)
+    levels = [item['current'] for item in items]
+    random.Random(seed).shuffle(levels)
+    for item, current in zip(items, levels):
+        item['current'] = current
+    return items
+
+
+def main():
+    print(f'{"items":>7} {"builder":>8} {"construct s":>12} {"total s":>9} '
+          f'{"per item ms":>12} {"color cmds":>11}')
+    for n in (10, 100, 1_000, 10_000):
+        items = shuffled_items(n)
+        for label, builder in (('legacy', legacy_table), ('fast', fast_tables)):
+            built, total, color_cmds = run(builder, items)
+            print(f'{n:>7,} {label:>8} {built:>12.3f} {total:>9.3f} '
+                  f'{total / n * 1000:>12.3f} {color_cmds:>11,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Restock planner benchmark — plan_restock() at yard sizes from 100 to 100k bunks.
+
+    python -m benchmarks.bench_planner
+"""
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from server.planner import plan_restock
+
+# A slice of the demo CATALOG (client/demo/pallet-builder.js)
+CATALOG = [
+    {'id': 'dim-2x4x8', 'name': '2×4×8 SPF', 'category': 'Dimensional', 'capacity': 294,
+     'unitPrice': 3.48, 'unitWeight': 9, 'dims': {'w': 3.5, 'h': 1.5, 'l': 96}},
+    {'id': 'dim-2x12x16', 'name': '2×12×16 SPF', 'category': 'Dimensional', 'capacity': 84,
+     'unitPrice': 28.98, 'unitWeight': 56, 'dims': {'w': 11.25, 'h': 1.5, 'l': 192}},
+    {'id': 'sht-ply34', 'name': '3/4" Plywood 4×8', 'category': 'Sheet', 'capacity': 40,
+     'unitPrice': 42.98, 'unitWeight': 70, 'dims': {'w': 48, 'h': 0.75, 'l': 96}},
+    {'id': 'sht-mdf', 'name': '3/4" MDF 4×8', 'category': 'Sheet', 'capacity': 30,
+     'unitPrice': 38.98, 'unitWeight': 86, 'dims': {'w': 48, 'h': 0.75, 'l': 96}},
+    {'id': 'pt-6x6x12', 'name': 'PT 6×6×12 Timber', 'category': 'Treated', 'capacity': 24,
+     'unitPrice': 48.98, 'unitWeight': 80, 'dims': {'w': 5.5, 'h': 5.5, 'l': 144}},
+    {'id': 'sp-cedar', 'name': 'Cedar 1×6×6 Fence', 'category': 'Specialty', 'capacity': 480,
+     'unitPrice': 5.98, 'unitWeight': 5, 'dims': {'w': 5.5, 'h': 0.75, 'l': 72}},
+]
+
+
+def make_yard(n, seed=1):
+    """Build ``n`` bunks cycling through CATALOG with random fill levels."""
+    rng = random.Random(seed)
+    bunks = []
+    for i in range(n):
+        bunk = dict(CATALOG[i % len(CATALOG)])
+        bunk['id'] = f"{bunk['id']}-{i}"
+        bunk['current'] = int(bunk['capacity'] * rng.random())
+        bunks.append(bunk)
+    return bunks
+
+
+def main():
+    print(f'{"bunks":>8} {"ordered":>8} {"trucks":>7} {"lower bound":>12} {"seconds":>8}')
+    for n in (100, 1_000, 10_000, 100_000):
+        bunks = make_yard(n)
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            plan = plan_restock(bunks)
+            best = min(best, time.perf_counter() - start)
+        totals = plan['totals']
+        print(f'{n:>8,} {totals["bunks"]:>8,} {totals["trucks"]:>7,} {totals["minTrucks"]:>12,} {best:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
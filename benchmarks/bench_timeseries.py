@@ -0,0 +1,83 @@
+"""
+Time-series benchmark — query latency as months of history accumulate.
+
+Simulates every minute of traffic for the app's six series, day by day, into
+two stores: one compacted daily like production (rollups plus retention), and
+one that only keeps raw minute buckets. After each checkpoint, times the
+dashboard queries against both.
+
+    python -m benchmarks.bench_timeseries
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from server.timeseries import TimeSeriesStore
+
+SERIES = ('portfolio_views', 'demo_views', 'pdf_generations',
+          'contact_submissions', 'resume_enjoyed', 'chat_messages')
+CHECKPOINT_DAYS = (30, 90, 180, 365)
+QUERIES = (('hour', 7 * 86400), ('day', 90 * 86400), ('day', 365 * 86400))
+REPEAT = 20
+T0 = 1_700_006_400
+
+
+def seed_day(stores, day, rng):
+    start = T0 + day * 86400
+    for t in range(start, start + 86400, 60):
+        for name in SERIES:
+            n = rng.randrange(4)
+            if n:
+                for store in stores:
+                    store.record(name, n, at=t)
+    for store in stores:
+        store.flush()
+
+
+def time_query(store, resolution, window, now):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        store.query(SERIES, resolution, since=now - window, until=now)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sum(conn.execute(f'SELECT COUNT(*) FROM ts_{level}').fetchone()[0]
+                   for level in ('minute', 'hour', 'day'))
+    finally:
+        conn.close()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    paths = {kind: os.path.join(tmp, f'{kind}.db') for kind in ('rollup', 'raw')}
+    stores = {kind: TimeSeriesStore(lambda p=path: p, SERIES, compact_interval=float('inf'))
+              for kind, path in paths.items()}
+    rng = random.Random(1)
+    print(f'{"days":>5} {"store":>7} {"rows":>10} ' + ' '.join(
+        f'{f"{res} x{window // 86400}d ms":>16}' for res, window in QUERIES))
+    day = 0
+    for checkpoint in CHECKPOINT_DAYS:
+        while day < checkpoint:
+            seed_day(stores.values(), day, rng)
+            day += 1
+            stores['rollup'].compact(now=T0 + day * 86400)
+        now = T0 + day * 86400
+        for kind, store in stores.items():
+            timings = [time_query(store, res, window, now) for res, window in QUERIES]
+            print(f'{day:>5} {kind:>7} {rows(paths[kind]):>10,} '
+                  + ' '.join(f'{ms:>16.2f}' for ms in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Event ingestion benchmark — events per second through /api/track vs /api/track/batch.
+
+Starts the app on a threaded local server in a child process (fresh data
+directory) and sends the same number of events from concurrent keep-alive
+clients: one request per event, then batches of various sizes.
+
+    python -m benchmarks.bench_track_batch
+"""
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+EVENTS = 4000
+CLIENTS = 4
+BATCH_SIZES = (10, 50, 100)
+EVENT_NAMES = ('portfolio_view', 'demo_view', 'pdf_generated', 'resume_enjoyed')
+
+
+def serve(port, ready):
+    os.environ['CHAT_DB_DIR'] = tempfile.mkdtemp()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    import server.app as server_module
+    httpd = make_server('127.0.0.1', port, server_module.app, threaded=True)
+    ready.set()
+    httpd.serve_forever()
+
+
+def send(port, path, bodies):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    failures = 0
+    for body in bodies:
+        conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+        resp = conn.getresponse()
+        resp.read()
+        failures += resp.status != 200
+    conn.close()
+    return failures
+
+
+def run(port, batch_size):
+    """Send EVENTS events; return (events/s, requests, failures)."""
+    names = [EVENT_NAMES[i % len(EVENT_NAMES)] for i in range(EVENTS)]
+    if batch_size is None:
+        path = '/api/track'
+        bodies = [json.dumps({'event': name}).encode() for name in names]
+    else:
+        path = '/api/track/batch'
+        bodies = [json.dumps({'events': [{'event': n} for n in names[i:i + batch_size]]}).encode()
+                  for i in range(0, EVENTS, batch_size)]
+    shares = [bodies[i::CLIENTS] for i in range(CLIENTS)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(CLIENTS) as pool:
+        failures = sum(pool.map(lambda share: send(port, path, share), shares))
+    elapsed = time.perf_counter() - start
+    return EVENTS / elapsed, len(bodies), failures
+
+
+def main():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Event()
+    proc = ctx.Process(target=serve, args=(port, ready), daemon=True)
+    proc.start()
+    ready.wait(30)
+    try:
+        run(port, 10)     # warm up
+        print(f'{EVENTS} events from {CLIENTS} keep-alive clients')
+        print(f'{"path":>22} {"requests":>9} {"events/s":>10} {"speedup":>8} {"failures":>9}')
+        single = None
+        for size in (None, *BATCH_SIZES):
+            rate, requests, failures = run(port, size)
+            single = single or rate
+            label = '/api/track' if size is None else f'/api/track/batch x{size}'
+            print(f'{label:>22} {requests:>9} {rate:>10.0f} {rate / single:>7.1f}x {failures:>9}')
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Request validation benchmark — per-request cost of the precompiled schemas.
+
+Times validate() for typical /api/track, /api/chat and /generate-pdf bodies,
+plus the cheapest rejection (a bad first line item), in microseconds per call.
+
+    python -m benchmarks.bench_validation
+"""
+import os
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from server.validation import ValidationError, validate, ORDER_PDF, CHAT_MESSAGE, TRACK_EVENT
+from benchmarks.bench_pdf_chart import make_yard
+from benchmarks.bench_pdf_stream import make_items
+
+
+def order(n):
+    items = make_items(n)
+    return {'items': items, 'yard': make_yard(min(n, 200)), 'totalWeight': 0,
+            'totalCost': sum(i['totalCost'] for i in items),
+            'totalPieces': sum(i['toOrder'] for i in items), 'totalBunks': n}
+
+
+def per_call_us(schema, payload):
+    def run():
+        try:
+            validate(schema, payload)
+        except ValidationError:
+            pass
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number * 1e6
+
+
+def main():
+    bad = order(1000)
+    bad['items'][0] = dict(bad['items'][0], current='lots')
+    cases = [
+        ('track', TRACK_EVENT, {'event': 'demo_view'}),
+        ('chat', CHAT_MESSAGE, {'recruiter_name': 'Sarah', 'message': 'Tell me about Java.',
+                                'conversation_id': '0' * 36, 'job_posting': 'Backend engineer ' * 200}),
+        ('pdf, 20 items', ORDER_PDF, order(20)),
+        ('pdf, 1k items', ORDER_PDF, order(1000)),
+        ('pdf, 1k, bad item', ORDER_PDF, bad),
+    ]
+    print(f'{"payload":>18} {"µs/call":>10}')
+    for label, schema, payload in cases:
+        print(f'{label:>18} {per_call_us(schema, payload):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
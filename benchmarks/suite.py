@@ -0,0 +1,391 @@
+"""
+End-to-end load test — every server route under the production gunicorn server.
+
+Starts ``server.production`` in a child process against a fresh data directory
+seeded with a large chat history, with /api/chat pointed at the local OpenAI
+stub (``server.openai_stub``) answering after a fixed delay. Each scenario then sends a fixed number of
+requests from a pool of keep-alive client connections and reports p50/p95/p99
+latency, requests per second and errors.
+
+    python -m benchmarks.suite                       # run and compare to the baseline
+    python -m benchmarks.suite --save-baseline       # record a new baseline
+    python -m benchmarks.suite --only pdf_200,chat --threshold 0.5
+
+Results are compared to ``benchmarks/baselines/suite.json`` when it exists: a
+scenario regresses when its p95 grows, or its RPS drops, by more than the
+threshold (default 25%), and the run then exits with status 1. Baselines are
+machine-specific; record one on the machine that will run the comparison. On
+noisy shared hosts use ``--repeat 3``, which keeps each scenario's best round.
+
+/admin/clear-logs would wipe the seeded history mid-run, so only its
+unauthorized path is timed. The PDF job status, events and download
+scenarios share one job, rendered before the first of them runs.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Nothing imported here may import server.app: the spawned server child
+# re-imports this module and must load the app only after its env is set
+from benchmarks.bench_planner import make_yard
+
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baselines', 'suite.json')
+ADMIN_TOKEN = 'bench-token'
+LLM_LATENCY = 0.05            # seconds the stubbed OpenAI call takes
+SEED_CONVERSATIONS = 2000
+SEED_MESSAGES_EACH = 10
+SEED_YARD_BUNKS = 500
+
+# body(i) returns (json payload or None, extra headers) for the i-th request
+Scenario = namedtuple('Scenario', 'name method path body requests concurrency expect')
+
+
+def _ip(i):
+    # A distinct client per request keeps /api/chat under its per-IP rate limit
+    return {'X-Forwarded-For': f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'}
+
+
+def _order(n):
+    """A /generate-pdf body with ``n`` line items, shaped like the demo client's."""
+    items = []
+    for bunk in make_yard(n):
+        to_order = bunk['capacity'] - bunk['current']
+        items.append({
+            'name': bunk['name'], 'category': bunk['category'], 'current': bunk['current'],
+            'capacity': bunk['capacity'], 'toOrder': to_order,
+            'unitPrice': bunk['unitPrice'], 'unitWeight': bunk['unitWeight'],
+            'totalCost': round(to_order * bunk['unitPrice'], 2), 'dims': bunk['dims'],
+        })
+    yard = [{'name': b['name'][:10], 'current': b['current'], 'capacity': b['capacity']}
+            for b in make_yard(min(n, 120))]
+    return {'items': items, 'yard': yard,
+            'totalWeight': sum(i['toOrder'] * i['unitWeight'] for i in items),
+            'totalCost': round(sum(i['totalCost'] for i in items), 2),
+            'totalPieces': sum(i['toOrder'] for i in items), 'totalBunks': n}
+
+
+def _scenarios():
+    orders = {n: _order(n) for n in (10, 200, 2000)}
+    yard = make_yard(200)
+    ids = [b['id'] for b in make_yard(SEED_YARD_BUNKS)]
+    admin = f'?token={ADMIN_TOKEN}'
+    job = '/api/pdf-jobs/{job}'     # filled in with a finished job's id
+    return [
+        Scenario('page_index', 'GET', '/', lambda i: (None, _ip(i)), 2000, 8, 200),
+        Scenario('page_demo', 'GET', '/demo', lambda i: (None, _ip(i)), 2000, 8, 200),
+        Scenario('static_css', 'GET', '/styles.css', lambda i: (None, {}), 2000, 8, 200),
+        Scenario('resume_range', 'GET', '/resume.pdf',
+                 lambda i: (None, {'Range': 'bytes=0-65535'}), 1000, 8, 206),
+        Scenario('health', 'GET', '/health', lambda i: (None, {}), 2000, 8, 200),
+        Scenario('track', 'POST', '/api/track',
+                 lambda i: ({'event': 'demo_view'}, _ip(i)), 2000, 8, 200),
+        Scenario('stats', 'GET', '/api/stats', lambda i: (None, {}), 2000, 8, 200),
+        Scenario('metrics', 'GET', '/metrics', lambda i: (None, {}), 1000, 8, 200),
+        Scenario('pdf_10', 'POST', '/generate-pdf', lambda i: (orders[10], {}), 200, 8, 200),
+        Scenario('pdf_200', 'POST', '/generate-pdf', lambda i: (orders[200], {}), 60, 8, 200),
+        Scenario('pdf_2000', 'POST', '/generate-pdf', lambda i: (orders[2000], {}), 12, 4, 200),
+        # Two clients stay under the job queue's depth and each worker's stream cap
+        Scenario('pdf_job_submit', 'POST', '/api/pdf-jobs', lambda i: (orders[10], {}), 100, 2, 202),
+        Scenario('pdf_job_status', 'GET', job, lambda i: (None, {}), 2000, 8, 200),
+        Scenario('pdf_job_events', 'GET', job + '/events', lambda i: (None, {}), 400, 2, 200),
+        Scenario('pdf_job_download', 'GET', job + '/pdf', lambda i: (None, {}), 400, 8, 200),
+        Scenario('plan_200', 'POST', '/api/plan', lambda i: ({'bunks': yard}, {}), 400, 8, 200),
+        Scenario('plan_yard', 'POST', '/api/plan', lambda i: ({}, {}), 200, 8, 200),
+        Scenario('inventory_get', 'GET', '/api/inventory', lambda i: (None, {}), 1000, 8, 200),
+        Scenario('inventory_update', 'POST', '/api/inventory' + admin, lambda i: ({'updates': [
+            {'id': ids[i % len(ids)], 'delta': 1 if i % 2 else -1},
+        ]}, {}), 1000, 8, 200),
+        Scenario('chat', 'POST', '/api/chat', lambda i: ({
+            'recruiter_name': 'Bench', 'message': 'What does Jason work on?',
+        }, _ip(i)), 400, 8, 200),
+        Scenario('admin_chat_stats', 'GET', '/admin/chat-stats' + admin,
+                 lambda i: (None, {}), 400, 8, 200),
+        Scenario('admin_chat_logs', 'GET', '/admin/chat-logs' + admin,
+                 lambda i: (None, {}), 8, 2, 200),
+        Scenario('admin_clear_logs_unauthorized', 'POST', '/admin/clear-logs',
+                 lambda i: (None, {}), 1000, 8, 401),
+    ]
+
+
+# ─── Server under test ────────────────────────────────────────
+
+def _seed_chat_history(db_path):
+    start = datetime(2026, 1, 1)
+    conversations, messages = [], []
+    for c in range(SEED_CONVERSATIONS):
+        conv_id = f'seed-{c:06d}'
+        when = (start + timedelta(minutes=c)).isoformat()
+        conversations.append((conv_id, f'Recruiter {c % 300}', 'Senior engineer', when, when,
+                              '10.0.0.1', SEED_MESSAGES_EACH))
+        for m in range(SEED_MESSAGES_EACH):
+            messages.append((conv_id, 'user' if m % 2 == 0 else 'assistant',
+                             'Tell me about the restock planner. ' * 4, when))
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany('INSERT INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?)', conversations)
+        conn.executemany('INSERT INTO messages (conversation_id, role, content, timestamp) '
+                         'VALUES (?, ?, ?, ?)', messages)
+    conn.close()
+
+
+def serve(port, workers, threads):
+    """Child process: seed a fresh data dir and run the production server."""
+    if 'server.app' in sys.modules:
+        raise RuntimeError('server.app was imported before the benchmark environment was set')
+    data_dir = tempfile.mkdtemp(prefix='bench-suite-')
+    from server.openai_stub import OpenAIStub
+    stub = OpenAIStub(latency_ms=LLM_LATENCY * 1000, distribution='fixed').start()
+    os.environ.pop('OPENAI_API_KEY', None)
+    os.environ.update({
+        'OPENAI_BASE_URL': stub.base_url,
+        'CHAT_DB_DIR': data_dir, 'PORT': str(port), 'ADMIN_TOKEN': ADMIN_TOKEN,
+        'WEB_CONCURRENCY': str(workers), 'GUNICORN_THREADS': str(threads),
+        'FLASK_ENV': 'production',
+    })
+    from server import production
+    production._prepare_environment()
+    import server.app as server_module
+    _seed_chat_history(server_module.CHAT_DB_PATH)
+    server_module._inventory.apply(make_yard(SEED_YARD_BUNKS))
+    options = production.build_options()
+    options.update({'accesslog': None, 'loglevel': 'warning'})
+    try:
+        production.ProductionServer(options).run()
+    finally:
+        stub.stop()
+        # Flush now: the atexit flush would otherwise run after the data dir is gone
+        server_module._timeseries.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def _wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def _finished_pdf_job(port, order, timeout=60):
+    """Submit one PDF job and wait for it; return its id."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('POST', '/api/pdf-jobs', body=json.dumps(order),
+                     headers={'Content-Type': 'application/json'})
+        job = json.loads(conn.getresponse().read())
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            conn.request('GET', job['statusUrl'])
+            status = json.loads(conn.getresponse().read())['status']
+            if status == 'done':
+                return job['id']
+            if status == 'failed':
+                break
+            time.sleep(0.1)
+    finally:
+        conn.close()
+    raise RuntimeError('PDF job for the job scenarios did not finish')
+
+
+# ─── Load generation ──────────────────────────────────────────
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_scenario(port, scenario, scale=1.0):
+    """Send the scenario's requests; return its latency and throughput summary."""
+    total = max(int(scenario.requests * scale), 1)
+    # Untimed warmup: first requests pay for lazy imports, brotli and new connections
+    warmup = min(scenario.concurrency, max(total // 10, 1))
+    encoded = {}
+    counter = itertools.count(-warmup)
+    started = []
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        mine = []
+        while True:
+            i = next(counter)
+            if i >= total:
+                break
+            payload, headers = scenario.body(i)
+            body = None
+            if payload is not None:
+                key = id(payload)
+                body = encoded.get(key) or encoded.setdefault(key, json.dumps(payload).encode())
+                headers = dict(headers, **{'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            if i == 0:
+                started.append(start)
+            try:
+                conn.request(scenario.method, scenario.path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                status = type(e).__name__
+            if i < 0:
+                continue
+            mine.append(time.perf_counter() - start)
+            if status != scenario.expect:
+                with lock:
+                    errors.append(status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    with ThreadPoolExecutor(scenario.concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(scenario.concurrency)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started[0]
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'concurrency': scenario.concurrency,
+        'errors': len(errors),
+        'rps': round(total / elapsed, 2),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return {scenario: [regression descriptions]} against a baseline run."""
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        problems = []
+        if base['p95_ms'] and result['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            problems.append(f"p95 {base['p95_ms']:.1f} → {result['p95_ms']:.1f} ms")
+        if base['rps'] and result['rps'] < base['rps'] * (1 - threshold):
+            problems.append(f"RPS {base['rps']:.4g} → {result['rps']:.4g}")
+        if result['errors'] > base.get('errors', 0):
+            problems.append(f"errors {base.get('errors', 0)} → {result['errors']}")
+        if problems:
+            regressions[name] = problems
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end route load test.')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply request counts')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='run each scenario N times and keep the best round')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float,
+                        default=float(os.environ.get('BENCH_REGRESSION_THRESHOLD', 0.25)))
+    parser.add_argument('--output', help='also write this run as JSON here')
+    args = parser.parse_args(argv)
+
+    scenarios = _scenarios()
+    if args.only:
+        wanted = set(args.only.split(','))
+        unknown = wanted - {s.name for s in scenarios}
+        if unknown:
+            parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    import socket
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    ctx = multiprocessing.get_context('spawn')
+    proc = ctx.Process(target=serve, args=(port, args.workers, args.threads), daemon=True)
+    proc.start()
+    results = {}
+    try:
+        _wait_ready(port)
+        print(f'{"scenario":>30} {"reqs":>6} {"conc":>5} {"RPS":>8} '
+              f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        job_id = None
+        for scenario in scenarios:
+            if '{job}' in scenario.path:
+                job_id = job_id or _finished_pdf_job(port, _order(10))
+                scenario = scenario._replace(path=scenario.path.format(job=job_id))
+            rounds = [run_scenario(port, scenario, args.scale) for _ in range(args.repeat)]
+            r = results[scenario.name] = min(rounds, key=lambda r: r['p95_ms'])
+            print(f'{scenario.name:>30} {r["requests"]:>6} {r["concurrency"]:>5} {r["rps"]:>8.1f} '
+                  f'{r["p50_ms"]:>8.1f} {r["p95_ms"]:>8.1f} {r["p99_ms"]:>8.1f} {r["errors"]:>7}')
+    finally:
+        proc.terminate()
+        proc.join(30)
+
+    run = {
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': f'{platform.machine()} · {os.cpu_count()} CPUs',
+        'server': {'workers': args.workers, 'threads': args.threads},
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+            f.write('\n')
+        print(f'\nbaseline saved to {os.path.relpath(args.baseline, ROOT_DIR)}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('\nno baseline yet — record one with --save-baseline')
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.threshold)
+    print(f"\nvs baseline from {baseline['recorded']} (threshold {args.threshold:.0%}):")
+    if not regressions:
+        print('  no regressions')
+        return 0
+    for name, problems in regressions.items():
+        print(f'  {name}: {"; ".join(problems)}')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,6 +21,7 @@
     // State
     let isOpen = false;
     let conversationId = '';
+    let conversationTurn = 0;   // messages the server has reported for this conversation
     let recruiterName = '';
     let jobPosting = '';
     let sending = false;
@@ -108,6 +109,7 @@
                 recruiter_name: recruiterName,
                 message: text,
                 conversation_id: conversationId,
+                turn: conversationTurn,
                 job_posting: !conversationId ? jobPosting : '',
             }),
         })
@@ -119,6 +121,7 @@
                     addMessage('error', data.error);
                 } else {
                     conversationId = data.conversation_id || conversationId;
+                    conversationTurn = data.turn || 0;
                     addMessage('assistant', data.reply);
                 }
             })
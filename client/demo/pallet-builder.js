@@ -49,14 +49,96 @@ let cameraTarget = null;   // { pos: Vector3, lookAt: Vector3, t: 0 }
 const CAMERA_FLY_SPEED = 0.03;
 
 // ─── TRACKING ──────────────────────────────────────────────────
-function trackEvent(event) {
-    fetch('/api/track', {
+// Events are queued and sent together to /api/track/batch; a beacon still
+// gets through while the page is being closed.
+const TRACK_FLUSH_MS = 2000;
+let trackQueue = [];
+let trackTimer = null;
+
+function flushTrackQueue() {
+    clearTimeout(trackTimer);
+    trackTimer = null;
+    if (!trackQueue.length) return;
+    const body = JSON.stringify({ events: trackQueue.map(event => ({ event })) });
+    trackQueue = [];
+    if (navigator.sendBeacon && navigator.sendBeacon('/api/track/batch', new Blob([body], { type: 'application/json' }))) return;
+    fetch('/api/track/batch', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ event }),
+        keepalive: true,
+        body,
     }).catch(() => {});
 }
 
+function trackEvent(event) {
+    trackQueue.push(event);
+    if (!trackTimer) trackTimer = setTimeout(flushTrackQueue, TRACK_FLUSH_MS);
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushTrackQueue();
+});
+window.addEventListener('pagehide', flushTrackQueue);
+
+// ─── INVENTORY SYNC ────────────────────────────────────────────
+// The shared yard is persisted server-side and only read here (writes need
+// the admin token); after the first load only changed bunks are fetched, and
+// an unchanged yard costs a bodyless 304. A randomized yard stays local.
+const INVENTORY_POLL_MS = 30000;
+let inventoryVersion = 0;
+let inventoryEtag = null;
+let yardIsLocal = false;
+
+async function loadInventory() {
+    try {
+        const res = await fetch('/api/inventory');
+        if (!res.ok) return;
+        const data = await res.json();
+        inventoryVersion = data.version;
+        inventoryEtag = res.headers.get('ETag');
+        // An empty shared yard leaves the random local one in place
+        if (data.bunks.length) {
+            buildYard(Object.fromEntries(data.bunks.map(b => [b.id, b.current])));
+        }
+        setInterval(syncInventory, INVENTORY_POLL_MS);
+    } catch (err) {
+        // No backend (static hosting) — the yard stays local
+    }
+}
+
+async function syncInventory() {
+    if (yardIsLocal) return;
+    try {
+        const headers = inventoryEtag ? { 'If-None-Match': inventoryEtag } : {};
+        const res = await fetch(`/api/inventory?since=${inventoryVersion}`, { headers });
+        if (res.status === 304 || !res.ok) return;
+        const data = await res.json();
+        inventoryVersion = data.version;
+        inventoryEtag = res.headers.get('ETag');
+        data.bunks.forEach(applyStock);
+        if (data.bunks.length) {
+            updateYardHealth();
+            updateSidebar();
+        }
+    } catch (err) {}
+}
+
+function applyStock(stored) {
+    const idx = bunkData.findIndex(b => b.id === stored.id);
+    const bunk = bunkData[idx];
+    if (!bunk || bunk.current === stored.current) return;
+    bunk.current = stored.current;
+    // Rebuild the bunk's stack at its current spot in the yard
+    const old = bunk.meshGroup;
+    const group = createBunkMesh(bunk, idx < 10 ? 0 : 1);
+    group.position.copy(old.position);
+    group.userData = old.userData;
+    scene.remove(old);
+    scene.add(group);
+    bunk.meshGroup = group;
+    updateBunkVisual(bunk);
+}
+
 // ─── INIT ──────────────────────────────────────────────────────
 function init() {
     initScene();
@@ -64,6 +146,7 @@ function init() {
     bindEvents();
     updateYardHealth();
     animate();
+    loadInventory();
     // Track demo page view (once per session)
     if (!sessionStorage.getItem('tracked-demo-view')) {
         trackEvent('demo_view');
@@ -147,16 +230,16 @@ function onResize() {
 }
 
 // ─── BUILD THE YARD ────────────────────────────────────────────
-function buildYard() {
+function buildYard(stock) {
     // Clear existing
     bunkData.forEach(b => { if (b.meshGroup) scene.remove(b.meshGroup); });
     bunkData = [];
     restockOrder = [];
 
-    // Randomize fill levels
+    // Stored stock levels when the server has them, otherwise randomize
     const items = CATALOG.map(item => ({
         ...item,
-        current: randomFill(item.capacity),
+        current: stock && item.id in stock ? stock[item.id] : randomFill(item.capacity),
         flagged: false,
         meshGroup: null,
     }));
@@ -443,7 +526,10 @@ function bindEvents() {
     document.getElementById('rotateLeftBtn').addEventListener('click', () => rotateCamera(-1));
     document.getElementById('rotateRightBtn').addEventListener('click', () => rotateCamera(1));
     document.getElementById('resetViewBtn').addEventListener('click', resetView);
-    document.getElementById('randomizeBtn').addEventListener('click', () => { buildYard(); });
+    document.getElementById('randomizeBtn').addEventListener('click', () => {
+        buildYard();
+        yardIsLocal = true;
+    });
     document.getElementById('searchInput').addEventListener('input', highlightSearch);
     document.querySelectorAll('.pb-cat-tab').forEach(tab => {
         tab.addEventListener('click', () => filterCategory(tab));
@@ -804,20 +890,14 @@ async function generatePdf() {
         totalWeight: (b.capacity - b.current) * b.unitWeight,
         totalCost: (b.capacity - b.current) * b.unitPrice,
         color: '#' + b.color.toString(16).padStart(6, '0'),
+        dims: b.dims,
     }));
 
-    // Build truck diagram on canvas
-    const truckCanvas = buildTruckDiagram(orderItems);
-    const truckImageData = truckCanvas.toDataURL('image/png');
-
-    // Build bunk status chart
-    const chartCanvas = buildYardChart();
-    const chartImageData = chartCanvas.toDataURL('image/png');
+    // Loading plan and yard chart are drawn server-side from this data
 
     const payload = {
         items: orderItems,
-        truckImage: truckImageData,
-        chartImage: chartImageData,
+        yard: buildYardSummary(),
         totalWeight: orderItems.reduce((s, i) => s + i.totalWeight, 0),
         totalCost: orderItems.reduce((s, i) => s + i.totalCost, 0),
         totalPieces: orderItems.reduce((s, i) => s + i.toOrder, 0),
@@ -825,15 +905,16 @@ async function generatePdf() {
     };
 
     try {
-        const res = await fetch('/generate-pdf', {
+        // The server renders in the background; wait for the job, then download
+        const res = await fetch('/api/pdf-jobs', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload),
         });
         if (!res.ok) throw new Error('Server error ' + res.status);
-        const blob = await res.blob();
-        const url = URL.createObjectURL(blob);
-        window.open(url, '_blank');
+        const job = await waitForPdfJob(await res.json());
+        if (job.status !== 'done') throw new Error('PDF job ' + job.status);
+        window.open(job.downloadUrl, '_blank');
         showStatus('Restock order PDF generated!', 'success');
         trackEvent('pdf_generated');
     } catch (err) {
@@ -845,508 +926,47 @@ async function generatePdf() {
     btn.innerHTML = '<i class="fas fa-file-pdf"></i> Generate Restock Order (PDF)';
 }
 
-// ─── 3D FLATBED TRUCK DIAGRAM (offscreen Three.js render) ─────
-function buildTruckDiagram(items) {
-    const W = 1200, H = 700;
-
-    // Offscreen renderer
-    const offCanvas = document.createElement('canvas');
-    offCanvas.width = W;
-    offCanvas.height = H;
-    const offRenderer = new THREE.WebGLRenderer({ canvas: offCanvas, antialias: true, preserveDrawingBuffer: true });
-    offRenderer.setSize(W, H);
-    offRenderer.setClearColor(0x0a0e17);
-    offRenderer.shadowMap.enabled = true;
-    offRenderer.shadowMap.type = THREE.PCFSoftShadowMap;
-
-    const offScene = new THREE.Scene();
-    offScene.fog = new THREE.FogExp2(0x0a0e17, 0.008);
-
-    // Camera — slightly above middle, off to the right
-    const offCamera = new THREE.PerspectiveCamera(42, W / H, 0.1, 500);
-    offCamera.position.set(28, 18, 22);
-    offCamera.lookAt(0, 2, -4);
-
-    // Lights
-    offScene.add(new THREE.AmbientLight(0xffffff, 0.45));
-    const offSun = new THREE.DirectionalLight(0xffeedd, 0.9);
-    offSun.position.set(30, 40, 25);
-    offSun.castShadow = true;
-    offSun.shadow.mapSize.set(2048, 2048);
-    offSun.shadow.camera.left = -40;
-    offSun.shadow.camera.right = 40;
-    offSun.shadow.camera.top = 30;
-    offSun.shadow.camera.bottom = -30;
-    offScene.add(offSun);
-    const offFill = new THREE.DirectionalLight(0x8899cc, 0.3);
-    offFill.position.set(-15, 15, -10);
-    offScene.add(offFill);
-
-    // Ground plane
-    const gndGeo = new THREE.PlaneGeometry(120, 120);
-    const gndMat = new THREE.MeshStandardMaterial({ color: 0x1a1a2e, roughness: 0.95 });
-    const gnd = new THREE.Mesh(gndGeo, gndMat);
-    gnd.rotation.x = -Math.PI / 2;
-    gnd.receiveShadow = true;
-    offScene.add(gnd);
-
-    // ── BUILD FLATBED TRUCK ──
-    const truck = new THREE.Group();
-
-    // --- Chassis frame (long steel I-beams) ---
-    const frameMat = new THREE.MeshStandardMaterial({ color: 0x222233, roughness: 0.6, metalness: 0.5 });
-    const frameL = 30; // total truck length
-    const frameBeam = new THREE.BoxGeometry(frameL, 0.3, 0.4);
-    const leftRail = new THREE.Mesh(frameBeam, frameMat);
-    leftRail.position.set(0, 0.8, -1.8);
-    leftRail.castShadow = true;
-    truck.add(leftRail);
-    const rightRail = new THREE.Mesh(frameBeam, frameMat);
-    rightRail.position.set(0, 0.8, 1.8);
-    rightRail.castShadow = true;
-    truck.add(rightRail);
-    // Cross members
-    for (let cx = -frameL/2 + 1; cx <= frameL/2 - 1; cx += 2.5) {
-        const crossGeo = new THREE.BoxGeometry(0.2, 0.2, 4);
-        const cross = new THREE.Mesh(crossGeo, frameMat);
-        cross.position.set(cx, 0.75, 0);
-        truck.add(cross);
-    }
-
-    // --- Flatbed deck (wood plank surface) ---
-    const deckW = 24, deckD = 4.8, deckH2 = 0.15;
-    const deckMat = new THREE.MeshStandardMaterial({ color: 0x3a3525, roughness: 0.9 });
-    const deckMesh = new THREE.Mesh(new THREE.BoxGeometry(deckW, deckH2, deckD), deckMat);
-    deckMesh.position.set(2, 1.05, 0);
-    deckMesh.castShadow = true;
-    deckMesh.receiveShadow = true;
-    truck.add(deckMesh);
-    // Plank lines on the deck
-    const plankLineMat = new THREE.MeshBasicMaterial({ color: 0x2e2a1e });
-    for (let pz = -deckD/2 + 0.4; pz < deckD/2; pz += 0.45) {
-        const plLine = new THREE.Mesh(new THREE.BoxGeometry(deckW - 0.1, 0.01, 0.02), plankLineMat);
-        plLine.position.set(2, 1.13, pz);
-        truck.add(plLine);
-    }
-
-    // --- Headache rack (behind cab) ---
-    const hrMat = new THREE.MeshStandardMaterial({ color: 0xF96302, roughness: 0.4, metalness: 0.5 });
-    // Main posts
-    const hrH = 4;
-    const hrX = 2 - deckW/2 + 0.2;
-    [[-1.8], [1.8]].forEach(([z]) => {
-        const post = new THREE.Mesh(new THREE.BoxGeometry(0.12, hrH, 0.12), hrMat);
-        post.position.set(hrX, 1.13 + hrH/2, z);
-        post.castShadow = true;
-        truck.add(post);
-    });
-    // Cross bars
-    for (let hy = 1.7; hy < hrH + 1.13; hy += 0.8) {
-        const bar = new THREE.Mesh(new THREE.BoxGeometry(0.08, 0.08, 3.8), hrMat);
-        bar.position.set(hrX, hy, 0);
-        truck.add(bar);
-    }
-    // Top rail
-    const topRail = new THREE.Mesh(new THREE.BoxGeometry(0.15, 0.15, 4), hrMat);
-    topRail.position.set(hrX, 1.13 + hrH, 0);
-    truck.add(topRail);
-
-    // --- Cab (semi-truck tractor) ---
-    const cabGroup = new THREE.Group();
-    const cabMat = new THREE.MeshStandardMaterial({ color: 0xF96302, roughness: 0.35, metalness: 0.3 });
-    const cabDarkMat = new THREE.MeshStandardMaterial({ color: 0xcc5500, roughness: 0.35, metalness: 0.3 });
-    const glassMat = new THREE.MeshStandardMaterial({ color: 0x8aaccf, roughness: 0.1, metalness: 0.6, transparent: true, opacity: 0.7 });
-
-    // Cab box
-    const cabBody = new THREE.Mesh(new THREE.BoxGeometry(4, 3.2, 3.6), cabMat);
-    cabBody.position.set(-12, 2.6, 0);
-    cabBody.castShadow = true;
-    cabGroup.add(cabBody);
-    // Hood (lower extension)
-    const hood = new THREE.Mesh(new THREE.BoxGeometry(3, 1.6, 3.4), cabDarkMat);
-    hood.position.set(-15, 1.4, 0);
-    hood.castShadow = true;
-    cabGroup.add(hood);
-    // Windshield
-    const windshield = new THREE.Mesh(new THREE.BoxGeometry(0.08, 1.8, 2.8), glassMat);
-    windshield.position.set(-13.5, 3.0, 0);
-    windshield.rotation.z = 0.15;
-    cabGroup.add(windshield);
-    // Side windows
-    const sideWinR = new THREE.Mesh(new THREE.BoxGeometry(2.5, 1.2, 0.06), glassMat);
-    sideWinR.position.set(-12, 3.2, 1.82);
-    cabGroup.add(sideWinR);
-    const sideWinL = new THREE.Mesh(new THREE.BoxGeometry(2.5, 1.2, 0.06), glassMat);
-    sideWinL.position.set(-12, 3.2, -1.82);
-    cabGroup.add(sideWinL);
-    // Exhaust stacks
-    const exhMat = new THREE.MeshStandardMaterial({ color: 0x666666, roughness: 0.3, metalness: 0.7 });
-    [-1.6, 1.6].forEach(ez => {
-        const exh = new THREE.Mesh(new THREE.CylinderGeometry(0.12, 0.12, 2.5, 8), exhMat);
-        exh.position.set(-10.3, 4.7, ez);
-        cabGroup.add(exh);
-        // Cap
-        const cap = new THREE.Mesh(new THREE.CylinderGeometry(0.18, 0.12, 0.2, 8), exhMat);
-        cap.position.set(-10.3, 6.0, ez);
-        cabGroup.add(cap);
-    });
-    // Headlights
-    const hlMat = new THREE.MeshBasicMaterial({ color: 0xffffaa });
-    [-1, 1].forEach(hz => {
-        const hl = new THREE.Mesh(new THREE.SphereGeometry(0.18, 8, 8), hlMat);
-        hl.position.set(-16.5, 1.6, hz);
-        cabGroup.add(hl);
-    });
-    // Grille
-    const grilleMat = new THREE.MeshStandardMaterial({ color: 0x888888, roughness: 0.4, metalness: 0.6 });
-    const grille = new THREE.Mesh(new THREE.BoxGeometry(0.08, 1.2, 2.8), grilleMat);
-    grille.position.set(-16.52, 1.4, 0);
-    cabGroup.add(grille);
-    // Bumper
-    const bumperMat = new THREE.MeshStandardMaterial({ color: 0x555555, roughness: 0.4, metalness: 0.5 });
-    const bumper = new THREE.Mesh(new THREE.BoxGeometry(0.4, 0.4, 3.8), bumperMat);
-    bumper.position.set(-16.7, 0.7, 0);
-    cabGroup.add(bumper);
-    // Steps
-    const stepMat = new THREE.MeshStandardMaterial({ color: 0x444444, roughness: 0.5 });
-    [1.9, -1.9].forEach(sz => {
-        const step = new THREE.Mesh(new THREE.BoxGeometry(0.8, 0.12, 0.6), stepMat);
-        step.position.set(-11, 1.0, sz);
-        cabGroup.add(step);
-    });
-    // Fuel tanks (cylindrical, under cab)
-    const tankMat = new THREE.MeshStandardMaterial({ color: 0x444455, roughness: 0.4, metalness: 0.5 });
-    [-2.2, 2.2].forEach(tz => {
-        const tank = new THREE.Mesh(new THREE.CylinderGeometry(0.5, 0.5, 2.5, 12), tankMat);
-        tank.rotation.z = Math.PI / 2;
-        tank.position.set(-11, 0.9, tz);
-        cabGroup.add(tank);
-    });
-
-    truck.add(cabGroup);
-
-    // --- Wheels (with dual tires) ---
-    const wheelMat = new THREE.MeshStandardMaterial({ color: 0x111111, roughness: 0.9 });
-    const rimMat = new THREE.MeshStandardMaterial({ color: 0x666666, roughness: 0.3, metalness: 0.7 });
-    const hubMat = new THREE.MeshStandardMaterial({ color: 0x888888, roughness: 0.3, metalness: 0.5 });
-
-    function addWheelSet(x, z, dual) {
-        const offsets = dual ? [-0.25, 0.25] : [0];
-        offsets.forEach(dz => {
-            const tire = new THREE.Mesh(new THREE.CylinderGeometry(0.5, 0.5, 0.35, 16), wheelMat);
-            tire.rotation.x = Math.PI / 2;
-            tire.position.set(x, 0.5, z + dz);
-            tire.castShadow = true;
-            truck.add(tire);
-            const rim = new THREE.Mesh(new THREE.CylinderGeometry(0.25, 0.25, 0.37, 12), rimMat);
-            rim.rotation.x = Math.PI / 2;
-            rim.position.set(x, 0.5, z + dz);
-            truck.add(rim);
-            const hub = new THREE.Mesh(new THREE.CylinderGeometry(0.08, 0.08, 0.39, 8), hubMat);
-            hub.rotation.x = Math.PI / 2;
-            hub.position.set(x, 0.5, z + dz);
-            truck.add(hub);
-        });
-    }
-    // Steer axle
-    addWheelSet(-15, -1.85, false);
-    addWheelSet(-15, 1.85, false);
-    // Drive tandem
-    addWheelSet(-10, -1.85, true);
-    addWheelSet(-10, 1.85, true);
-    addWheelSet(-8.5, -1.85, true);
-    addWheelSet(-8.5, 1.85, true);
-    // Trailer tandem
-    addWheelSet(11, -1.85, true);
-    addWheelSet(11, 1.85, true);
-    addWheelSet(12.5, -1.85, true);
-    addWheelSet(12.5, 1.85, true);
-
-    // --- Fenders / Mudflaps ---
-    const fenderMat = new THREE.MeshStandardMaterial({ color: 0x333333, roughness: 0.5 });
-    // Cab steer axle fenders (above wheels, on cab body)
-    [-2.15, 2.15].forEach(fz => {
-        const fender = new THREE.Mesh(new THREE.BoxGeometry(1.8, 0.06, 0.6), fenderMat);
-        fender.position.set(-15, 1.15, fz);
-        truck.add(fender);
-    });
-    // Drive tandem fenders (behind cab, above wheels)
-    [-2.25, 2.25].forEach(fz => {
-        const fender = new THREE.Mesh(new THREE.BoxGeometry(3.5, 0.06, 0.8), fenderMat);
-        fender.position.set(-9.25, 1.15, fz);
-        truck.add(fender);
-    });
-    // Trailer tandem — mudguard brackets under the deck, outboard
-    const mudguardMat = new THREE.MeshStandardMaterial({ color: 0x2a2a2a, roughness: 0.6 });
-    [-2.35, 2.35].forEach(fz => {
-        // Horizontal mudguard above trailer wheels
-        const guard = new THREE.Mesh(new THREE.BoxGeometry(3.8, 0.06, 0.55), mudguardMat);
-        guard.position.set(11.75, 1.08, fz);
-        truck.add(guard);
-        // Vertical bracket connecting mudguard to frame
-        const bracket = new THREE.Mesh(new THREE.BoxGeometry(0.08, 0.5, 0.08), mudguardMat);
-        bracket.position.set(10, 0.85, fz);
-        truck.add(bracket);
-        const bracket2 = new THREE.Mesh(new THREE.BoxGeometry(0.08, 0.5, 0.08), mudguardMat);
-        bracket2.position.set(13.5, 0.85, fz);
-        truck.add(bracket2);
-        // Rear mudflap
-        const flap = new THREE.Mesh(new THREE.BoxGeometry(0.06, 0.6, 0.4), mudguardMat);
-        flap.position.set(13.8, 0.7, fz);
-        truck.add(flap);
-    });
-
-    offScene.add(truck);
-
-    // ── BIN-PACK BUNKS ONTO THE 3D FLATBED ──
-    const deckTop = 1.13;
-    const loadableLength = deckW - 1.5; // leave space near headache rack
-    const loadableWidth = deckD - 0.6;
-    const deckStartX = hrX + 0.5; // start loading after headache rack
-
-    // Sort heaviest first
-    const sorted = [...items].sort((a, b) => {
-        const wDiff = b.totalWeight - a.totalWeight;
-        if (Math.abs(wDiff) > 100) return wDiff;
-        return b.toOrder - a.toOrder;
-    });
-
-    // Calculate bunk 3D dimensions based on order quantity
-    const bunkModels = sorted.map(item => {
-        const pcs = item.toOrder;
-        const isSheet = item.category === 'Sheet';
-        const bunkL = Math.min(Math.max(1.5, pcs * 0.012 + 1), 4.5); // length along truck
-        const bunkW2 = Math.min(Math.max(1.2, pcs * 0.008 + 1), loadableWidth * 0.9); // width across truck
-        const bunkH2 = isSheet ? Math.min(Math.max(0.5, pcs * 0.02), 2) : Math.min(Math.max(0.6, pcs * 0.008 + 0.3), 2.5);
-        return { ...item, bunkL, bunkW: bunkW2, bunkH: bunkH2 };
-    });
-
-    // 2D bin-packing on the deck (X = along truck, Z = across truck)
-    let curPX = deckStartX;
-    let curPZ = -loadableWidth / 2 + 0.3;
-    let rowMaxL = 0;
-    const placedBunks = [];
-
-    bunkModels.forEach(bm => {
-        if (curPZ + bm.bunkW > loadableWidth / 2) {
-            // Next row along the truck
-            curPX += rowMaxL + 0.3;
-            curPZ = -loadableWidth / 2 + 0.3;
-            rowMaxL = 0;
-        }
-        if (curPX + bm.bunkL > deckStartX + loadableLength) return; // no more room
-
-        placedBunks.push({ ...bm, placeX: curPX + bm.bunkL / 2, placeZ: curPZ + bm.bunkW / 2 });
-        curPZ += bm.bunkW + 0.2;
-        rowMaxL = Math.max(rowMaxL, bm.bunkL);
-    });
-
-    // Create 3D bunk meshes on the deck
-    placedBunks.forEach(bm => {
-        const bGroup = new THREE.Group();
-        const isSheet = bm.category === 'Sheet';
-        const colorHex = parseInt(bm.color.replace('#', ''), 16);
-
-        // Dunnage (cradle sticks under bunk)
-        const dunMat = new THREE.MeshStandardMaterial({ color: 0x555555, roughness: 0.6 });
-        [-bm.bunkL * 0.3, bm.bunkL * 0.3].forEach(dx => {
-            const dun = new THREE.Mesh(new THREE.BoxGeometry(0.08, 0.08, bm.bunkW + 0.1), dunMat);
-            dun.position.set(dx, 0.04, 0);
-            bGroup.add(dun);
-        });
-
-        if (isSheet) {
-            // Stacked sheets
-            const sheetH = 0.025;
-            const gap = 0.005;
-            const numSheets = Math.min(Math.floor(bm.bunkH / (sheetH + gap)), 40);
-            const sMat = new THREE.MeshStandardMaterial({ color: colorHex, roughness: 0.7 });
-            const sAlt = new THREE.MeshStandardMaterial({ color: darkenColor(colorHex, 0.9), roughness: 0.7 });
-            for (let s = 0; s < numSheets; s++) {
-                const sh = new THREE.Mesh(
-                    new THREE.BoxGeometry(bm.bunkL - 0.1, sheetH, bm.bunkW - 0.05),
-                    s % 2 === 0 ? sMat : sAlt
-                );
-                sh.position.y = 0.08 + s * (sheetH + gap) + sheetH / 2;
-                sh.castShadow = true;
-                sh.receiveShadow = true;
-                bGroup.add(sh);
+// Resolves with the finished job: server-sent events when available, polling otherwise.
+function waitForPdfJob(job) {
+    return new Promise((resolve, reject) => {
+        const poll = async () => {
+            try {
+                const res = await fetch(job.statusUrl, { cache: 'no-store' });
+                if (!res.ok) throw new Error('Server error ' + res.status);
+                const state = await res.json();
+                if (state.status === 'done' || state.status === 'failed') resolve(state);
+                else setTimeout(poll, (Number(res.headers.get('Retry-After')) || 1) * 1000);
+            } catch (err) {
+                reject(err);
             }
-        } else {
-            // Stacked boards with sticker layers
-            const boardH = 0.04;
-            const boardGap = 0.008;
-            const stickerEvery = 5;
-            const numBoards = Math.min(Math.floor(bm.bunkH / (boardH + boardGap)), 30);
-            const bMat = new THREE.MeshStandardMaterial({ color: colorHex, roughness: 0.85 });
-            const bAlt = new THREE.MeshStandardMaterial({ color: darkenColor(colorHex, 0.9), roughness: 0.85 });
-            const stMat = new THREE.MeshStandardMaterial({ color: 0x555566, roughness: 0.5 });
-
-            let ly = 0.08;
-            for (let b3 = 0; b3 < numBoards; b3++) {
-                if (b3 > 0 && b3 % stickerEvery === 0) {
-                    // Sticker separator
-                    [-bm.bunkL * 0.3, 0, bm.bunkL * 0.3].forEach(sx => {
-                        const st = new THREE.Mesh(new THREE.BoxGeometry(0.06, 0.03, bm.bunkW - 0.05), stMat);
-                        st.position.set(sx, ly + 0.015, 0);
-                        bGroup.add(st);
-                    });
-                    ly += 0.035;
-                }
-                // Row of boards
-                const boardsAcross = Math.max(2, Math.floor(bm.bunkW / 0.15));
-                const startZ2 = -bm.bunkW / 2 + 0.08;
-                const spacing = (bm.bunkW - 0.16) / boardsAcross;
-                for (let ba = 0; ba < boardsAcross; ba++) {
-                    const bd = new THREE.Mesh(
-                        new THREE.BoxGeometry(bm.bunkL - 0.15, boardH, spacing - 0.01),
-                        (b3 + ba) % 2 === 0 ? bMat : bAlt
-                    );
-                    bd.position.set(0, ly + boardH / 2, startZ2 + ba * spacing + spacing / 2);
-                    bd.castShadow = true;
-                    bd.receiveShadow = true;
-                    bGroup.add(bd);
-                }
-                ly += boardH + boardGap;
+        };
+        if (!window.EventSource) return poll();
+
+        const events = new EventSource(job.statusUrl + '/events');
+        events.addEventListener('status', e => {
+            const state = JSON.parse(e.data);
+            if (state.status === 'done' || state.status === 'failed') {
+                events.close();
+                resolve(state);
             }
-        }
-
-        // Banding straps
-        const strapMat3 = new THREE.MeshStandardMaterial({ color: 0xF96302, roughness: 0.3, metalness: 0.6 });
-        [-bm.bunkL * 0.25, bm.bunkL * 0.25].forEach(sx => {
-            // Vertical straps (front and back)
-            const vStrap = new THREE.Mesh(new THREE.BoxGeometry(0.02, bm.bunkH, 0.02), strapMat3);
-            vStrap.position.set(sx, 0.08 + bm.bunkH / 2, bm.bunkW / 2 - 0.02);
-            bGroup.add(vStrap);
-            const vStrapB = new THREE.Mesh(new THREE.BoxGeometry(0.02, bm.bunkH, 0.02), strapMat3);
-            vStrapB.position.set(sx, 0.08 + bm.bunkH / 2, -bm.bunkW / 2 + 0.02);
-            bGroup.add(vStrapB);
-            // Top strap
-            const tStrap = new THREE.Mesh(new THREE.BoxGeometry(0.02, 0.02, bm.bunkW), strapMat3);
-            tStrap.position.set(sx, 0.08 + bm.bunkH, 0);
-            bGroup.add(tStrap);
         });
-
-        // Label sprite
-        const lblCanvas = document.createElement('canvas');
-        lblCanvas.width = 256;
-        lblCanvas.height = 64;
-        const lblCtx = lblCanvas.getContext('2d');
-        lblCtx.clearRect(0, 0, 256, 64);
-        lblCtx.fillStyle = '#F96302';
-        lblCtx.font = 'bold 20px monospace';
-        lblCtx.textAlign = 'center';
-        lblCtx.fillText(bm.name, 128, 24);
-        lblCtx.fillStyle = '#ffffff';
-        lblCtx.font = '16px monospace';
-        lblCtx.fillText(bm.toOrder + ' pcs', 128, 48);
-        const lblTex = new THREE.CanvasTexture(lblCanvas);
-        lblTex.minFilter = THREE.LinearFilter;
-        const lblSprite = new THREE.Sprite(new THREE.SpriteMaterial({ map: lblTex, transparent: true }));
-        lblSprite.scale.set(2, 0.5, 1);
-        lblSprite.position.set(0, bm.bunkH + 0.5, 0);
-        bGroup.add(lblSprite);
-
-        bGroup.position.set(bm.placeX + 2, deckTop, bm.placeZ);
-        offScene.add(bGroup);
+        events.onerror = () => {
+            // Stream dropped, timed out or refused (503) — fall back to polling
+            events.close();
+            poll();
+        };
     });
-
-    // ── 2D OVERLAY (title, weight, load bar) drawn after render ──
-    offRenderer.render(offScene, offCamera);
-
-    // Get the 3D render, then draw 2D text overlay on top
-    const finalCanvas = document.createElement('canvas');
-    finalCanvas.width = W;
-    finalCanvas.height = H;
-    const fCtx = finalCanvas.getContext('2d');
-    fCtx.drawImage(offCanvas, 0, 0);
-
-    // Title
-    fCtx.fillStyle = '#F96302';
-    fCtx.font = 'bold 20px monospace';
-    fCtx.textAlign = 'center';
-    fCtx.fillText('INCOMING DELIVERY — FLATBED LOADING PLAN', W / 2, 30);
-
-    // Weight / utilization
-    const totalW = items.reduce((s, i) => s + i.totalWeight, 0);
-    const pctLoad = (totalW / TRUCK_MAX_LBS * 100).toFixed(1);
-    fCtx.fillStyle = '#94a3b8';
-    fCtx.font = '13px monospace';
-    fCtx.fillText(
-        `Total: ${totalW.toLocaleString()} lbs / ${TRUCK_MAX_LBS.toLocaleString()} lbs (${pctLoad}% loaded)  •  ${placedBunks.length} bunk${placedBunks.length !== 1 ? 's' : ''}`,
-        W / 2, 52
-    );
-
-    // Load bar
-    const barX = W / 2 - 220, barY2 = 60, barW2 = 440, barH2 = 10;
-    fCtx.fillStyle = '#1a2233';
-    fCtx.fillRect(barX, barY2, barW2, barH2);
-    const lPct = Math.min(totalW / TRUCK_MAX_LBS, 1);
-    fCtx.fillStyle = lPct > 0.9 ? '#ef4444' : lPct > 0.7 ? '#eab308' : '#22c55e';
-    fCtx.fillRect(barX, barY2, barW2 * lPct, barH2);
-    fCtx.strokeStyle = '#333';
-    fCtx.lineWidth = 1;
-    fCtx.strokeRect(barX, barY2, barW2, barH2);
-
-    // Cleanup offscreen renderer
-    offRenderer.dispose();
-
-    return finalCanvas;
 }
 
-// ─── YARD HEALTH CHART ─────────────────────────────────────────
-function buildYardChart() {
-    const W = 900, H = 260;
-    const canvas = document.createElement('canvas');
-    canvas.width = W;
-    canvas.height = H;
-    const ctx = canvas.getContext('2d');
-
-    ctx.fillStyle = '#0f1629';
-    ctx.fillRect(0, 0, W, H);
-
-    ctx.fillStyle = '#F96302';
-    ctx.font = 'bold 14px monospace';
-    ctx.textAlign = 'center';
-    ctx.fillText('YARD INVENTORY STATUS — ALL BUNKS', W / 2, 22);
-
-    const barW = Math.min(36, (W - 80) / bunkData.length - 4);
-    const startX = 40;
-    const barArea = H - 65;
-    const baseY = H - 30;
-
-    bunkData.forEach((b, i) => {
-        const pct = b.current / b.capacity;
-        const x = startX + i * (barW + 4);
-        const h = barArea * pct;
-
-        // Background bar
-        ctx.fillStyle = '#1a2233';
-        ctx.fillRect(x, baseY - barArea, barW, barArea);
-
-        // Fill bar
-        ctx.fillStyle = getFillColorCSS(pct);
-        ctx.fillRect(x, baseY - h, barW, h);
-
-        // Flagged border
-        if (b.flagged) {
-            ctx.strokeStyle = '#F96302';
-            ctx.lineWidth = 2;
-            ctx.strokeRect(x - 1, baseY - barArea - 1, barW + 2, barArea + 2);
-        }
-
-        // Label
-        ctx.save();
-        ctx.translate(x + barW / 2, baseY + 4);
-        ctx.rotate(Math.PI / 4);
-        ctx.fillStyle = '#94a3b8';
-        ctx.font = '8px monospace';
-        ctx.textAlign = 'left';
-        ctx.fillText(b.name.substring(0, 10), 0, 0);
-        ctx.restore();
-    });
-
-    return canvas;
+// ─── YARD HEALTH SUMMARY ───────────────────────────────────────
+// The PDF server draws the chart from these few fields per bunk.
+function buildYardSummary() {
+    return bunkData.map(b => ({
+        name: b.name.substring(0, 10),
+        current: b.current,
+        capacity: b.capacity,
+        flagged: !!b.flagged,
+    }));
 }
 
 // ─── UTILITIES ─────────────────────────────────────────────────
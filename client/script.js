@@ -480,15 +480,39 @@
     // ============================================
     const API_BASE = '';  // same-origin — served by Flask
 
-    function trackEvent(event) {
-        fetch(`${API_BASE}/api/track`, {
+    // Events are queued and sent together to /api/track/batch; a beacon
+    // still gets through while the page is being closed
+    const TRACK_FLUSH_MS = 2000;
+    let trackQueue = [];
+    let trackTimer = null;
+
+    function flushTrackQueue() {
+        clearTimeout(trackTimer);
+        trackTimer = null;
+        if (!trackQueue.length) return;
+        const body = JSON.stringify({ events: trackQueue.map(event => ({ event })) });
+        trackQueue = [];
+        const url = `${API_BASE}/api/track/batch`;
+        if (navigator.sendBeacon && navigator.sendBeacon(url, new Blob([body], { type: 'application/json' }))) return;
+        fetch(url, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             mode: 'cors',
-            body: JSON.stringify({ event }),
+            keepalive: true,
+            body,
         }).catch(() => {});
     }
 
+    function trackEvent(event) {
+        trackQueue.push(event);
+        if (!trackTimer) trackTimer = setTimeout(flushTrackQueue, TRACK_FLUSH_MS);
+    }
+
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') flushTrackQueue();
+    });
+    window.addEventListener('pagehide', flushTrackQueue);
+
     // Track portfolio page view (once per session)
     if (!sessionStorage.getItem('tracked-portfolio-view')) {
         trackEvent('portfolio_view');
@@ -532,6 +556,7 @@
         }
         enjoyedBtn.addEventListener('click', () => {
             trackEvent('resume_enjoyed');
+            flushTrackQueue();  // the stats refresh below should include the vote
             enjoyedBtn.innerHTML = '<i class="fas fa-check"></i> Thanks!';
             enjoyedBtn.classList.add('voted');
             enjoyedBtn.disabled = true;
@@ -0,0 +1,195 @@
+"""
+Access logging — one JSON line per request, written off the request thread.
+
+The request path only builds a small dict and puts it on a bounded queue with
+``put_nowait``: if the writer falls behind and the queue is full, the entry is
+dropped and counted in ``access_log_dropped_total`` rather than making the
+request wait. One background thread per worker drains the queue and appends
+each batch with a single ``write`` to a file opened ``O_APPEND``, so several
+gunicorn workers can share one file without interleaving lines.
+
+The file is rotated by size (``access.log`` → ``access.log.1`` → ...). When a
+worker finds that another one has already rotated it, it just reopens the new
+file. ``ACCESS_LOG_PATH=-`` writes to stdout instead, unrotated. Client IPs
+are logged only as a keyed hash; set ``ACCESS_LOG_SALT`` to make the hashes
+comparable across workers and restarts.
+
+Logging is off unless ``ACCESS_LOG_PATH`` is set.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+from prometheus_client import Counter
+
+ACCESS_LOG_PATH = os.environ.get('ACCESS_LOG_PATH', '')
+ACCESS_LOG_MAX_BYTES = int(os.environ.get('ACCESS_LOG_MAX_BYTES', 10 * 1024 * 1024))
+ACCESS_LOG_BACKUPS = int(os.environ.get('ACCESS_LOG_BACKUPS', 5))
+ACCESS_LOG_QUEUE = int(os.environ.get('ACCESS_LOG_QUEUE', 10000))
+ACCESS_LOG_SALT = os.environ.get('ACCESS_LOG_SALT', '').encode() or os.urandom(16)
+
+ACCESS_LOG_DROPPED = Counter(
+    'access_log_dropped_total',
+    'Access log entries lost because the queue was full (queue_full) or the write failed (write_error)',
+    ['reason']
+)
+
+_STOP = object()
+
+
+def hash_ip(ip, salt=ACCESS_LOG_SALT):
+    """A short keyed hash of a client IP, so logs never hold the address itself."""
+    return hashlib.blake2b(ip.encode(), key=salt[:64], digest_size=8).hexdigest()
+
+
+class AccessLog:
+    """Bounded, non-blocking JSON-lines access log with size-based rotation."""
+
+    def __init__(self, path=ACCESS_LOG_PATH, max_bytes=ACCESS_LOG_MAX_BYTES,
+                 backups=ACCESS_LOG_BACKUPS, maxsize=ACCESS_LOG_QUEUE, batch_max=256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._batch_max = batch_max
+        self._fd = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._unwritten = 0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def log(self, entry):
+        """Queue an entry (a JSON-serializable dict); never blocks."""
+        if self._thread is None:
+            self._ensure_started()
+        with self._idle:
+            self._unwritten += 1
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            ACCESS_LOG_DROPPED.labels(reason='queue_full').inc()
+            self._done(1)
+
+    def flush(self, timeout=None):
+        """Block until every queued entry has been written (or dropped)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unwritten == 0, timeout=timeout)
+
+    def close(self, timeout=5):
+        """Write what is queued and stop the writer thread."""
+        if self._thread is not None:
+            self.flush(timeout)
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_fd()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+                self._thread.start()
+
+    def _done(self, n):
+        with self._idle:
+            self._unwritten -= n
+            if not self._unwritten:
+                self._idle.notify_all()
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            stop = False
+            while len(batch) < self._batch_max:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            data = ''.join(json.dumps(e, separators=(',', ':'), default=str) + '\n' for e in batch).encode()
+            try:
+                self._write(data)
+            except (OSError, ValueError) as e:
+                ACCESS_LOG_DROPPED.labels(reason='write_error').inc(len(batch))
+                print(f'Warning: dropped {len(batch)} access log entries: {e}')
+                self._close_fd()     # reopened on the next batch
+            self._done(len(batch))
+            if stop:
+                return
+
+    # ─── File handling ────────────────────────────────────────
+
+    def _write(self, data):
+        if self._fd is None:
+            self._reopen()
+        if self._fd != 1:
+            size = os.fstat(self._fd).st_size
+            if size and size + len(data) > self.max_bytes:
+                self._rotate()
+        os.write(self._fd, data)
+
+    def _close_fd(self):
+        if self._fd is not None and self._fd != 1:
+            os.close(self._fd)
+        self._fd = None
+
+    def _reopen(self):
+        self._close_fd()
+        if self.path == '-':
+            self._fd = 1
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _rotate(self):
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._fd).st_ino:
+            # Another worker rotated it already; follow the new file
+            self._reopen()
+            return
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                src = f'{self.path}.{i}'
+                if os.path.exists(src):
+                    os.replace(src, f'{self.path}.{i + 1}')
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.unlink(self.path)
+        self._reopen()
+
+
+def access_entry(started, endpoint, method, path, status, nbytes, ip, **extra):
+    """The fields logged for one request; ``started`` is a perf_counter() reading."""
+    entry = {
+        'ts': round(time.time(), 3),
+        'method': method,
+        'path': path,
+        'endpoint': endpoint,
+        'status': status,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        'bytes': nbytes,
+        'ip_hash': hash_ip(ip),
+    }
+    entry.update((k, v) for k, v in extra.items() if v is not None)
+    return entry
@@ -2,29 +2,24 @@
 MitchellSoftware — Flask Backend
 Portfolio server handling PDF generation, AI chatbot, metrics, and static file serving.
 """
-import io
-import base64
+import atexit
 import json
 import time
 import os
 import sys
 import sqlite3
+import tempfile
+import threading
 import uuid
-import psutil
 from datetime import datetime
 
-from flask import Flask, request, send_file, jsonify, Response
+from flask import Flask, request, jsonify, Response, abort
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph, Image,
-    PageBreak, HRFlowable
+from prometheus_client import (
+    REGISTRY, Gauge, CollectorRegistry, generate_latest, multiprocess,
+    CONTENT_TYPE_LATEST,
 )
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
 # ─── Path Setup ────────────────────────────────────────────────
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,75 +30,81 @@ AI_DIR = os.path.join(ROOT_DIR, 'ai')
 sys.path.insert(0, ROOT_DIR)
 
 from ai.prompt import load_system_prompt
+from server.access_log import AccessLog, access_entry
+from server.body_limits import (
+    InflightBudget, body_limit, MAX_BODY_LIMIT, REQUEST_BODY_REJECTED,
+)
+from server.chat_store import CHAT_HISTORY_STALE, ChatWriter
+from server.counters import CounterCollector, CounterService, create_counter_table
+from server.inventory import InventoryStore, InventoryError
+from server.llm_gateway import LLMGateway, LLMUnavailable, make_openai_client
+from server.metrics import ExpositionCache, observe_request
+from server.file_sender import send_large_file
+from server.pdf_jobs import PdfJobQueue, JobQueueFull, FINISHED
+from server.profiling import RequestProfiler, summary, to_collapsed, to_speedscope
+from server.route_policy import RouteClassifier
+from server.shared_state import make_state
+from server.static_assets import AssetCache
+from server import timing
+from server.timeseries import TimeSeriesStore, TimeSeriesError
+from server.timing import span
+from server.validation import (
+    ValidationError, validate, ORDER_PDF, CHAT_MESSAGE, TRACK_EVENT, TRACK_BATCH,
+)
 
 app = Flask(__name__, static_folder=CLIENT_DIR, static_url_path='')
+# Backstop for anything that bypasses the per-route limits in limit_request_body()
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_LIMIT
 CORS(app, resources={r"/api/*": {"origins": "*"}, r"/metrics": {"origins": "*"}, r"/admin/*": {"origins": "*"}})
 
 SERVER_START_TIME = time.time()
 
-# ─── Prometheus Counters ───────────────────────────────────────
-PORTFOLIO_VIEWS = Counter(
-    'portfolio_page_views_total',
-    'Total views of the main portfolio page'
-)
-DEMO_VIEWS = Counter(
-    'demo_page_views_total',
-    'Total views of the Lumber Yard Restock Planner demo'
-)
-PDF_GENERATIONS = Counter(
-    'pdf_generations_total',
-    'Total PDF restock orders generated'
-)
-CONTACT_SUBMISSIONS = Counter(
-    'contact_form_submissions_total',
-    'Total contact form submissions'
-)
-RESUME_ENJOYED = Counter(
-    'resume_enjoyed_votes_total',
-    'Total \"Enjoyed this resume\" votes'
-)
-CHAT_MESSAGES = Counter(
-    'chat_messages_total',
-    'Total AI chatbot messages received'
-)
-REQUEST_COUNT = Counter(
-    'http_requests_total',
-    'Total HTTP requests',
-    ['method', 'endpoint', 'status']
-)
+# Precompressed, fingerprinted client assets (rebuilt on change outside production)
+_assets = AssetCache(CLIENT_DIR, watch=os.environ.get('FLASK_ENV') != 'production')
+
+# ─── Persisted Counters ────────────────────────────────────────
+# Counted in SQLite and exported by CounterCollector (see server.counters), so
+# every worker reports the same totals; each is also recorded as a time series
+COUNTER_METRICS = {
+    'portfolio_views': ('portfolio_page_views', 'Total views of the main portfolio page'),
+    'demo_views': ('demo_page_views', 'Total views of the Lumber Yard Restock Planner demo'),
+    'pdf_generations': ('pdf_generations', 'Total PDF restock orders generated'),
+    'contact_submissions': ('contact_form_submissions', 'Total contact form submissions'),
+    'resume_enjoyed': ('resume_enjoyed_votes', 'Total "Enjoyed this resume" votes'),
+    'chat_messages': ('chat_messages', 'Total AI chatbot messages received'),
+}
+COUNTER_NAMES = tuple(COUNTER_METRICS)
 
 # ─── Prometheus Gauges (system health) ─────────────────────────
+# multiprocess_mode only applies when running under server.production
 UPTIME_GAUGE = Gauge(
     'server_uptime_seconds',
-    'Server uptime in seconds'
+    'Server uptime in seconds',
+    multiprocess_mode='livemax'
 )
 MEMORY_USAGE_MB = Gauge(
     'process_memory_usage_mb',
-    'Process memory usage in MB'
+    'Process memory usage in MB',
+    multiprocess_mode='livesum'
 )
 CPU_PERCENT = Gauge(
     'process_cpu_percent',
-    'Process CPU usage percentage'
+    'Process CPU usage percentage',
+    multiprocess_mode='livesum'
 )
 ACTIVE_SESSIONS = Gauge(
     'active_sessions_current',
-    'Estimated unique visitors in last 15 minutes'
-)
-
-# ─── Prometheus Histograms ─────────────────────────────────────
-REQUEST_LATENCY = Histogram(
-    'http_request_duration_seconds',
-    'HTTP request latency in seconds',
-    ['endpoint'],
-    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    'Estimated unique visitors in last 15 minutes',
+    multiprocess_mode='livemostrecent'
 )
 
 # ─── Session Tracking ──────────────────────────────────────────
-_visitor_log = {}  # { ip: last_seen_timestamp }
+# Both stores are shared across workers when SHARED_STATE_DB is set
+_visitor_log = make_state('visitors')  # { ip: last_seen_timestamp }
 SESSION_WINDOW = 900  # 15 minutes
 
 # ─── Rate Limiting (chat) ─────────────────────────────────────
-_chat_rate = {}  # { ip: [timestamp, timestamp, ...] }
+_chat_rate = make_state('chat_rate')  # { ip: [timestamp, timestamp, ...] }
 CHAT_RATE_LIMIT = 10       # max messages per window
 CHAT_RATE_WINDOW = 60      # window in seconds
 
@@ -114,8 +115,10 @@ CHAT_DB_PATH = os.path.join(_db_dir, 'chat_logs.db')
 
 
 def _init_chat_db():
-    """Create the chat log tables if they don't exist."""
+    """Create the chat log tables if they don't exist; return the persisted counters."""
     conn = sqlite3.connect(CHAT_DB_PATH)
+    # WAL lets readers proceed while the chat writer (or another worker) commits
+    conn.execute('PRAGMA journal_mode=WAL')
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS conversations (
@@ -138,53 +141,112 @@ def _init_chat_db():
             FOREIGN KEY (conversation_id) REFERENCES conversations(id)
         )
     ''')
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS counters (
-            name TEXT PRIMARY KEY,
-            value INTEGER NOT NULL DEFAULT 0
-        )
-    ''')
-    # Seed counter rows if they don't exist
-    for name in ('portfolio_views', 'demo_views', 'pdf_generations',
-                  'contact_submissions', 'resume_enjoyed', 'chat_messages'):
-        c.execute('INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)', (name,))
+    create_counter_table(conn, COUNTER_NAMES)
     conn.commit()
+    counters = dict(c.execute('SELECT name, value FROM counters'))
     conn.close()
+    return counters
 
 
-def _get_counter(name):
-    """Read a persistent counter value from SQLite."""
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT value FROM counters WHERE name = ?', (name,))
-    row = c.fetchone()
-    conn.close()
-    return row[0] if row else 0
+def _inc_counter(name):
+    """Increment a persistent counter."""
+    _inc_counters({name: 1})
 
 
-def _inc_counter(name):
-    """Increment a persistent counter in SQLite and the Prometheus counter."""
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute('UPDATE counters SET value = value + 1 WHERE name = ?', (name,))
-    conn.commit()
-    conn.close()
+def _inc_counters(increments):
+    """Apply several persistent counter increments ({name: n}) in one transaction."""
+    _counters.add(increments)
+    for name, n in increments.items():
+        _timeseries.record(name, n)
+
+
+# SQLite holds the counter totals; the schema check's single read primes the cache
+_counters = CounterService(lambda: CHAT_DB_PATH, COUNTER_NAMES)
+_counters.prime(_init_chat_db())
+_counter_collector = CounterCollector(_counters, COUNTER_METRICS)
+REGISTRY.register(_counter_collector)
+
+# Chat writes are queued and group-committed off the request path
+_chat_writer = ChatWriter(lambda: CHAT_DB_PATH)
+atexit.register(_chat_writer.close)
+
+# Request body bytes in flight per client IP
+_body_budget = InflightBudget()
+
+# Yard inventory shares the chat database file
+_inventory = InventoryStore(lambda: CHAT_DB_PATH)
+
+# Per-minute event counts, batched in memory and rolled up to hours and days
+_timeseries = TimeSeriesStore(lambda: CHAT_DB_PATH, COUNTER_NAMES)
+atexit.register(_timeseries.close)
+
+def build_order_pdf(data, out):
+    """Render an order PDF; ReportLab is only imported on first use."""
+    from server.pdf_report import build_order_pdf as build
+    return build(data, out)
+
+
+def _render_pdf_job(data, out):
+    with timing.recording('pdf_job'):
+        return build_order_pdf(data, out)
+
 
+def __getattr__(name):
+    # get_fill_color used to live here; keep it importable without loading
+    # ReportLab at startup
+    if name == 'get_fill_color':
+        from server.pdf_graphics import get_fill_color
+        return get_fill_color
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-_init_chat_db()
 
-# Restore Prometheus counters from persisted values on startup
-for _cname, _pcounter in [
-    ('portfolio_views', PORTFOLIO_VIEWS),
-    ('demo_views', DEMO_VIEWS),
-    ('pdf_generations', PDF_GENERATIONS),
-    ('contact_submissions', CONTACT_SUBMISSIONS),
-    ('resume_enjoyed', RESUME_ENJOYED),
-    ('chat_messages', CHAT_MESSAGES),
-]:
-    _saved = _get_counter(_cname)
-    if _saved > 0:
-        _pcounter.inc(_saved)
+# Background PDF renders are stored on the same persistent disk as the chat DB
+_pdf_jobs = PdfJobQueue(
+    _render_pdf_job,
+    lambda: os.path.join(os.path.dirname(CHAT_DB_PATH), 'pdf_jobs'),
+    workers=int(os.environ.get('PDF_JOB_WORKERS', 2)),
+    ttl=int(os.environ.get('PDF_JOB_TTL', 3600)),
+)
+atexit.register(_pdf_jobs.close)
+_pdf_jobs.recover()  # fail jobs orphaned by the previous deployment's workers
+
+
+CHAT_HISTORY_WAIT = 2        # seconds to wait for another worker's turn to commit
+CHAT_HISTORY_POLL = 0.05
+
+
+def _read_history(conversation_id):
+    conn = sqlite3.connect(CHAT_DB_PATH)
+    c = conn.cursor()
+    c.execute(
+        'SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY id',
+        (conversation_id,)
+    )
+    history = [{'role': row[0], 'content': row[1]} for row in c.fetchall()]
+    conn.close()
+    return history
+
+
+def _load_history(conversation_id, turn=0):
+    """
+    Read a conversation's messages, including at least ``turn`` of them.
+
+    ``turn`` is the message count the previous reply reported. That reply may
+    have come from another worker whose writer hasn't committed it yet, so
+    SQLite is re-read until it catches up, for at most CHAT_HISTORY_WAIT
+    seconds. An up-to-date read costs no wait.
+    """
+    deadline = time.monotonic() + CHAT_HISTORY_WAIT
+    # This worker's own queued writes commit in order behind its writer
+    _chat_writer.wait_for(conversation_id, timeout=CHAT_HISTORY_WAIT)
+    history = _read_history(conversation_id)
+    while len(history) < turn and time.monotonic() < deadline:
+        time.sleep(CHAT_HISTORY_POLL)
+        history = _read_history(conversation_id)
+    if len(history) < turn:
+        CHAT_HISTORY_STALE.inc()
+        print(f'Warning: conversation {conversation_id} has {len(history)} of {turn} messages committed')
+    return history
 
 
 # ─── AI Chatbot System Prompt ──────────────────────────────────
@@ -202,20 +264,41 @@ def _get_openai_client():
     """Get or create the OpenAI client."""
     global _openai_client
     if _openai_client is None:
-        from openai import OpenAI
         api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
+        # OPENAI_BASE_URL points at a compatible server, e.g. server.openai_stub
+        base_url = os.environ.get('OPENAI_BASE_URL') or None
+        if not api_key and not base_url:
             raise ValueError('OPENAI_API_KEY environment variable is not set')
-        _openai_client = OpenAI(api_key=api_key)
+        _openai_client = make_openai_client(api_key or 'local', base_url,
+                                            pool_size=_llm.max_concurrent, timeout=_llm.deadline)
     return _openai_client
 
 
+# Every chatbot call to OpenAI goes through the gateway: concurrency cap,
+# deadline, retries, coalescing and circuit breaker
+_llm = LLMGateway(lambda: _get_openai_client())
+
+
+# psutil handle for this worker (initialized lazily; cpu_percent needs the same
+# object across calls to measure an interval)
+_process = None
+
+
+def _get_process():
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        import psutil
+        _process = psutil.Process()
+    return _process
+
+
 def _update_system_metrics():
     """Update system-level gauges."""
     UPTIME_GAUGE.set(time.time() - SERVER_START_TIME)
-    process = psutil.Process(os.getpid())
+    process = _get_process()
     MEMORY_USAGE_MB.set(round(process.memory_info().rss / 1024 / 1024, 1))
     CPU_PERCENT.set(process.cpu_percent(interval=None))
+    ACTIVE_SESSIONS.set(_visitor_log.prune(time.time() - SESSION_WINDOW))
 
 
 def _get_real_ip():
@@ -226,104 +309,263 @@ def _get_real_ip():
     return request.remote_addr or 'unknown'
 
 
+# Proxies in front of the app (Render: 1). Each appends the address it saw to
+# X-Forwarded-For, so only the last TRUSTED_PROXIES entries can't be forged.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 1))
+
+
+def _peer_ip():
+    """The client address as recorded by the outermost trusted proxy (or the socket)."""
+    hops = [h.strip() for h in request.headers.get('X-Forwarded-For', '').split(',') if h.strip()]
+    if TRUSTED_PROXIES and hops:
+        return hops[-min(TRUSTED_PROXIES, len(hops))]
+    return request.remote_addr or 'unknown'
+
+
 def _track_visitor(ip):
     """Track unique visitors in a sliding window."""
     now = time.time()
-    _visitor_log[ip] = now
-    cutoff = now - SESSION_WINDOW
-    to_delete = [k for k, v in _visitor_log.items() if v < cutoff]
-    for k in to_delete:
-        del _visitor_log[k]
-    ACTIVE_SESSIONS.set(len(_visitor_log))
+    _visitor_log.touch(ip, now)
+    ACTIVE_SESSIONS.set(_visitor_log.prune(now - SESSION_WINDOW))
 
 
 def _check_chat_rate(ip):
     """Return True if the IP is within rate limits, False if exceeded."""
-    now = time.time()
-    cutoff = now - CHAT_RATE_WINDOW
-    if ip not in _chat_rate:
-        _chat_rate[ip] = []
-    _chat_rate[ip] = [t for t in _chat_rate[ip] if t > cutoff]
-    if len(_chat_rate[ip]) >= CHAT_RATE_LIMIT:
-        return False
-    _chat_rate[ip].append(now)
-    return True
+    return _chat_rate.hit_window(ip, time.time(), CHAT_RATE_WINDOW, CHAT_RATE_LIMIT)
+
+
+# Per-endpoint tracking policy: static assets skip visitor tracking and sample metrics
+_route_classifier = RouteClassifier()
+
+# Opt-in stack sampling of slow/sampled requests (PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS)
+_profiler = RequestProfiler(exclude=('admin_profiles', 'admin_profile'))
+
+# JSON access log written by a background thread (ACCESS_LOG_PATH; off by default)
+_access_log = AccessLog()
+atexit.register(_access_log.close)
 
 
 @app.before_request
 def before_request():
-    request._start_time = time.time()
-    _track_visitor(_get_real_ip())
+    if _access_log.enabled:
+        request._received = time.perf_counter()
+    timing.begin(request.endpoint or 'unknown')
+    policy = _route_classifier.policy(request.endpoint)
+    request._policy = policy
+    if policy.sampled():
+        request._start_time = time.time()
+    if policy.track_visitor:
+        _track_visitor(_get_real_ip())
+    if _profiler.enabled:
+        request._profile = _profiler.start(request.endpoint, method=request.method, path=request.path)
+
+
+@app.before_request
+def limit_request_body():
+    """Refuse oversized bodies before they are read and cap per-IP bytes in flight."""
+    limit = body_limit(request.endpoint)
+    request.max_content_length = limit
+    if request.method not in ('POST', 'PUT', 'PATCH'):
+        return None
+    declared = request.content_length
+    if declared is not None and declared > limit:
+        raise RequestEntityTooLarge()
+    charge = limit if declared is None else declared
+    if not charge:
+        return None
+    # Keyed on an address the client can't choose, unlike _get_real_ip()
+    ip = _peer_ip()
+    if not _body_budget.acquire(ip, charge):
+        REQUEST_BODY_REJECTED.labels(endpoint=request.endpoint or 'unknown', reason='budget').inc()
+        resp = jsonify({'error': 'Too many uploads in progress — please retry shortly.'})
+        resp.status_code = 429
+        resp.headers['Retry-After'] = '1'
+        return resp
+    request._body_charge = (ip, charge)
+    if declared is None:
+        # Chunked upload: read at most one byte past the limit, so an oversized
+        # body is detected without buffering it (the stream would otherwise be
+        # silently truncated at the limit)
+        request.max_content_length = limit + 1
+        if len(request.get_data(cache=True)) > limit:
+            raise RequestEntityTooLarge()
+    return None
+
+
+@app.teardown_request
+def release_request_body(exc=None):
+    charge = getattr(request, '_body_charge', None)
+    if charge is not None:
+        _body_budget.release(*charge)
+
+
+@app.teardown_request
+def finish_phase_timing(exc=None):
+    # Requests that ended in an unhandled error never reach after_request
+    timing.end()
+
+
+@app.teardown_request
+def finish_profile(exc=None):
+    active = getattr(request, '_profile', None)
+    if active is not None:
+        _profiler.finish(active, getattr(request, '_status', 500))
+
+
+@app.teardown_request
+def write_access_log(exc=None):
+    started = getattr(request, '_received', None)
+    if started is None:
+        return
+    request._received = None     # teardown can run twice under the test client
+    _access_log.log(access_entry(
+        started, request.endpoint or 'unknown', request.method, request.path,
+        getattr(request, '_status', 500), getattr(request, '_response_bytes', None),
+        _get_real_ip(), conversation_id=getattr(request, '_conversation_id', None),
+    ))
 
 
 @app.after_request
 def after_request(response):
-    latency = time.time() - getattr(request, '_start_time', time.time())
-    endpoint = request.endpoint or 'unknown'
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=endpoint,
-        status=response.status_code
-    ).inc()
-    REQUEST_LATENCY.labels(endpoint=endpoint).observe(latency)
+    request._status = response.status_code
+    request._response_bytes = response.content_length
+    timer = timing.end()
+    if timer is not None and timing.SERVER_TIMING:
+        response.headers['Server-Timing'] = timer.server_timing()
+    start = getattr(request, '_start_time', None)
+    if start is None:
+        return response
+    policy = request._policy
+    observe_request(policy.name, request.method, request.endpoint or 'unknown',
+                    response.status_code, time.time() - start, policy.weight)
     return response
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    REQUEST_BODY_REJECTED.labels(endpoint=request.endpoint or 'unknown', reason='too_large').inc()
+    resp = jsonify({'error': f'Request body too large (max {body_limit(request.endpoint) // 1024:,} KB).'})
+    resp.status_code = 413
+    # The rest of the upload is never read, so don't keep the connection
+    resp.headers['Connection'] = 'close'
+    return resp
+
+
+# Endpoints whose clients read an ``ok`` flag on every response, errors included
+_OK_FLAG_ENDPOINTS = {'track_event', 'track_batch'}
+
+
+@app.errorhandler(ValidationError)
+def validation_error(e):
+    """Malformed or oversized request bodies are rejected before any real work."""
+    body = {'ok': False} if request.endpoint in _OK_FLAG_ENDPOINTS else {}
+    body['error'] = str(e)
+    if e.field:
+        body['field'] = e.field
+    return jsonify(body), 400
+
+
 # ─── Routes: Pages ─────────────────────────────────────────────
 
 @app.route('/')
 def index():
-    return app.send_static_file('index.html')
+    return _assets.serve('index.html')
 
 
 @app.route('/demo')
 def demo():
-    return app.send_static_file('demo/pallet-builder.html')
+    return _assets.serve('demo/pallet-builder.html')
+
+
+def serve_static(filename):
+    """Serve client/ files from the asset cache (replaces Flask's static view)."""
+    resp = _assets.serve(filename)
+    if resp is None:
+        abort(404)
+    return resp
+
+
+app.view_functions['static'] = serve_static
 
 
 # ─── Routes: Metrics & Tracking ───────────────────────────────
 
+def _render_metrics():
+    _update_system_metrics()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Aggregate every worker's samples, not just this process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_counter_collector)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+# Repeated scrapes within METRICS_CACHE_TTL get the same rendered text
+_metrics_cache = ExpositionCache(_render_metrics)
+
+
 @app.route('/metrics')
 def metrics():
-    _update_system_metrics()
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    return Response(_metrics_cache.get(), mimetype=CONTENT_TYPE_LATEST)
+
+
+# Tracked event → persisted counter name
+TRACK_COUNTERS = {
+    'portfolio_view': 'portfolio_views',
+    'demo_view': 'demo_views',
+    'pdf_generated': 'pdf_generations',
+    'contact_submit': 'contact_submissions',
+    'resume_enjoyed': 'resume_enjoyed',
+}
 
 
 @app.route('/api/track', methods=['POST'])
 def track_event():
-    data = request.get_json(silent=True) or {}
-    event = data.get('event', '')
-
-    counter_map = {
-        'portfolio_view': (PORTFOLIO_VIEWS, 'portfolio_views'),
-        'demo_view': (DEMO_VIEWS, 'demo_views'),
-        'pdf_generated': (PDF_GENERATIONS, 'pdf_generations'),
-        'contact_submit': (CONTACT_SUBMISSIONS, 'contact_submissions'),
-        'resume_enjoyed': (RESUME_ENJOYED, 'resume_enjoyed'),
-    }
-
-    entry = counter_map.get(event)
-    if entry:
-        prom_counter, db_name = entry
-        prom_counter.inc()
-        _inc_counter(db_name)
+    event = validate(TRACK_EVENT, request.get_json(silent=True))['event']
+
+    name = TRACK_COUNTERS.get(event)
+    if name:
+        _inc_counter(name)
         return jsonify({'ok': True, 'event': event})
     return jsonify({'ok': False, 'error': 'unknown event'}), 400
 
 
+@app.route('/api/track/batch', methods=['POST'])
+def track_batch():
+    """Record several events in one request and one transaction.
+
+    Clients queue events and flush them with navigator.sendBeacon, which may
+    send the JSON as text/plain, so the content type is not checked.
+    """
+    events = validate(TRACK_BATCH, request.get_json(force=True, silent=True))['events']
+
+    tally = {}
+    for i, item in enumerate(events):
+        event = item['event']
+        if event not in TRACK_COUNTERS:
+            return jsonify({'ok': False, 'error': 'unknown event', 'field': f'events[{i}].event'}), 400
+        tally[event] = tally.get(event, 0) + 1
+
+    if tally:
+        _inc_counters({TRACK_COUNTERS[event]: n for event, n in tally.items()})
+    return jsonify({'ok': True, 'recorded': len(events)})
+
+
 @app.route('/api/stats')
 def get_stats():
     _update_system_metrics()
     uptime = time.time() - SERVER_START_TIME
     hours, rem = divmod(int(uptime), 3600)
     minutes, seconds = divmod(rem, 60)
-    process = psutil.Process(os.getpid())
+    process = _get_process()
+    totals = _counters.totals()
     return jsonify({
-        'portfolio_views': int(PORTFOLIO_VIEWS._value.get()),
-        'demo_views': int(DEMO_VIEWS._value.get()),
-        'pdf_generations': int(PDF_GENERATIONS._value.get()),
-        'contact_submissions': int(CONTACT_SUBMISSIONS._value.get()),
-        'resume_enjoyed': int(RESUME_ENJOYED._value.get()),
+        'portfolio_views': totals['portfolio_views'],
+        'demo_views': totals['demo_views'],
+        'pdf_generations': totals['pdf_generations'],
+        'contact_submissions': totals['contact_submissions'],
+        'resume_enjoyed': totals['resume_enjoyed'],
         'health': {
             'uptime_seconds': round(uptime, 1),
             'uptime_display': f'{hours}h {minutes}m {seconds}s',
@@ -334,232 +576,237 @@ def get_stats():
     })
 
 
+@app.route('/api/stats/timeseries')
+def stats_timeseries():
+    """Event counts over time.
+
+    ``?series=portfolio_views,demo_views&resolution=minute|hour|day&since=&until=``
+    with epoch seconds; every series and the last 7 days of hours by default.
+    Counts reach the database every few seconds, so the newest bucket lags.
+    """
+    names = request.args.get('series')
+    series = [s for s in names.split(',') if s] if names else list(_timeseries.series)
+    resolution = request.args.get('resolution', 'hour')
+    try:
+        since, until, points = _timeseries.query(
+            series, resolution,
+            since=request.args.get('since', type=int),
+            until=request.args.get('until', type=int),
+        )
+    except TimeSeriesError as e:
+        return jsonify({'error': str(e)}), 400
+    resp = jsonify({'resolution': resolution, 'since': since, 'until': until, 'series': points})
+    resp.headers['Cache-Control'] = 'public, max-age=30'
+    return resp
+
+
 # ─── Routes: PDF Generation ───────────────────────────────────
 
-ACCENT = colors.HexColor('#F96302')
-DARK_BG   = colors.HexColor('#0a0e17')
-CARD_BG   = colors.HexColor('#1a2233')
-BORDER    = colors.HexColor('#1e293b')
-TEXT      = colors.HexColor('#e2e8f0')
-MUTED     = colors.HexColor('#94a3b8')
-GREEN     = colors.HexColor('#22c55e')
-RED       = colors.HexColor('#ef4444')
-YELLOW    = colors.HexColor('#eab308')
-
-
-def get_fill_color(pct):
-    if pct >= 0.8:
-        return GREEN
-    if pct >= 0.5:
-        return colors.HexColor('#86efac')
-    if pct >= 0.2:
-        return YELLOW
-    if pct > 0:
-        return RED
-    return colors.HexColor('#374151')
+PDF_SPOOL_MAX_BYTES = 2 * 1024 * 1024
+PDF_STREAM_CHUNK = 64 * 1024
+
+
+def _stream_file(fh, chunk_size=PDF_STREAM_CHUNK):
+    """Yield a file in fixed-size chunks, closing it when done."""
+    try:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fh.close()
 
 
 @app.route('/generate-pdf', methods=['POST'])
 def generate_pdf():
-    data = request.get_json()
-    items = data.get('items', [])
-    truck_image = data.get('truckImage', '')
-    chart_image = data.get('chartImage', '')
-    total_weight = data.get('totalWeight', 0)
-    total_cost = data.get('totalCost', 0)
-    total_pieces = data.get('totalPieces', 0)
-    total_bunks = data.get('totalBunks', 0)
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=letter,
-        topMargin=0.5 * inch,
-        bottomMargin=0.5 * inch,
-        leftMargin=0.6 * inch,
-        rightMargin=0.6 * inch,
+    with span('parse'):
+        payload = request.get_json(silent=True)
+    with span('validate'):
+        data = validate(ORDER_PDF, payload)
+    # Small PDFs stay in memory; large ones spill to a temp file
+    spool = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+    filename = build_order_pdf(data, spool)
+    size = spool.tell()
+    spool.seek(0)
+    return Response(
+        _stream_file(spool),
+        mimetype='application/pdf',
+        direct_passthrough=True,
+        headers={
+            'Content-Length': str(size),
+            'Content-Disposition': f'inline; filename={filename}',
+        },
     )
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(
-        'HDTitle', parent=styles['Title'],
-        fontName='Helvetica-Bold', fontSize=20,
-        textColor=ACCENT, spaceAfter=4,
-    ))
-    styles.add(ParagraphStyle(
-        'HDSub', parent=styles['Normal'],
-        fontName='Helvetica', fontSize=10,
-        textColor=MUTED, spaceAfter=12,
-    ))
-    styles.add(ParagraphStyle(
-        'SectionHead', parent=styles['Heading2'],
-        fontName='Helvetica-Bold', fontSize=13,
-        textColor=ACCENT, spaceBefore=14, spaceAfter=6,
-    ))
-    styles.add(ParagraphStyle(
-        'CellText', parent=styles['Normal'],
-        fontName='Helvetica', fontSize=8.5,
-        textColor=colors.black,
-    ))
-    styles.add(ParagraphStyle(
-        'CellBold', parent=styles['Normal'],
-        fontName='Helvetica-Bold', fontSize=8.5,
-        textColor=colors.black,
-    ))
-    styles.add(ParagraphStyle(
-        'Footer', parent=styles['Normal'],
-        fontName='Helvetica', fontSize=7,
-        textColor=MUTED, alignment=TA_CENTER,
-    ))
 
-    elems = []
+PDF_JOB_EVENT_POLL = 0.5    # seconds between status checks on the SSE stream
+PDF_JOB_EVENT_TIMEOUT = 20  # then the client falls back to polling the status URL
+PDF_JOB_POLL_SECONDS = 1    # Retry-After on the status of an unfinished job
+# Each open stream holds a gthread thread; keep at least half for other requests
+PDF_JOB_MAX_STREAMS = int(os.environ.get(
+    'PDF_JOB_MAX_STREAMS', max(int(os.environ.get('GUNICORN_THREADS', 4)) // 2, 1)))
+_pdf_job_streams = threading.BoundedSemaphore(PDF_JOB_MAX_STREAMS)
 
-    # ── HEADER ──
-    now = datetime.now()
-    elems.append(Paragraph('LUMBER YARD RESTOCK ORDER', styles['HDTitle']))
-    elems.append(Paragraph(
-        f'Generated: {now.strftime("%B %d, %Y at %I:%M %p")} &nbsp;|&nbsp; '
-        f'Order #{now.strftime("%y%m%d")}-{total_bunks:02d}',
-        styles['HDSub'],
-    ))
-    elems.append(HRFlowable(
-        width='100%', thickness=2, color=ACCENT,
-        spaceAfter=10, spaceBefore=2,
-    ))
 
-    # ── SUMMARY BOX ──
-    summary_data = [
-        ['RESTOCK SUMMARY', '', '', ''],
-        ['Bunks to Restock', 'Total Pieces', 'Total Weight', 'Estimated Cost'],
-        [str(total_bunks), f'{total_pieces:,}', f'{total_weight:,} lbs', f'${total_cost:,.2f}'],
-    ]
-    summary_table = Table(summary_data, colWidths=[doc.width / 4] * 4)
-    summary_table.setStyle(TableStyle([
-        ('SPAN', (0, 0), (-1, 0)),
-        ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#f0f0f0')),
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (-1, 1), 8),
-        ('TEXTCOLOR', (0, 1), (-1, 1), colors.HexColor('#666666')),
-        ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 2), (-1, 2), 14),
-        ('TEXTCOLOR', (0, 2), (-1, 2), ACCENT),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOX', (0, 0), (-1, -1), 1, ACCENT),
-        ('INNERGRID', (0, 1), (-1, -1), 0.5, colors.HexColor('#dddddd')),
-        ('TOPPADDING', (0, 2), (-1, 2), 8),
-        ('BOTTOMPADDING', (0, 2), (-1, 2), 8),
-    ]))
-    elems.append(summary_table)
-    elems.append(Spacer(1, 14))
-
-    # ── LINE ITEMS TABLE ──
-    elems.append(Paragraph('ORDER LINE ITEMS', styles['SectionHead']))
-
-    header = ['#', 'Product', 'Category', 'In Stock', 'Capacity', 'Order Qty',
-              'Unit $/pc', 'Weight/pc', 'Line Total']
-    table_data = [header]
-
-    for i, item in enumerate(items, 1):
-        pct = item['current'] / item['capacity'] if item['capacity'] > 0 else 0
-        table_data.append([
-            str(i),
-            item['name'],
-            item['category'],
-            str(item['current']),
-            str(item['capacity']),
-            str(item['toOrder']),
-            f"${item['unitPrice']:.2f}",
-            f"{item['unitWeight']} lbs",
-            f"${item['totalCost']:,.2f}",
-        ])
+def _job_links(job):
+    job = dict(job)
+    job['statusUrl'] = f"/api/pdf-jobs/{job['id']}"
+    job['downloadUrl'] = f"/api/pdf-jobs/{job['id']}/pdf"
+    return job
 
-    table_data.append([
-        '', '', '', '', '', str(total_pieces),
-        '', f'{total_weight:,} lbs', f'${total_cost:,.2f}',
-    ])
-
-    col_widths = [0.3*inch, 1.3*inch, 0.8*inch, 0.6*inch, 0.6*inch,
-                  0.65*inch, 0.65*inch, 0.7*inch, 0.85*inch]
-    t = Table(table_data, colWidths=col_widths, repeatRows=1)
-    style_cmds = [
-        ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('BOX', (0, 0), (-1, -1), 1, ACCENT),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fafafa')]),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fff3e0')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('TEXTCOLOR', (0, -1), (-1, -1), ACCENT),
-        ('LINEABOVE', (0, -1), (-1, -1), 2, ACCENT),
-    ]
 
-    for i, item in enumerate(items, 1):
-        pct = item['current'] / item['capacity'] if item['capacity'] > 0 else 0
-        c = get_fill_color(pct)
-        style_cmds.append(('TEXTCOLOR', (3, i), (3, i), c))
-
-    t.setStyle(TableStyle(style_cmds))
-    elems.append(t)
-    elems.append(Spacer(1, 12))
-
-    # ── TRUCK DIAGRAM ──
-    if truck_image:
-        elems.append(PageBreak())
-        elems.append(Paragraph('FLATBED DELIVERY — LOADING PLAN', styles['SectionHead']))
-        try:
-            img_data = base64.b64decode(truck_image.split(',')[1])
-            img_buf = io.BytesIO(img_data)
-            img = Image(img_buf, width=7.4 * inch, height=4.3 * inch)
-            elems.append(img)
-        except Exception as e:
-            elems.append(Paragraph(f'[Truck diagram error: {e}]', styles['Normal']))
-        elems.append(Spacer(1, 14))
-
-    # ── YARD CHART ──
-    if chart_image:
-        elems.append(Paragraph('YARD INVENTORY STATUS', styles['SectionHead']))
-        try:
-            img_data = base64.b64decode(chart_image.split(',')[1])
-            img_buf = io.BytesIO(img_data)
-            img = Image(img_buf, width=6.8 * inch, height=2 * inch)
-            elems.append(img)
-        except Exception as e:
-            elems.append(Paragraph(f'[Chart error: {e}]', styles['Normal']))
-        elems.append(Spacer(1, 14))
-
-    # ── FOOTER ──
-    elems.append(HRFlowable(
-        width='100%', thickness=1, color=MUTED,
-        spaceAfter=6, spaceBefore=6,
-    ))
-    elems.append(Paragraph(
-        'Generated by Lumber Yard Restock Planner — Jason Mitchell | '
-        'mitchellsoftware.dev &nbsp;|&nbsp; Powered by Three.js + ReportLab',
-        styles['Footer'],
-    ))
+@app.route('/api/pdf-jobs', methods=['POST'])
+def create_pdf_job():
+    """Queue a restock order PDF; poll or subscribe for completion, then download."""
+    data = validate(ORDER_PDF, request.get_json(silent=True))
+    try:
+        job = _pdf_jobs.submit(data)
+    except JobQueueFull as e:
+        resp = jsonify({'error': str(e)})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = '5'
+        return resp
+    resp = jsonify(_job_links(job))
+    resp.status_code = 202
+    resp.headers['Location'] = f"/api/pdf-jobs/{job['id']}"
+    return resp
+
+
+@app.route('/api/pdf-jobs/<job_id>')
+def pdf_job_status(job_id):
+    job = _pdf_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    resp = jsonify(_job_links(job))
+    resp.headers['Cache-Control'] = 'no-store'
+    if job['status'] not in FINISHED:
+        resp.headers['Retry-After'] = str(PDF_JOB_POLL_SECONDS)
+    return resp
+
+
+@app.route('/api/pdf-jobs/<job_id>/events')
+def pdf_job_events(job_id):
+    """
+    Server-sent events: one `status` event per state change until the job finishes.
+
+    At most PDF_JOB_MAX_STREAMS streams are open per process; past that, and
+    after PDF_JOB_EVENT_TIMEOUT, clients poll the status URL instead.
+    """
+    if _pdf_jobs.status(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not _pdf_job_streams.acquire(blocking=False):
+        resp = jsonify({'error': 'Too many open event streams; poll the status URL'})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = str(PDF_JOB_POLL_SECONDS)
+        return resp
+
+    def stream():
+        last = None
+        started = time.time()
+        quiet_since = started
+        while time.time() - started < PDF_JOB_EVENT_TIMEOUT:
+            job = _pdf_jobs.status(job_id)
+            if job is None:
+                yield 'event: gone\ndata: {}\n\n'
+                return
+            if job['status'] != last:
+                last = job['status']
+                quiet_since = time.time()
+                yield f'event: status\ndata: {json.dumps(_job_links(job))}\n\n'
+                if last in FINISHED:
+                    return
+            elif time.time() - quiet_since > 15:
+                # Comment line keeps proxies from closing an idle stream
+                quiet_since = time.time()
+                yield ': keep-alive\n\n'
+            time.sleep(PDF_JOB_EVENT_POLL)
+
+    resp = Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the stream never started
+    resp.call_on_close(_pdf_job_streams.release)
+    return resp
+
+
+@app.route('/api/pdf-jobs/<job_id>/pdf')
+def pdf_job_download(job_id):
+    job = _pdf_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    path = _pdf_jobs.result_path(job_id)
+    if path is None:
+        return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+    resp = send_large_file(path, 'application/pdf', job_id, 'private, max-age=3600')
+    resp.headers['Content-Disposition'] = f"inline; filename={job['filename']}"
+    return resp
+
+
+# ─── Routes: Restock Planning & Inventory ─────────────────────
+
+@app.route('/api/plan', methods=['POST'])
+def plan():
+    """Compute restock quantities and a multi-truck flatbed loading plan."""
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    elif not isinstance(data, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    bunks = data.get('bunks')
+    if bunks is None:
+        # No bunks posted: plan against the persisted yard
+        bunks = _inventory.snapshot()[1]
+    # NumPy is only imported once a plan is requested
+    from server.planner import plan_restock, REORDER_BELOW, TRUCK_MAX_LBS
+    try:
+        result = plan_restock(
+            bunks,
+            reorder_below=float(data.get('reorderBelow', REORDER_BELOW)),
+            truck_max_lbs=float(data.get('truckMaxLbs', TRUCK_MAX_LBS)),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
 
-    doc.build(elems)
-    buf.seek(0)
-    return send_file(
-        buf,
-        mimetype='application/pdf',
-        as_attachment=False,
-        download_name=f'restock-order-{now.strftime("%Y%m%d")}.pdf',
-    )
+
+MAX_SQLITE_INT = 2 ** 63 - 1
+
+
+@app.route('/api/inventory')
+def inventory():
+    """Yard snapshot, or only the bunks changed after ?since=<version>."""
+    # Clamped to SQLite's INTEGER range
+    since = min(max(request.args.get('since', 0, type=int), 0), MAX_SQLITE_INT)
+    # A delta is a different body from the full yard at the same version
+    etag = f'inv-{_inventory.version()}-{since}'
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        version, bunks = _inventory.snapshot(since)
+        etag = f'inv-{version}-{since}'
+        resp = jsonify({'version': version, 'since': since, 'bunks': bunks})
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+@app.route('/api/inventory', methods=['POST'])
+def update_inventory():
+    """Apply a batch of stock changes in one transaction. Protected by ADMIN_TOKEN."""
+    # The yard is shared by every visitor and /api/plan; the demo only reads it
+    token = request.args.get('token', '')
+    expected = os.environ.get('ADMIN_TOKEN', '')
+    if not expected or token != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    try:
+        version, updated = _inventory.apply(data.get('updates'))
+    except InventoryError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'version': version, 'updated': updated})
 
 
 # ─── Routes: AI Chatbot ───────────────────────────────────────
@@ -567,16 +814,14 @@ def generate_pdf():
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Handle a chat message from a recruiter."""
-    data = request.get_json(silent=True) or {}
-    recruiter_name = data.get('recruiter_name', '').strip()
-    message = data.get('message', '').strip()
-    conversation_id = data.get('conversation_id', '')
-    job_posting = data.get('job_posting', '')
-
-    if not recruiter_name:
-        return jsonify({'error': 'Please provide your name.'}), 400
-    if not message:
-        return jsonify({'error': 'Please provide a message.'}), 400
+    with span('parse'):
+        payload = request.get_json(silent=True) or {}
+    with span('validate'):
+        data = validate(CHAT_MESSAGE, payload)
+    recruiter_name = data['recruiter_name']
+    message = data['message']
+    conversation_id = data['conversation_id']
+    job_posting = data['job_posting']
 
     ip = _get_real_ip()
 
@@ -586,87 +831,84 @@ def chat():
 
     now = datetime.utcnow().isoformat()
 
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-
     if not conversation_id:
         conversation_id = str(uuid.uuid4())
-        c.execute(
+        history = []
+        statements = [(
             'INSERT INTO conversations (id, recruiter_name, job_posting, started_at, last_message_at, ip_address, message_count) VALUES (?, ?, ?, ?, ?, ?, 0)',
             (conversation_id, recruiter_name, job_posting, now, now, ip)
-        )
+        )]
     else:
-        c.execute('UPDATE conversations SET last_message_at = ? WHERE id = ?', (now, conversation_id))
+        with span('history'):
+            history = _load_history(conversation_id, data['turn'])
+        statements = [('UPDATE conversations SET last_message_at = ? WHERE id = ?', (now, conversation_id))]
         if job_posting:
-            c.execute('UPDATE conversations SET job_posting = ? WHERE id = ?', (job_posting, conversation_id))
-
-    c.execute(
-        'INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)',
-        (conversation_id, 'user', message, now)
-    )
-    c.execute('UPDATE conversations SET message_count = message_count + 1 WHERE id = ?', (conversation_id,))
-    conn.commit()
+            statements.append(('UPDATE conversations SET job_posting = ? WHERE id = ?', (job_posting, conversation_id)))
+    request._conversation_id = conversation_id
 
-    CHAT_MESSAGES.inc()
+    statements += [
+        ('INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)',
+         (conversation_id, 'user', message, now)),
+        ('UPDATE conversations SET message_count = message_count + 1 WHERE id = ?', (conversation_id,)),
+    ]
+    with span('persist'):
+        _chat_writer.submit(conversation_id, statements)
     _inc_counter('chat_messages')
 
-    c.execute(
-        'SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY id',
-        (conversation_id,)
-    )
-    history = [{'role': row[0], 'content': row[1]} for row in c.fetchall()]
+    with span('prompt'):
+        history.append({'role': 'user', 'content': message})
 
-    llm_messages = [{'role': 'system', 'content': SYSTEM_PROMPT}]
+        llm_messages = [{'role': 'system', 'content': SYSTEM_PROMPT}]
+
+        if job_posting:
+            llm_messages.append({
+                'role': 'system',
+                'content': f'The recruiter has shared this job posting for fit assessment:\n\n{job_posting}'
+            })
 
-    if job_posting:
         llm_messages.append({
             'role': 'system',
-            'content': f'The recruiter has shared this job posting for fit assessment:\n\n{job_posting}'
+            'content': f'The recruiter\'s name is {recruiter_name}. You may address them by name occasionally.'
         })
 
-    llm_messages.append({
-        'role': 'system',
-        'content': f'The recruiter\'s name is {recruiter_name}. You may address them by name occasionally.'
-    })
-
-    llm_messages.extend([
-        {'role': 'user' if m['role'] == 'user' else 'assistant', 'content': m['content']}
-        for m in history
-    ])
+        llm_messages.extend([
+            {'role': 'user' if m['role'] == 'user' else 'assistant', 'content': m['content']}
+            for m in history
+        ])
 
     try:
-        client = _get_openai_client()
-        response = client.chat.completions.create(
-            model=os.environ.get('OPENAI_MODEL', 'gpt-4o-mini'),
-            messages=llm_messages,
-            max_tokens=500,
-            temperature=0.7,
-        )
+        with span('llm'):
+            response = _llm.complete(
+                model=os.environ.get('OPENAI_MODEL', 'gpt-4o-mini'),
+                messages=llm_messages,
+                max_tokens=500,
+                temperature=0.7,
+            )
         reply = response.choices[0].message.content.strip()
     except ValueError as e:
-        conn.close()
         return jsonify({
             'error': 'Jason\'s AI is getting set up — please reach out directly at jasonmitchell096@gmail.com in the meantime!'
         }), 503
     except Exception as e:
-        conn.close()
+        headers = {'Retry-After': str(e.retry_after)} if isinstance(e, LLMUnavailable) else {}
         return jsonify({
             'error': 'Jason\'s AI is taking a quick break. Feel free to reach out directly at jasonmitchell096@gmail.com or connect on LinkedIn!'
-        }), 503
+        }), 503, headers
 
     reply_time = datetime.utcnow().isoformat()
-    c.execute(
-        'INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)',
-        (conversation_id, 'assistant', reply, reply_time)
-    )
-    c.execute('UPDATE conversations SET message_count = message_count + 1, last_message_at = ? WHERE id = ?',
-              (reply_time, conversation_id))
-    conn.commit()
-    conn.close()
+    with span('persist'):
+        _chat_writer.submit(conversation_id, [
+            ('INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)',
+             (conversation_id, 'assistant', reply, reply_time)),
+            ('UPDATE conversations SET message_count = message_count + 1, last_message_at = ? WHERE id = ?',
+             (reply_time, conversation_id)),
+        ])
 
     return jsonify({
         'reply': reply,
         'conversation_id': conversation_id,
+        # Echoed back with the next message so any worker can tell stale history
+        'turn': len(history) + 1,
     })
 
 
@@ -681,6 +923,7 @@ def admin_chat_logs():
     if not expected or token != expected:
         return jsonify({'error': 'Unauthorized'}), 401
 
+    _chat_writer.flush(timeout=5)
     conn = sqlite3.connect(CHAT_DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
@@ -713,6 +956,7 @@ def admin_chat_stats():
     if not expected or token != expected:
         return jsonify({'error': 'Unauthorized'}), 401
 
+    _chat_writer.flush(timeout=5)
     conn = sqlite3.connect(CHAT_DB_PATH)
     c = conn.cursor()
 
@@ -747,6 +991,7 @@ def admin_clear_logs():
     if not expected or token != expected:
         return jsonify({'error': 'Unauthorized'}), 401
 
+    _chat_writer.flush(timeout=5)
     conn = sqlite3.connect(CHAT_DB_PATH)
     c = conn.cursor()
     c.execute('DELETE FROM messages')
@@ -757,6 +1002,60 @@ def admin_clear_logs():
     return jsonify({'ok': True, 'message': 'All chat logs cleared.'})
 
 
+def _profile_response(profiles, fmt, name):
+    if fmt == 'collapsed':
+        return Response(to_collapsed(profiles), mimetype='text/plain')
+    if fmt == 'speedscope':
+        resp = jsonify(to_speedscope(profiles))
+        resp.headers['Content-Disposition'] = f'attachment; filename={name}.speedscope.json'
+        return resp
+    return jsonify({'error': 'format must be collapsed or speedscope'}), 400
+
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Recent request profiles from this worker. Protected by ADMIN_TOKEN.
+
+    Without ``format`` lists them; ``format=collapsed`` or ``format=speedscope``
+    exports them all, optionally filtered with ``endpoint=``.
+    """
+    token = request.args.get('token', '')
+    expected = os.environ.get('ADMIN_TOKEN', '')
+
+    if not expected or token != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    profiles = _profiler.profiles()
+    endpoint = request.args.get('endpoint')
+    if endpoint:
+        profiles = [p for p in profiles if p['endpoint'] == endpoint]
+    fmt = request.args.get('format')
+    if fmt:
+        return _profile_response(profiles, fmt, 'profiles')
+    return jsonify({
+        'enabled': _profiler.enabled,
+        'sample_rate': _profiler.sample_rate,
+        'slow_ms': _profiler.slow_ms,
+        'pid': os.getpid(),
+        'profiles': [summary(p) for p in profiles],
+    })
+
+
+@app.route('/admin/profiles/<int:profile_id>')
+def admin_profile(profile_id):
+    """One request profile as collapsed stacks (default) or speedscope JSON."""
+    token = request.args.get('token', '')
+    expected = os.environ.get('ADMIN_TOKEN', '')
+
+    if not expected or token != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    profile = _profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return _profile_response([profile], request.args.get('format', 'collapsed'), f'profile-{profile_id}')
+
+
 # ─── Routes: Health ────────────────────────────────────────────
 
 @app.route('/health')
@@ -0,0 +1,82 @@
+"""
+Request body limits — per-route size caps and a per-IP in-flight byte budget.
+
+Each endpoint gets a body limit sized for its largest legitimate payload. A
+declared Content-Length over the limit is refused before anything is read; a
+chunked body is cut off by Flask (``request.max_content_length``) as soon as
+the stream passes the limit, so neither is ever buffered in full.
+
+The in-flight budget caps how many body bytes one client can have being
+received or processed at once, so a handful of abusive clients cannot pin the
+worker's memory with many large uploads in parallel. It is per process: with
+several gunicorn workers each has its own budget.
+"""
+import os
+import threading
+
+from prometheus_client import Counter, Gauge
+
+KB = 1024
+MB = 1024 * KB
+
+# endpoint → max body bytes
+ROUTE_BODY_LIMITS = {
+    'generate_pdf': 16 * MB,       # 20k line items plus two 2 MB images, base64
+    'create_pdf_job': 16 * MB,
+    'plan': 16 * MB,               # ~100k bunks
+    'update_inventory': 1 * MB,    # 1,000 updates
+    'chat': 128 * KB,              # 20k-character job posting, worst-case UTF-8
+    'track_event': 4 * KB,
+    'track_batch': 16 * KB,        # 100 events
+}
+DEFAULT_BODY_LIMIT = 64 * KB
+MAX_BODY_LIMIT = max(ROUTE_BODY_LIMITS.values())
+INFLIGHT_BYTES_PER_IP = int(os.environ.get('BODY_BUDGET_PER_IP', 32 * MB))
+
+REQUEST_BODY_REJECTED = Counter(
+    'request_body_rejected_total',
+    'Request bodies refused for size (too_large) or the per-IP budget (budget)',
+    ['endpoint', 'reason']
+)
+REQUEST_BODY_INFLIGHT_BYTES = Gauge(
+    'request_body_inflight_bytes',
+    'Request body bytes currently charged against per-IP budgets',
+    multiprocess_mode='livesum'
+)
+
+
+def body_limit(endpoint):
+    """Maximum request body size for an endpoint."""
+    return ROUTE_BODY_LIMITS.get(endpoint, DEFAULT_BODY_LIMIT)
+
+
+class InflightBudget:
+    """Per-IP count of request body bytes currently in flight."""
+
+    def __init__(self, per_ip=INFLIGHT_BYTES_PER_IP):
+        self.per_ip = per_ip
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, ip, nbytes):
+        """Charge ``nbytes`` to ``ip``; False if that would exceed its budget."""
+        with self._lock:
+            used = self._inflight.get(ip, 0)
+            if used + nbytes > self.per_ip:
+                return False
+            self._inflight[ip] = used + nbytes
+        REQUEST_BODY_INFLIGHT_BYTES.inc(nbytes)
+        return True
+
+    def release(self, ip, nbytes):
+        with self._lock:
+            left = self._inflight.get(ip, 0) - nbytes
+            if left > 0:
+                self._inflight[ip] = left
+            else:
+                self._inflight.pop(ip, None)
+        REQUEST_BODY_INFLIGHT_BYTES.dec(nbytes)
+
+    def used(self, ip):
+        with self._lock:
+            return self._inflight.get(ip, 0)
@@ -0,0 +1,160 @@
+"""
+Chat persistence — a single writer thread that group-commits chat events to SQLite.
+
+The request path only enqueues SQL statements; one background thread drains the
+bounded queue and commits everything it finds in a single transaction. Because
+there is exactly one writer consuming a FIFO queue, events for a conversation
+are committed in the order they were submitted.
+
+That ordering only holds within one process; each gunicorn worker has its own
+writer. Across workers the app reads history against a turn number the client
+echoes back (see ``_load_history`` in server.app), waiting only when SQLite is
+behind it.
+"""
+import queue
+import sqlite3
+import threading
+
+from prometheus_client import Counter, Gauge, Histogram
+
+CHAT_PERSIST_QUEUE_DEPTH = Gauge(
+    'chat_persist_queue_depth',
+    'Chat events waiting to be committed to SQLite',
+    multiprocess_mode='livesum'
+)
+CHAT_PERSIST_BACKPRESSURE = Counter(
+    'chat_persist_backpressure_total',
+    'Chat events that had to wait for room in the persistence queue'
+)
+CHAT_PERSIST_ERRORS = Counter(
+    'chat_persist_errors_total',
+    'Chat events that could not be written to SQLite'
+)
+CHAT_HISTORY_STALE = Counter(
+    'chat_history_stale_total',
+    'Chat turns answered with history missing turns not yet committed'
+)
+CHAT_PERSIST_BATCH_SIZE = Histogram(
+    'chat_persist_batch_size',
+    'Chat events committed per SQLite transaction',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+_STOP = object()
+
+
+class ChatWriter:
+    """Bounded, ordered, group-committing writer for chat events."""
+
+    def __init__(self, db_path, maxsize=1000, batch_max=64):
+        # db_path is a callable so tests can repoint the database at runtime
+        self._db_path = db_path
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._batch_max = batch_max
+        self._cond = threading.Condition()
+        self._pending = {}   # { conversation_id: uncommitted event count }
+        self._inflight = 0
+        self._thread = None
+        self._closed = False
+
+    def submit(self, conversation_id, statements):
+        """Queue a list of (sql, params) to be committed together, in order."""
+        if self._closed:
+            raise RuntimeError('chat writer is closed')
+        self._ensure_started()
+        with self._cond:
+            self._pending[conversation_id] = self._pending.get(conversation_id, 0) + 1
+            self._inflight += 1
+        event = (conversation_id, list(statements))
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            CHAT_PERSIST_BACKPRESSURE.inc()
+            self._queue.put(event)
+        CHAT_PERSIST_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def wait_for(self, conversation_id, timeout=None):
+        """Block until every queued event for a conversation is committed."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: conversation_id not in self._pending, timeout=timeout
+            )
+
+    def flush(self, timeout=None):
+        """Block until the queue is empty and every event is committed."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._inflight == 0, timeout=timeout)
+
+    def close(self, timeout=10):
+        """Drain the queue durably and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='chat-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_max and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not _STOP]
+            if events:
+                self._commit(events)
+            CHAT_PERSIST_QUEUE_DEPTH.set(self._queue.qsize())
+            if batch[-1] is _STOP:
+                return
+
+    def _commit(self, events):
+        try:
+            conn = sqlite3.connect(self._db_path(), timeout=30)
+        except sqlite3.Error as e:
+            CHAT_PERSIST_ERRORS.inc(len(events))
+            print(f'Warning: chat writer could not open database: {e}')
+            self._mark_done(events)
+            return
+        try:
+            try:
+                with conn:
+                    for _, statements in events:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                CHAT_PERSIST_BATCH_SIZE.observe(len(events))
+            except sqlite3.Error:
+                # One bad event must not take the rest of the batch with it
+                for event in events:
+                    try:
+                        with conn:
+                            for sql, params in event[1]:
+                                conn.execute(sql, params)
+                    except sqlite3.Error as e:
+                        CHAT_PERSIST_ERRORS.inc()
+                        print(f'Warning: dropped chat event for {event[0]}: {e}')
+        finally:
+            conn.close()
+            self._mark_done(events)
+
+    def _mark_done(self, events):
+        with self._cond:
+            for conversation_id, _ in events:
+                left = self._pending[conversation_id] - 1
+                if left:
+                    self._pending[conversation_id] = left
+                else:
+                    del self._pending[conversation_id]
+            self._inflight -= len(events)
+            self._cond.notify_all()
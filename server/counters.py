@@ -0,0 +1,127 @@
+"""
+Persisted event counters — SQLite is the source of truth for every worker.
+
+Page views, votes and chat messages are counted in the ``counters`` table. No
+process keeps its own running total: ``CounterService.totals()`` reads all
+counters with one query and caches the result for ``COUNTER_REFRESH_INTERVAL``
+seconds, so any number of workers (and restarts) report the same totals,
+at most one interval apart. A worker's own increments show up in its cache
+immediately.
+
+``CounterCollector`` exposes the same totals to Prometheus as counters, in
+place of process-local Counter objects that had to be re-seeded from the
+database on every start.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from prometheus_client.core import CounterMetricFamily
+
+COUNTER_REFRESH_INTERVAL = float(os.environ.get('COUNTER_REFRESH_INTERVAL', 2))
+
+
+def create_counter_table(conn, names):
+    """Create the counters table and a zero row for each name, if missing."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.executemany('INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)',
+                     [(name,) for name in names])
+
+
+class CounterService:
+    """Increments and cached totals of the persisted counters."""
+
+    def __init__(self, db_path, names, refresh_interval=COUNTER_REFRESH_INTERVAL, clock=time.monotonic):
+        # db_path is a callable so tests can repoint the database at runtime
+        self._db_path = db_path
+        self.names = tuple(names)
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ready = set()
+        self._totals = None
+        self._totals_path = None
+        self._read_at = 0.0
+
+    def add(self, increments):
+        """Apply several increments ({name: n}) in one transaction."""
+        path = self._db_path()
+        conn = self._connect(path)
+        try:
+            with conn:
+                conn.executemany('UPDATE counters SET value = value + ? WHERE name = ?',
+                                 [(n, name) for name, n in increments.items()])
+        finally:
+            conn.close()
+        with self._lock:
+            if self._totals is not None and self._totals_path == path:
+                for name, n in increments.items():
+                    if name in self._totals:
+                        self._totals[name] += n
+
+    def totals(self):
+        """Every counter's value, re-read from SQLite once the cache is stale."""
+        path = self._db_path()
+        now = self._clock()
+        with self._lock:
+            if (self._totals is not None and self._totals_path == path
+                    and now - self._read_at < self.refresh_interval):
+                return dict(self._totals)
+        try:
+            conn = self._connect(path)
+            try:
+                totals = dict(conn.execute('SELECT name, value FROM counters'))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            with self._lock:
+                if self._totals is None or self._totals_path != path:
+                    raise
+                print(f'Warning: serving cached counters, read failed: {e}')
+                return dict(self._totals)
+        self.prime(totals, path, now)
+        return dict(totals)
+
+    def get(self, name):
+        return self.totals().get(name, 0)
+
+    def prime(self, totals, path=None, read_at=None):
+        """Seed the cache with totals already read (e.g. by the startup schema check)."""
+        with self._lock:
+            self._totals = {name: totals.get(name, 0) for name in self.names}
+            self._totals_path = self._db_path() if path is None else path
+            self._read_at = self._clock() if read_at is None else read_at
+
+    def invalidate(self):
+        with self._lock:
+            self._totals = None
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path, timeout=30)
+        if path not in self._ready:
+            with conn:
+                create_counter_table(conn, self.names)
+            self._ready.add(path)
+        return conn
+
+
+class CounterCollector:
+    """Prometheus collector reporting the persisted totals as counters."""
+
+    def __init__(self, service, metrics):
+        self._service = service
+        self._metrics = metrics     # { counter name: (metric name, help) }
+
+    def describe(self):
+        return [CounterMetricFamily(metric, doc) for metric, doc in self._metrics.values()]
+
+    def collect(self):
+        totals = self._service.totals()
+        for name, (metric, doc) in self._metrics.items():
+            yield CounterMetricFamily(metric, doc, value=totals.get(name, 0))
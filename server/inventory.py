@@ -0,0 +1,202 @@
+"""
+Yard inventory — persisted bunk stock with versioned delta sync.
+
+Every bunk row records the inventory version that last changed it. A batch of
+updates is applied in one transaction under a single new version, so a client
+holding version N can ask for only the bunks changed since then.
+"""
+import json
+import sqlite3
+import threading
+
+from server.validation import MAX_DIMENSION, MAX_NUMBER, MAX_PIECES
+
+MAX_BATCH = 1000
+
+# payload key → (column, type)
+BUNK_FIELDS = {
+    'name': ('name', str),
+    'category': ('category', str),
+    'capacity': ('capacity', int),
+    'current': ('current', int),
+    'unitPrice': ('unit_price', float),
+    'unitWeight': ('unit_weight', float),
+    'flagged': ('flagged', bool),
+    'dims': ('dims', dict),
+}
+_COLUMNS = ['id'] + [col for col, _ in BUNK_FIELDS.values()] + ['version']
+_MAXIMUMS = {'capacity': MAX_PIECES, 'current': MAX_PIECES,
+             'unitPrice': MAX_NUMBER, 'unitWeight': MAX_NUMBER}
+_DIM_KEYS = ('w', 'h', 'l')
+
+
+class InventoryError(ValueError):
+    """Raised when an inventory update batch is invalid; nothing is applied."""
+
+
+def _number(key, value, maximum):
+    # Rejects booleans, NaN and infinities, which would break the JSON snapshot
+    if value.__class__ not in (int, float) or not 0 <= value <= maximum:
+        raise InventoryError(f'{key} must be a number between 0 and {maximum:,g}')
+    return value
+
+
+def _coerce(key, value, kind):
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise InventoryError(f'{key} must be true or false')
+        return value
+    if kind is dict:
+        if not isinstance(value, dict):
+            raise InventoryError(f'{key} must be an object of numbers')
+        return {k: _number(f'{key}.{k}', value[k], MAX_DIMENSION) for k in _DIM_KEYS if k in value}
+    if kind is str:
+        if not isinstance(value, str):
+            raise InventoryError(f'{key} must be a string')
+        return value[:100]
+    return kind(_number(key, value, _MAXIMUMS[key]))
+
+
+def _validate(update):
+    if not isinstance(update, dict):
+        raise InventoryError('each update must be an object')
+    bunk_id = update.get('id')
+    if not isinstance(bunk_id, str) or not bunk_id or len(bunk_id) > 64:
+        raise InventoryError('each update needs a string id')
+    fields = {key: _coerce(key, update[key], kind)
+              for key, (_, kind) in BUNK_FIELDS.items() if key in update}
+    delta = update.get('delta')
+    if delta is not None:
+        if 'current' in fields:
+            raise InventoryError('send current or delta, not both')
+        if delta.__class__ is not int or abs(delta) > MAX_PIECES:
+            raise InventoryError(f'delta must be an integer between -{MAX_PIECES:,} and {MAX_PIECES:,}')
+    return bunk_id, fields, delta
+
+
+def _to_dict(row):
+    bunk = {'id': row[0]}
+    for (key, (_, kind)), value in zip(BUNK_FIELDS.items(), row[1:-1]):
+        if kind is bool:
+            value = bool(value)
+        elif kind is dict:
+            value = json.loads(value) if value else None
+        bunk[key] = value
+    bunk['version'] = row[-1]
+    return bunk
+
+
+class InventoryStore:
+    """SQLite-backed bunk inventory keyed by catalog id."""
+
+    def __init__(self, db_path):
+        # db_path is a callable so tests can repoint the database at runtime
+        self._db_path = db_path
+        self._ready = set()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        path = self._db_path()
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        if path not in self._ready:
+            with self._lock:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS bunks (
+                        id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL DEFAULT '',
+                        category TEXT NOT NULL DEFAULT '',
+                        capacity INTEGER NOT NULL,
+                        current INTEGER NOT NULL DEFAULT 0,
+                        unit_price REAL NOT NULL DEFAULT 0,
+                        unit_weight REAL NOT NULL DEFAULT 0,
+                        flagged INTEGER NOT NULL DEFAULT 0,
+                        dims TEXT,
+                        version INTEGER NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_bunks_version ON bunks (version)')
+                self._ready.add(path)
+        return conn
+
+    def version(self):
+        """Latest inventory version (0 for an empty yard)."""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM bunks').fetchone()[0]
+        finally:
+            conn.close()
+
+    def snapshot(self, since=0):
+        """Return (version, bunks changed after ``since``) from one consistent read."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM bunks').fetchone()[0]
+            rows = conn.execute(
+                f'SELECT {", ".join(_COLUMNS)} FROM bunks WHERE version > ? ORDER BY id',
+                (since,)
+            ).fetchall()
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return version, [_to_dict(r) for r in rows]
+
+    def apply(self, updates):
+        """
+        Apply a batch of bunk updates in one transaction.
+
+        Each update names a bunk ``id`` plus any fields to set; ``delta`` adjusts
+        ``current`` relative to the stored value. Stock is clamped to
+        ``[0, capacity]``. Unknown ids create a bunk, which needs a capacity.
+
+        Returns:
+            (version, number of bunks that changed)
+        """
+        if not isinstance(updates, list):
+            raise InventoryError('updates must be a list')
+        if len(updates) > MAX_BATCH:
+            raise InventoryError(f'too many updates (max {MAX_BATCH:,})')
+        parsed = [_validate(u) for u in updates]
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM bunks').fetchone()[0]
+                changed = {}
+                for bunk_id, fields, delta in parsed:
+                    bunk = changed.get(bunk_id)
+                    if bunk is None:
+                        row = conn.execute(
+                            f'SELECT {", ".join(_COLUMNS)} FROM bunks WHERE id = ?', (bunk_id,)
+                        ).fetchone()
+                        bunk = _to_dict(row) if row else None
+                    if bunk is None:
+                        if 'capacity' not in fields:
+                            raise InventoryError(f'new bunk {bunk_id} needs a capacity')
+                        bunk = {'id': bunk_id, 'name': '', 'category': '', 'current': 0,
+                                'unitPrice': 0.0, 'unitWeight': 0.0, 'flagged': False,
+                                'dims': None, 'version': None}
+                    new = dict(bunk, **fields)
+                    if delta is not None:
+                        new['current'] = bunk['current'] + delta
+                    new['current'] = min(max(new['current'], 0), new['capacity'])
+                    if new != bunk:
+                        changed[bunk_id] = new
+                if changed:
+                    version += 1
+                    conn.executemany(
+                        f'INSERT OR REPLACE INTO bunks ({", ".join(_COLUMNS)}) '
+                        f'VALUES ({", ".join("?" * len(_COLUMNS))})',
+                        [(b['id'], b['name'], b['category'], b['capacity'], b['current'],
+                          b['unitPrice'], b['unitWeight'], int(b['flagged']),
+                          json.dumps(b['dims']) if b['dims'] is not None else None, version)
+                         for b in changed.values()]
+                    )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+        return version, len(changed)
@@ -0,0 +1,292 @@
+"""
+LLM gateway — every OpenAI call from the chatbot goes through here.
+
+The gateway caps how many upstream calls one worker makes at once; callers
+beyond the cap queue for a slot, and give up after a short wait rather than
+holding a server thread while OpenAI is slow. Each call has one deadline that
+covers queueing, every attempt and the backoff between them. Transient
+failures (timeouts, connection errors, 429 and 5xx) are retried with jittered
+exponential backoff, honouring Retry-After. Identical prompts already in
+flight are coalesced into a single upstream call whose result every caller
+shares.
+
+A circuit breaker opens after several consecutive upstream failures: calls
+then fail fast, without a thread waiting out a timeout, until a single probe
+call succeeds after the reset period. Refused calls raise LLMUnavailable.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 3))
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 2))
+LLM_DEADLINE = float(os.environ.get('LLM_TIMEOUT', 20))
+LLM_RETRIES = int(os.environ.get('LLM_RETRIES', 2))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
+
+RETRY_STATUSES = (408, 409, 429)
+
+LLM_REQUESTS = Counter(
+    'llm_requests_total',
+    'LLM gateway calls by outcome (ok, error, timeout, busy, circuit_open, coalesced)',
+    ['outcome']
+)
+LLM_RETRIES_TOTAL = Counter(
+    'llm_retries_total',
+    'Upstream LLM attempts retried after a transient failure'
+)
+LLM_INFLIGHT = Gauge(
+    'llm_inflight_requests',
+    'Upstream LLM calls in progress',
+    multiprocess_mode='livesum'
+)
+LLM_QUEUE_DEPTH = Gauge(
+    'llm_queue_depth',
+    'Calls waiting for an upstream LLM slot',
+    multiprocess_mode='livesum'
+)
+LLM_QUEUE_WAIT = Histogram(
+    'llm_queue_wait_seconds',
+    'Time spent waiting for an upstream LLM slot',
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5]
+)
+LLM_LATENCY = Histogram(
+    'llm_request_duration_seconds',
+    'Upstream LLM call time including retries',
+    buckets=[0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30]
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    'llm_circuit_open',
+    '1 while the LLM circuit breaker is refusing calls',
+    multiprocess_mode='livemax'
+)
+
+
+class LLMUnavailable(Exception):
+    """The gateway refused or abandoned a call; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMBusy(LLMUnavailable):
+    """No upstream slot freed up within the queue timeout."""
+
+
+class CircuitOpen(LLMUnavailable):
+    """Recent upstream calls failed; calls are refused until the breaker resets."""
+
+
+class LLMTimeout(LLMUnavailable):
+    """The call's deadline passed before an answer arrived."""
+
+
+def make_openai_client(api_key, base_url=None, pool_size=LLM_MAX_CONCURRENCY, timeout=LLM_DEADLINE):
+    """OpenAI client with a connection pool sized to the gateway and no SDK retries."""
+    from openai import OpenAI, DefaultHttpxClient, DEFAULT_CONNECTION_LIMITS, Timeout
+    Limits = type(DEFAULT_CONNECTION_LIMITS)      # httpx.Limits
+    http_client = DefaultHttpxClient(limits=Limits(
+        max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=60,
+    ))
+    # Retries and the overall deadline are the gateway's job
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client,
+                  timeout=Timeout(timeout, connect=3), max_retries=0)
+
+
+def _retryable(exc):
+    status = getattr(exc, 'status_code', None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # openai.APIConnectionError and its APITimeoutError subclass
+    return any(cls.__name__ == 'APIConnectionError' for cls in type(exc).__mro__)
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    try:
+        return float(headers.get('retry-after')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after ``failures`` consecutive failures; one probe is let through after ``reset_after``."""
+
+    def __init__(self, failures=LLM_BREAKER_FAILURES, reset_after=LLM_BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        """True if a call may go upstream; otherwise raise CircuitOpen."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            wait = self._opened_at + self.reset_after - time.monotonic()
+            if wait <= 0 and not self._probing:
+                self._probing = True
+                return True
+        raise CircuitOpen('LLM circuit open', retry_after=max(int(wait + 0.999), 1))
+
+    def success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._probing = False
+        LLM_CIRCUIT_OPEN.set(0)
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._probing or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+            self._probing = False
+            opened = self._opened_at is not None
+        LLM_CIRCUIT_OPEN.set(1 if opened else 0)
+
+    def release(self):
+        """The call ended without reaching upstream; let another probe through."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self):
+        self.success()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGateway:
+    """Concurrency-limited, deadline-bound, retrying and coalescing chat-completions caller."""
+
+    def __init__(self, client, max_concurrent=LLM_MAX_CONCURRENCY, queue_timeout=LLM_QUEUE_TIMEOUT,
+                 deadline=LLM_DEADLINE, retries=LLM_RETRIES, backoff=0.25, max_backoff=4,
+                 breaker=None):
+        # client() returns the OpenAI client; a callable so tests can patch it
+        self._client = client
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def complete(self, deadline=None, **request):
+        """Run ``chat.completions.create(**request)`` and return its response."""
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        if request.get('stream'):
+            return self._call(request, deadline_at)
+
+        key = json.dumps(request, sort_keys=True, default=str)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            LLM_REQUESTS.labels('coalesced').inc()
+            if not flight.done.wait(max(deadline_at - time.monotonic(), 0)):
+                raise LLMTimeout('LLM deadline exceeded waiting for a coalesced call')
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._call(request, deadline_at)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def reset(self):
+        """Close the circuit breaker (tests, or after fixing configuration)."""
+        self.breaker.reset()
+
+    # ─── Internals ────────────────────────────────────────────
+
+    def _call(self, request, deadline_at):
+        client = self._client()      # ValueError when unconfigured: not an upstream failure
+        try:
+            self.breaker.allow()
+        except CircuitOpen:
+            LLM_REQUESTS.labels('circuit_open').inc()
+            raise
+
+        LLM_QUEUE_DEPTH.inc()
+        waited = time.monotonic()
+        acquired = self._slots.acquire(timeout=max(min(self.queue_timeout, deadline_at - waited), 0))
+        LLM_QUEUE_DEPTH.dec()
+        LLM_QUEUE_WAIT.observe(time.monotonic() - waited)
+        if not acquired:
+            self.breaker.release()
+            LLM_REQUESTS.labels('busy').inc()
+            raise LLMBusy('all LLM slots busy')
+
+        LLM_INFLIGHT.inc()
+        start = time.monotonic()
+        try:
+            return self._attempt(client, request, deadline_at)
+        finally:
+            LLM_LATENCY.observe(time.monotonic() - start)
+            LLM_INFLIGHT.dec()
+            self._slots.release()
+
+    def _attempt(self, client, request, deadline_at):
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self.breaker.failure()
+                LLM_REQUESTS.labels('timeout').inc()
+                raise LLMTimeout('LLM deadline exceeded')
+            try:
+                response = client.chat.completions.create(timeout=remaining, **request)
+            except Exception as e:
+                if not _retryable(e):
+                    # A bad request says nothing about upstream health
+                    self.breaker.release()
+                    LLM_REQUESTS.labels('error').inc()
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1)
+                delay = max(delay, _retry_after(e) or 0)
+                if attempt >= self.retries or time.monotonic() + delay >= deadline_at:
+                    self.breaker.failure()
+                    LLM_REQUESTS.labels('error').inc()
+                    raise
+                attempt += 1
+                LLM_RETRIES_TOTAL.inc()
+                time.sleep(delay)
+                continue
+            self.breaker.success()
+            LLM_REQUESTS.labels('ok').inc()
+            return response
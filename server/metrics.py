@@ -0,0 +1,127 @@
+"""
+Request metrics — bounded label values, per-class latency buckets, cached scrapes.
+
+Every label value recorded on REQUEST_COUNT and the latency histograms passes
+through a normalizer, so the number of series stays fixed however odd the
+traffic: unknown HTTP methods become ``other``, uncommon status codes collapse
+to their class (``4xx``), and endpoints past ``METRICS_MAX_ENDPOINTS`` distinct
+names are counted as ``other``.
+
+Latency is observed into one histogram per route class (see route_policy), each
+with buckets that fit the class: sub-millisecond steps for static files and
+probes, up to 30 s for API routes that wait on OpenAI or render PDFs. API and
+unclassified requests keep the ``http_request_duration_seconds`` name.
+
+``ExpositionCache`` keeps the rendered ``/metrics`` text for
+``METRICS_CACHE_TTL`` seconds; one scrape re-renders it while concurrent ones
+are served the previous text.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+
+METRICS_CACHE_TTL = float(os.environ.get('METRICS_CACHE_TTL', 5))
+METRICS_MAX_ENDPOINTS = int(os.environ.get('METRICS_MAX_ENDPOINTS', 100))
+
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+# Status codes the app actually returns keep their own label value
+STATUSES = frozenset({200, 201, 202, 204, 206, 301, 302, 304, 308,
+                      400, 401, 403, 404, 405, 409, 413, 415, 429,
+                      500, 502, 503, 504})
+
+# route class → latency histogram name and bucket bounds (seconds)
+LATENCY_HISTOGRAMS = {
+    'static': ('http_static_request_duration_seconds',
+               (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)),
+    'probe': ('http_probe_request_duration_seconds',
+              (0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.25)),
+    'page': ('http_page_request_duration_seconds',
+             (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)),
+    'api': ('http_request_duration_seconds',
+            (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)),
+}
+
+REQUEST_COUNT = Counter(
+    'http_requests_total',
+    'Total HTTP requests',
+    ['method', 'endpoint', 'status']
+)
+REQUEST_LATENCY = {
+    route_class: Histogram(name, f'HTTP request latency in seconds ({route_class} routes)',
+                           ['endpoint'], buckets=buckets)
+    for route_class, (name, buckets) in LATENCY_HISTOGRAMS.items()
+}
+# Unclassified requests (unmatched URLs) share the API histogram
+REQUEST_LATENCY['unknown'] = REQUEST_LATENCY['api']
+
+
+class BoundedLabel:
+    """Passes through the first ``limit`` distinct values, then returns ``overflow``."""
+
+    def __init__(self, limit, overflow='other'):
+        self.limit = limit
+        self.overflow = overflow
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        if value in self._seen:
+            return value
+        with self._lock:
+            if len(self._seen) >= self.limit:
+                return self.overflow
+            self._seen.add(value)
+        return value
+
+
+_endpoint_label = BoundedLabel(METRICS_MAX_ENDPOINTS)
+
+
+def method_label(method):
+    return method if method in METHODS else 'other'
+
+
+def status_label(status):
+    return str(status) if status in STATUSES else f'{status // 100}xx'
+
+
+def observe_request(route_class, method, endpoint, status, seconds, weight=1.0):
+    """Record one request in REQUEST_COUNT and its class's latency histogram."""
+    endpoint = _endpoint_label(endpoint)
+    REQUEST_COUNT.labels(
+        method=method_label(method),
+        endpoint=endpoint,
+        status=status_label(status)
+    ).inc(weight)
+    REQUEST_LATENCY[route_class].labels(endpoint=endpoint).observe(seconds)
+
+
+class ExpositionCache:
+    """The rendered metrics text, re-rendered at most once per ``ttl`` seconds."""
+
+    def __init__(self, render, ttl=METRICS_CACHE_TTL):
+        self._render = render
+        self.ttl = ttl
+        self._body = None
+        self._rendered_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        body = self._body
+        if body is not None and time.monotonic() - self._rendered_at < self.ttl:
+            return body
+        # One scrape renders; others serve the previous text meanwhile
+        if not self._lock.acquire(blocking=body is None):
+            return body
+        try:
+            if self._body is body or time.monotonic() - self._rendered_at >= self.ttl:
+                self._body = self._render()
+                self._rendered_at = time.monotonic()
+            return self._body
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._body = None
@@ -0,0 +1,260 @@
+"""
+OpenAI stub — a local, OpenAI-compatible chat-completions server for load tests.
+
+    python -m server.openai_stub [--port 8099] [--latency-ms 400] [--distribution lognormal]
+                                 [--tokens-per-sec 60] [--error-rate 0.05] [--error 429]
+
+Point the app at it with ``OPENAI_BASE_URL=http://127.0.0.1:8099/v1`` (no API
+key needed) and /api/chat goes over real HTTP through the OpenAI SDK, with
+keep-alive connections and streaming, but never leaves the machine.
+
+Each completion waits a time-to-first-token drawn from the latency
+distribution (``fixed``, ``normal`` or ``lognormal`` around ``latency_ms``),
+then produces the reply at ``tokens_per_sec`` (one word per token), streamed
+as server-sent chunks when the request asks for ``stream``. A fraction
+``error_rate`` of requests fail instead: with an OpenAI-style error body and
+status (429 carries Retry-After), or by hanging without answering (``hang``)
+so client timeouts can be exercised.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ('Jason is a software engineer who builds warehouse and logistics tools, '
+                 'from 3D yard planners to PDF order reports and the APIs behind them.')
+DISTRIBUTIONS = ('fixed', 'normal', 'lognormal')
+ERRORS = {
+    429: ('rate_limit_exceeded', 'Rate limit reached for requests'),
+    500: ('server_error', 'The server had an error while processing your request'),
+    502: ('bad_gateway', 'Bad gateway'),
+    503: ('service_unavailable', 'The engine is currently overloaded'),
+}
+
+
+class OpenAIStub:
+    """Threaded stand-in for the OpenAI chat-completions API."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=300, distribution='lognormal',
+                 sigma=0.5, tokens_per_sec=0, error_rate=0.0, error=503, hang_seconds=600,
+                 reply=DEFAULT_REPLY, seed=None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f'distribution must be one of {", ".join(DISTRIBUTIONS)}')
+        if error != 'hang' and error not in ERRORS:
+            raise ValueError(f'error must be "hang" or one of {sorted(ERRORS)}')
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.error = error
+        self.hang_seconds = hang_seconds
+        self.words = reply.split()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._counts = {'requests': 0, 'errors': 0, 'connections': 0, 'in_flight': 0, 'peak_in_flight': 0}
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        """Serve on a background thread; returns ``self``."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='openai-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._stopped.set()      # releases hung requests
+        if self._thread:
+            self._httpd.shutdown()
+            self._thread.join()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        """Request, error and connection counts, and the peak number of requests in flight."""
+        with self._lock:
+            return dict(self._counts)
+
+    # ─── Behaviour ────────────────────────────────────────────
+
+    def first_token_delay(self):
+        """Seconds before the first token, drawn from the configured distribution."""
+        mean = self.latency_ms / 1000
+        with self._lock:
+            if self.distribution == 'normal':
+                return max(self._random.gauss(mean, mean * self.sigma), 0.0)
+            if self.distribution == 'lognormal' and mean > 0:
+                # mu chosen so the distribution's mean is latency_ms
+                return self._random.lognormvariate(math.log(mean) - self.sigma ** 2 / 2, self.sigma)
+            return mean
+
+    def should_fail(self):
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def wait(self, seconds):
+        """Sleep, returning early if the stub is stopped."""
+        if seconds > 0:
+            self._stopped.wait(seconds)
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self._counts[key] += delta
+            if key == 'in_flight':
+                self._counts['peak_in_flight'] = max(self._counts['peak_in_flight'], self._counts['in_flight'])
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'     # keep-alive, as against the real API
+        disable_nagle_algorithm = True     # headers and body go out in separate writes
+
+        def setup(self):
+            super().setup()
+            stub._count('connections')
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/v1/models':
+                return self._json(200, {'object': 'list', 'data': [
+                    {'id': 'gpt-4o-mini', 'object': 'model', 'created': 0, 'owned_by': 'stub'},
+                ]})
+            self._error(404, 'not_found', f'Unknown path {self.path}')
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if self.path.rstrip('/') != '/v1/chat/completions':
+                return self._error(404, 'not_found', f'Unknown path {self.path}')
+            try:
+                request = json.loads(body)
+                request['messages']
+            except (ValueError, KeyError, TypeError):
+                return self._error(400, 'invalid_request_error', 'messages is required')
+
+            stub._count('requests')
+            stub._count('in_flight')
+            try:
+                if stub.should_fail():
+                    stub._count('errors')
+                    if stub.error == 'hang':
+                        stub.wait(stub.hang_seconds)
+                        self.close_connection = True
+                        return
+                    stub.wait(stub.first_token_delay())
+                    code, message = ERRORS[stub.error]
+                    headers = {'Retry-After': '1'} if stub.error == 429 else {}
+                    return self._error(stub.error, code, message, headers)
+                self._complete(request)
+            finally:
+                stub._count('in_flight', -1)
+
+        def _complete(self, request):
+            max_tokens = request.get('max_tokens') or request.get('max_completion_tokens')
+            words = stub.words[:max_tokens] if max_tokens else stub.words
+            finish = 'length' if len(words) < len(stub.words) else 'stop'
+            per_token = 1 / stub.tokens_per_sec if stub.tokens_per_sec else 0
+            completion_id = f'chatcmpl-{uuid.uuid4().hex[:24]}'
+            base = {'id': completion_id, 'created': int(time.time()),
+                    'model': request.get('model', 'gpt-4o-mini'), 'system_fingerprint': 'stub'}
+            usage = {'prompt_tokens': sum(len(str(m.get('content', '')).split()) for m in request['messages']),
+                     'completion_tokens': len(words)}
+            usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+            stub.wait(stub.first_token_delay())
+            if not request.get('stream'):
+                stub.wait(per_token * len(words))
+                return self._json(200, dict(base, object='chat.completion', usage=usage, choices=[{
+                    'index': 0, 'finish_reason': finish, 'logprobs': None,
+                    'message': {'role': 'assistant', 'content': ' '.join(words), 'refusal': None},
+                }]))
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            chunk = dict(base, object='chat.completion.chunk')
+            self._event(dict(chunk, choices=[{'index': 0, 'finish_reason': None,
+                                              'delta': {'role': 'assistant', 'content': ''}}]))
+            for i, word in enumerate(words):
+                if i:
+                    stub.wait(per_token)
+                self._event(dict(chunk, choices=[{'index': 0, 'finish_reason': None,
+                                                  'delta': {'content': word if i == 0 else ' ' + word}}]))
+            self._event(dict(chunk, choices=[{'index': 0, 'finish_reason': finish, 'delta': {}}]))
+            if (request.get('stream_options') or {}).get('include_usage'):
+                self._event(dict(chunk, choices=[], usage=usage))
+            self._write_chunk(b'data: [DONE]\n\n')
+            self._write_chunk(b'')
+
+        def _event(self, payload):
+            self._write_chunk(b'data: ' + json.dumps(payload).encode() + b'\n\n')
+
+        def _write_chunk(self, data):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+        def _error(self, status, code, message, headers=None):
+            error_type = 'invalid_request_error' if status < 500 and status != 429 else code
+            self._json(status, {'error': {'message': message, 'type': error_type,
+                                          'param': None, 'code': code}}, headers)
+
+        def _json(self, status, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=300, help='mean time to first token')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--sigma', type=float, default=0.5, help='spread of normal/lognormal latency')
+    parser.add_argument('--tokens-per-sec', type=float, default=0, help='0 produces the reply at once')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error', default='503', help='429, 500, 502, 503 or hang')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    stub = OpenAIStub(args.host, args.port, latency_ms=args.latency_ms, distribution=args.distribution,
+                      sigma=args.sigma, tokens_per_sec=args.tokens_per_sec, error_rate=args.error_rate,
+                      error=args.error if args.error == 'hang' else int(args.error), seed=args.seed)
+    print(f'OpenAI stub on {stub.base_url} — set OPENAI_BASE_URL to this')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+PDF graphics — native ReportLab vector drawings for the restock order PDF.
+
+Replaces the client-rendered PNGs (Three.js truck diagram, canvas yard chart)
+with drawings built from the order payload, so PDFs are smaller, need no WebGL
+and are deterministic. Truck layouts are cached on a digest of the line-item
+content, so the cache's keys stay small however long the order is.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from reportlab.graphics.shapes import Drawing, Group, Line, Rect, String
+from reportlab.lib import colors
+
+from server.planner import (
+    plan_restock, DECK_LENGTH_IN, DECK_WIDTH_IN, STACK_HEIGHT_IN, TRUCK_MAX_LBS,
+)
+
+ACCENT = colors.HexColor('#F96302')
+DARK_BG   = colors.HexColor('#0a0e17')
+CARD_BG   = colors.HexColor('#1a2233')
+BORDER    = colors.HexColor('#1e293b')
+TEXT      = colors.HexColor('#e2e8f0')
+MUTED     = colors.HexColor('#94a3b8')
+GREEN     = colors.HexColor('#22c55e')
+RED       = colors.HexColor('#ef4444')
+YELLOW    = colors.HexColor('#eab308')
+
+INK = BORDER
+SLATE = colors.HexColor('#64748b')
+DECK = colors.HexColor('#4b5563')
+DECK_EDGE = colors.HexColor('#1f2937')
+BAR_BG = colors.HexColor('#e2e8f0')
+
+CATEGORY_COLORS = {
+    'Dimensional': colors.HexColor('#deb887'),
+    'Sheet': colors.HexColor('#e8d5a0'),
+    'Treated': colors.HexColor('#7a8a5c'),
+    'Specialty': colors.HexColor('#c05832'),
+}
+OTHER_COLOR = colors.HexColor('#94a3b8')
+
+BUNDLE_WIDTH_IN = 48       # two bundles side by side across the deck
+LANES = 2
+DEFAULT_DIMS = (3.5, 1.5, 96)
+CAB_LENGTH_IN = 70
+MAX_DIAGRAM_TRUCKS = 24
+MAX_CHART_BARS = 120       # beyond this, neighbouring bunks share a bar
+LAYOUT_CACHE_SIZE = 16     # entries per worker; each holds at most max_trucks layouts
+
+
+LIGHT_GREEN = colors.HexColor('#86efac')
+EMPTY_FILL = colors.HexColor('#374151')
+
+# Stock-level bands: index 0 is empty, then one band per threshold crossed
+FILL_THRESHOLDS = (0.2, 0.5, 0.8)
+FILL_BAND_COLORS = (EMPTY_FILL, RED, YELLOW, LIGHT_GREEN, GREEN)
+
+
+def get_fill_color(pct):
+    if pct >= 0.8:
+        return GREEN
+    if pct >= 0.5:
+        return LIGHT_GREEN
+    if pct >= 0.2:
+        return YELLOW
+    if pct > 0:
+        return RED
+    return EMPTY_FILL
+
+
+def category_color(category):
+    return CATEGORY_COLORS.get(category, OTHER_COLOR)
+
+
+def _load_color(category):
+    # Slightly darker outline so adjacent bundles of one category stay distinct
+    fill = category_color(category)
+    return fill, colors.Color(fill.red * 0.6, fill.green * 0.6, fill.blue * 0.6)
+
+
+def _item_key(items):
+    """Hashable, order-preserving summary of the fields that affect the layout."""
+    key = []
+    for item in items:
+        dims = item.get('dims') or {}
+        key.append((
+            str(item.get('name', '')), str(item.get('category', '')),
+            int(item.get('toOrder', 0) or 0), float(item.get('unitWeight', 0) or 0),
+            float(dims.get('w') or DEFAULT_DIMS[0]),
+            float(dims.get('h') or DEFAULT_DIMS[1]),
+            float(dims.get('l') or DEFAULT_DIMS[2]),
+        ))
+    return tuple(key)
+
+
+_layout_cache = OrderedDict()    # digest → (layouts, total trucks), oldest first
+_layout_lock = threading.Lock()
+
+
+def _cached_layouts(items, max_trucks):
+    """_truck_layouts for the items, reused while the same order is re-rendered."""
+    key = _item_key(items)
+    digest = hashlib.sha256(repr((key, max_trucks)).encode()).digest()
+    with _layout_lock:
+        if digest in _layout_cache:
+            _layout_cache.move_to_end(digest)
+            return _layout_cache[digest]
+    result = _truck_layouts(key, max_trucks)
+    with _layout_lock:
+        _layout_cache[digest] = result
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return result
+
+
+def _truck_layouts(key, max_trucks):
+    """
+    Plan trucks for the line items and place each load as a block on the deck.
+
+    Only the first ``max_trucks`` trucks are laid out; returns those layouts
+    and the total number of trucks in the plan.
+    """
+    bunks = [{
+        'id': i, 'name': name, 'category': category, 'capacity': qty,
+        'current': 0, 'toOrder': qty, 'unitWeight': weight, 'unitPrice': 0,
+        'dims': {'w': w, 'h': h, 'l': length},
+    } for i, (name, category, qty, weight, w, h, length) in enumerate(key)]
+    plan = plan_restock(bunks, max_trucks=max_trucks)
+
+    layouts = []
+    for truck in plan['trucks']:
+        cursors = [0.0] * LANES
+        blocks = []
+        for load in truck['loads']:
+            _, category, _, _, w, h, length = key[load['id']]
+            volume = load['pieces'] * w * h * length
+            # Long runs of bundles go end to end once a single stack would top out
+            run = max(min(length, DECK_LENGTH_IN), volume / (BUNDLE_WIDTH_IN * STACK_HEIGHT_IN))
+            height = max(volume / (run * BUNDLE_WIDTH_IN), 3.0)
+            lane = cursors.index(min(cursors))
+            blocks.append({
+                'x': cursors[lane], 'lane': lane, 'length': run, 'height': height,
+                'category': category, 'name': load['name'], 'pieces': load['pieces'],
+            })
+            cursors[lane] += run + 4
+        # Schematic: squeeze an overfull row back onto the deck
+        squeeze = min(1.0, DECK_LENGTH_IN / max(max(cursors) - 4, 1))
+        for block in blocks:
+            block['x'] *= squeeze
+            block['length'] *= squeeze
+        layouts.append({
+            'truck': truck['truck'], 'weight': truck['weight'],
+            'utilization': truck['utilization'], 'loads': len(truck['loads']),
+            'blocks': tuple(blocks),
+        })
+    return tuple(layouts), plan['totals']['trucks']
+
+
+def _truck_drawing(layout, width, total_trucks):
+    scale = (width - 20) / (DECK_LENGTH_IN + CAB_LENGTH_IN)
+    deck_w = DECK_LENGTH_IN * scale
+    top_h = DECK_WIDTH_IN * scale
+    side_h = (STACK_HEIGHT_IN + 12) * scale
+    height = 34 + top_h + 14 + side_h + 16
+    d = Drawing(width, height)
+    x0 = 10
+
+    # ── header + load bar ──
+    pct = layout['weight'] / TRUCK_MAX_LBS
+    d.add(String(x0, height - 12,
+                 f'TRUCK {layout["truck"]} OF {total_trucks}',
+                 fontName='Helvetica-Bold', fontSize=9, fillColor=ACCENT))
+    d.add(String(x0 + 95, height - 12,
+                 f'{layout["weight"]:,.0f} lbs / {TRUCK_MAX_LBS:,} lbs ({pct * 100:.1f}% loaded)'
+                 f'  •  {layout["loads"]} load{"s" if layout["loads"] != 1 else ""}',
+                 fontName='Helvetica', fontSize=8, fillColor=SLATE))
+    bar_x, bar_w = width - 150, 140
+    d.add(Rect(bar_x, height - 13, bar_w, 6, fillColor=BAR_BG, strokeColor=None))
+    bar_color = RED if pct > 0.9 else (YELLOW if pct > 0.7 else GREEN)
+    d.add(Rect(bar_x, height - 13, bar_w * min(pct, 1), 6, fillColor=bar_color, strokeColor=None))
+
+    # ── top-down view ──
+    top_y = height - 24 - top_h
+    top = Group()
+    top.add(Rect(x0, top_y, deck_w, top_h, fillColor=DECK, strokeColor=DECK_EDGE, strokeWidth=0.8))
+    top.add(Rect(x0 + deck_w + 2, top_y + top_h * 0.1, CAB_LENGTH_IN * scale - 2, top_h * 0.8,
+                 rx=3, ry=3, fillColor=INK, strokeColor=DECK_EDGE))
+    lane_gap = (DECK_WIDTH_IN - LANES * BUNDLE_WIDTH_IN) / (LANES + 1)
+    for block in layout['blocks']:
+        fill, edge = _load_color(block['category'])
+        bx = x0 + block['x'] * scale
+        by = top_y + (lane_gap + block['lane'] * (BUNDLE_WIDTH_IN + lane_gap)) * scale
+        bw, bh = block['length'] * scale, BUNDLE_WIDTH_IN * scale
+        top.add(Rect(bx, by, bw, bh, fillColor=fill, strokeColor=edge, strokeWidth=0.6))
+        if bw > 34:
+            label = block['name'] if len(block['name']) * 3.2 < bw - 4 else block['name'][:max(int((bw - 4) / 3.2), 3)]
+            top.add(String(bx + bw / 2, by + bh / 2 + 1, label, fontName='Helvetica-Bold',
+                           fontSize=5.5, fillColor=INK, textAnchor='middle'))
+            top.add(String(bx + bw / 2, by + bh / 2 - 6, f'{block["pieces"]:,} pcs',
+                           fontName='Helvetica', fontSize=5, fillColor=INK, textAnchor='middle'))
+    d.add(top)
+    d.add(String(x0, top_y - 9, 'TOP VIEW', fontName='Helvetica', fontSize=6, fillColor=SLATE))
+
+    # ── side view (driver side; far lane drawn behind) ──
+    base_y = 14
+    deck_top = base_y + 8 * scale
+    side = Group()
+    side.add(Rect(x0, base_y, deck_w, 8 * scale, fillColor=DECK, strokeColor=DECK_EDGE, strokeWidth=0.8))
+    side.add(Rect(x0 + deck_w + 2, base_y, CAB_LENGTH_IN * scale - 2, side_h * 0.75,
+                  rx=3, ry=3, fillColor=INK, strokeColor=DECK_EDGE))
+    for wheel_x in (0.08, 0.16, 0.84, 0.92):
+        side.add(Rect(x0 + deck_w * wheel_x - 5, base_y - 6, 10, 6, rx=2, ry=2,
+                      fillColor=DECK_EDGE, strokeColor=None))
+    for lane in reversed(range(LANES)):
+        for block in layout['blocks']:
+            if block['lane'] != lane:
+                continue
+            fill, edge = _load_color(block['category'])
+            if lane:
+                fill = colors.Color(fill.red * 0.8, fill.green * 0.8, fill.blue * 0.8)
+            side.add(Rect(x0 + block['x'] * scale, deck_top, block['length'] * scale,
+                          block['height'] * scale, fillColor=fill, strokeColor=edge, strokeWidth=0.6))
+    side.add(Line(x0, deck_top + STACK_HEIGHT_IN * scale, x0 + deck_w, deck_top + STACK_HEIGHT_IN * scale,
+                  strokeColor=SLATE, strokeWidth=0.4, strokeDashArray=[2, 2]))
+    d.add(side)
+    d.add(String(x0, 2, 'SIDE VIEW', fontName='Helvetica', fontSize=6, fillColor=SLATE))
+    return d
+
+
+def _legend(categories, width, note=''):
+    d = Drawing(width, 16)
+    x = 10
+    for category in categories:
+        d.add(Rect(x, 4, 8, 8, fillColor=category_color(category), strokeColor=DECK_EDGE, strokeWidth=0.4))
+        d.add(String(x + 11, 5, category or 'Other', fontName='Helvetica', fontSize=7, fillColor=INK))
+        x += 20 + len(category or 'Other') * 4.2
+    if note:
+        d.add(String(width - 10, 5, note, fontName='Helvetica-Oblique', fontSize=7,
+                     fillColor=SLATE, textAnchor='end'))
+    return d
+
+
+def truck_diagrams(items, width, max_trucks=MAX_DIAGRAM_TRUCKS):
+    """
+    Build flatbed loading-plan drawings (top and side view per truck).
+
+    Args:
+        items: Order line items as posted to /generate-pdf.
+        width: Available frame width in points.
+        max_trucks: Trucks drawn before the rest are summarized in the legend.
+
+    Returns:
+        List of Drawing flowables, ending with a category legend.
+    """
+    layouts, n_trucks = _cached_layouts(items, max_trucks)
+    if not layouts:
+        return []
+    drawings = [_truck_drawing(layout, width, n_trucks) for layout in layouts]
+    categories = sorted({b['category'] for layout in layouts for b in layout['blocks']})
+    hidden = n_trucks - len(layouts)
+    note = f'+ {hidden} more truck{"s" if hidden != 1 else ""} not drawn' if hidden > 0 else ''
+    drawings.append(_legend(categories, width, note))
+    return drawings
+
+
+def _yard_bars(yard):
+    """(label, fill pct, flagged) per bar, binning neighbours past MAX_CHART_BARS."""
+    rows = [(str(b.get('name', ''))[:10], float(b.get('current', 0) or 0),
+             float(b.get('capacity', 0) or 0), bool(b.get('flagged'))) for b in yard]
+    if len(rows) <= MAX_CHART_BARS:
+        return [(name, cur / cap if cap > 0 else 0, flagged) for name, cur, cap, flagged in rows]
+    per_bar = -(-len(rows) // MAX_CHART_BARS)
+    bars = []
+    for i in range(0, len(rows), per_bar):
+        chunk = rows[i:i + per_bar]
+        cur = sum(r[1] for r in chunk)
+        cap = sum(r[2] for r in chunk)
+        bars.append(('', cur / cap if cap > 0 else 0, any(r[3] for r in chunk)))
+    return bars
+
+
+def yard_chart(yard, width, height=144):
+    """
+    Build the yard inventory bar chart: one bar per bunk, filled to its stock level.
+
+    Args:
+        yard: List of {name, current, capacity, flagged} bunk summaries.
+        width: Available frame width in points.
+        height: Drawing height in points.
+
+    Returns:
+        A Drawing, or None when there are no bunks.
+    """
+    bars = _yard_bars(yard)
+    if not bars:
+        return None
+    d = Drawing(width, height)
+    d.add(Rect(0, 0, width, height, fillColor=colors.HexColor('#0f1629'), strokeColor=None))
+    d.add(String(width / 2, height - 14, 'YARD INVENTORY STATUS — ALL BUNKS',
+                 fontName='Courier-Bold', fontSize=9, fillColor=ACCENT, textAnchor='middle'))
+
+    labelled = any(name for name, _, _ in bars)
+    base_y = 30 if labelled else 10
+    bar_area = height - base_y - 24
+    gap = 2.5 if len(bars) <= MAX_CHART_BARS // 2 else 1
+    bar_w = min(22, (width - 40) / len(bars) - gap)
+    # Rotated labels: -45° so they read down and to the right under each bar
+    rot = 0.7071
+    for i, (name, pct, flagged) in enumerate(bars):
+        x = 20 + i * (bar_w + gap)
+        d.add(Rect(x, base_y, bar_w, bar_area, fillColor=CARD_BG, strokeColor=None))
+        d.add(Rect(x, base_y, bar_w, bar_area * min(max(pct, 0), 1),
+                   fillColor=get_fill_color(pct), strokeColor=None))
+        if flagged:
+            d.add(Rect(x - 0.75, base_y - 0.75, bar_w + 1.5, bar_area + 1.5,
+                       fillColor=None, strokeColor=ACCENT, strokeWidth=1.2))
+        if name:
+            label = Group(String(0, 0, name, fontName='Courier', fontSize=5, fillColor=MUTED))
+            label.transform = (rot, -rot, rot, rot, x + bar_w / 2, base_y - 4)
+            d.add(label)
+    return d
@@ -0,0 +1,308 @@
+"""
+PDF jobs — background rendering for restock order PDFs.
+
+POST /api/pdf-jobs only queues the payload and returns a job id; a small pool
+of worker threads renders each PDF to disk. Job state is a JSON file next to
+the PDF, written atomically, so any server worker can answer status and
+download requests for a job. Finished jobs are removed after a TTL.
+
+Each job records the pid of the process that owns it, and that process touches
+the state files of its queued and running jobs every ``heartbeat_interval``
+seconds. A queued or running job whose owner has exited (a recycled or killed
+worker) or whose heartbeat is older than ``stale_after`` is marked failed —
+in bulk when a queue starts, and individually when its status is read.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+
+from prometheus_client import Counter, Gauge, Histogram
+
+PDF_JOB_QUEUE_DEPTH = Gauge(
+    'pdf_job_queue_depth',
+    'PDF jobs waiting for a render worker',
+    multiprocess_mode='livesum'
+)
+PDF_JOB_LATENCY = Histogram(
+    'pdf_job_latency_seconds',
+    'PDF job time spent waiting in the queue, rendering, and end to end',
+    ['phase'],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+)
+PDF_JOBS = Counter(
+    'pdf_jobs_total',
+    'PDF jobs by outcome',
+    ['status']
+)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+FINISHED = (DONE, FAILED)
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+_STOP = object()
+
+
+class JobQueueFull(Exception):
+    """Raised when the render queue has no room for another job."""
+
+
+class PdfJobQueue:
+    """Bounded queue of PDF renders with on-disk job state and results."""
+
+    def __init__(self, render, storage_dir, workers=2, maxsize=64, ttl=3600,
+                 cleanup_interval=60, heartbeat_interval=10, stale_after=60):
+        # render(data, out) writes the PDF to ``out`` and returns its filename;
+        # storage_dir is a callable so tests can repoint it at runtime
+        self._render = render
+        self._storage_dir = storage_dir
+        self._workers = workers
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._ttl = ttl
+        self._cleanup_interval = cleanup_interval
+        self._last_cleanup = 0.0
+        self._heartbeat_interval = heartbeat_interval
+        self._stale_after = stale_after
+        self._lock = threading.Lock()
+        self._threads = []
+        self._active = {}  # job id -> directory, for this process's unfinished jobs
+        self._stopping = threading.Event()
+        self._closed = False
+
+    # ─── Public API ───────────────────────────────────────────
+
+    def submit(self, data):
+        """Queue a render and return the new job's state."""
+        if self._closed:
+            raise RuntimeError('pdf job queue is closed')
+        self._ensure_started()
+        self.cleanup()
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': QUEUED,
+            'createdAt': time.time(),
+            'startedAt': None,
+            'finishedAt': None,
+            'filename': None,
+            'size': None,
+            'error': None,
+            'pid': os.getpid(),
+        }
+        directory = self._dir()
+        with self._lock:
+            self._active[job['id']] = directory  # before the file exists to recover()
+        self._write_state(directory, job)
+        try:
+            self._queue.put_nowait((directory, job['id'], data))
+        except queue.Full:
+            self._forget(job['id'])
+            os.remove(self._path(directory, job['id'], '.json'))
+            PDF_JOBS.labels(status='rejected').inc()
+            raise JobQueueFull('too many PDF jobs in progress')
+        PDF_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        return job
+
+    def status(self, job_id):
+        """Current state of a job, or None if it is unknown or expired."""
+        if not _JOB_ID.match(job_id or ''):
+            return None
+        directory = self._dir()
+        path = self._path(directory, job_id, '.json')
+        try:
+            with open(path) as f:
+                job = json.load(f)
+            heartbeat = os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+        if self._is_stale(job, heartbeat):
+            self._fail_stale(directory, job)
+        return job
+
+    def result_path(self, job_id):
+        """Path of a finished job's PDF, or None if it isn't ready."""
+        job = self.status(job_id)
+        if job is None or job['status'] != DONE:
+            return None
+        path = self._path(self._dir(), job_id, '.pdf')
+        return path if os.path.exists(path) else None
+
+    def cleanup(self, force=False):
+        """Delete job files older than the TTL; runs at most once per interval."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_cleanup < self._cleanup_interval:
+                return 0
+            self._last_cleanup = now
+        directory = self._dir()
+        removed = 0
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self._ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass  # another worker got there first
+        return removed
+
+    def recover(self):
+        """Fail unfinished jobs left behind by exited workers; returns the count."""
+        try:
+            entries = list(os.scandir(self._storage_dir()))
+        except OSError:
+            return 0
+        failed = 0
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path) as f:
+                    job = json.load(f)
+                heartbeat = entry.stat().st_mtime
+            except (OSError, ValueError):
+                continue  # removed or replaced while scanning
+            if self._is_stale(job, heartbeat):
+                self._fail_stale(os.path.dirname(entry.path), job)
+                failed += 1
+        return failed
+
+    def close(self, timeout=10):
+        """Finish queued renders and stop the worker threads."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stopping.set()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+
+    # ─── Internals ────────────────────────────────────────────
+
+    def _dir(self):
+        directory = self._storage_dir()
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @staticmethod
+    def _path(directory, job_id, suffix):
+        return os.path.join(directory, job_id + suffix)
+
+    def _write_state(self, directory, job):
+        # Write-then-rename so readers in other workers never see a partial file
+        path = self._path(directory, job['id'], '.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._active.pop(job_id, None)
+
+    def _is_stale(self, job, heartbeat):
+        if job.get('status') in FINISHED:
+            return False
+        with self._lock:
+            if job.get('id') in self._active:
+                return False
+        if time.time() - heartbeat > self._stale_after:
+            return True
+        # Our own pid on a job we aren't tracking means the pid was reused
+        pid = job.get('pid')
+        return pid is not None and (pid == os.getpid() or not _pid_alive(pid))
+
+    def _fail_stale(self, directory, job):
+        print(f"Warning: PDF job {job['id']} abandoned by worker {job.get('pid')}")
+        job['status'] = FAILED
+        job['error'] = 'PDF worker exited before finishing'
+        job['finishedAt'] = time.time()
+        self._write_state(directory, job)
+        PDF_JOBS.labels(status=FAILED).inc()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                t = threading.Thread(target=self._run, name=f'pdf-job-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+        # Heartbeat is not in _threads: close() sends _STOP once per render thread
+        threading.Thread(target=self._heartbeat, name='pdf-job-heartbeat', daemon=True).start()
+        self.recover()
+
+    def _heartbeat(self):
+        # The state file's mtime is the heartbeat, so touching it never races
+        # with the render thread rewriting the job
+        while not self._stopping.wait(self._heartbeat_interval):
+            with self._lock:
+                active = list(self._active.items())
+            for job_id, directory in active:
+                try:
+                    os.utime(self._path(directory, job_id, '.json'))
+                except OSError:
+                    pass  # finished and expired, or removed
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            PDF_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            if item is _STOP:
+                return
+            self._process(*item)
+
+    def _process(self, directory, job_id, data):
+        try:
+            with open(self._path(directory, job_id, '.json')) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            self._forget(job_id)
+            return  # expired or removed while queued
+        job['status'] = RUNNING
+        job['startedAt'] = time.time()
+        PDF_JOB_LATENCY.labels(phase='queued').observe(job['startedAt'] - job['createdAt'])
+        self._write_state(directory, job)
+
+        pdf_path = self._path(directory, job_id, '.pdf')
+        tmp = pdf_path + '.tmp'
+        try:
+            with open(tmp, 'wb') as out:
+                job['filename'] = self._render(data, out)
+            os.replace(tmp, pdf_path)
+            job['size'] = os.path.getsize(pdf_path)
+            job['status'] = DONE
+        except Exception as e:
+            print(f'Warning: PDF job {job_id} failed: {e}')
+            job['status'] = FAILED
+            job['error'] = 'PDF rendering failed'
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        job['finishedAt'] = time.time()
+        self._write_state(directory, job)
+        self._forget(job_id)
+        PDF_JOB_LATENCY.labels(phase='render').observe(job['finishedAt'] - job['startedAt'])
+        PDF_JOB_LATENCY.labels(phase='total').observe(job['finishedAt'] - job['createdAt'])
+        PDF_JOBS.labels(status=job['status']).inc()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    except (OSError, OverflowError, TypeError):
+        return False
+    return True
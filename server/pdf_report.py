@@ -0,0 +1,210 @@
+"""
+Restock order PDF — builds the order document from a /generate-pdf payload.
+
+Kept free of Flask request state so the same build runs inline for
+/generate-pdf and in the background PDF job workers.
+"""
+import base64
+import io
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (
+    SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph, Image,
+    PageBreak, HRFlowable
+)
+from reportlab.lib.enums import TA_CENTER
+
+from server.pdf_graphics import ACCENT, MUTED, truck_diagrams, yard_chart
+from server.pdf_tables import line_item_tables
+from server.timing import span
+
+
+def download_name(now=None):
+    """Filename the order PDF is offered under."""
+    return f'restock-order-{(now or datetime.now()).strftime("%Y%m%d")}.pdf'
+
+
+def build_order_pdf(data, out):
+    """
+    Render a restock order PDF.
+
+    Args:
+        data: /generate-pdf payload (items, totals, optional yard summary or images).
+        out: Binary file object the PDF is written to.
+
+    Returns:
+        The download filename for the document.
+    """
+    items = data.get('items', [])
+    truck_image = data.get('truckImage', '')
+    chart_image = data.get('chartImage', '')
+    yard = data.get('yard') or []
+    total_weight = data.get('totalWeight', 0)
+    total_cost = data.get('totalCost', 0)
+    total_pieces = data.get('totalPieces', 0)
+    total_bunks = data.get('totalBunks', 0)
+
+    doc = SimpleDocTemplate(
+        out,
+        pagesize=letter,
+        topMargin=0.5 * inch,
+        bottomMargin=0.5 * inch,
+        leftMargin=0.6 * inch,
+        rightMargin=0.6 * inch,
+    )
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'HDTitle', parent=styles['Title'],
+        fontName='Helvetica-Bold', fontSize=20,
+        textColor=ACCENT, spaceAfter=4,
+    ))
+    styles.add(ParagraphStyle(
+        'HDSub', parent=styles['Normal'],
+        fontName='Helvetica', fontSize=10,
+        textColor=MUTED, spaceAfter=12,
+    ))
+    styles.add(ParagraphStyle(
+        'SectionHead', parent=styles['Heading2'],
+        fontName='Helvetica-Bold', fontSize=13,
+        textColor=ACCENT, spaceBefore=14, spaceAfter=6,
+    ))
+    styles.add(ParagraphStyle(
+        'CellText', parent=styles['Normal'],
+        fontName='Helvetica', fontSize=8.5,
+        textColor=colors.black,
+    ))
+    styles.add(ParagraphStyle(
+        'CellBold', parent=styles['Normal'],
+        fontName='Helvetica-Bold', fontSize=8.5,
+        textColor=colors.black,
+    ))
+    styles.add(ParagraphStyle(
+        'Footer', parent=styles['Normal'],
+        fontName='Helvetica', fontSize=7,
+        textColor=MUTED, alignment=TA_CENTER,
+    ))
+
+    elems = []
+
+    # ── HEADER ──
+    now = datetime.now()
+    elems.append(Paragraph('LUMBER YARD RESTOCK ORDER', styles['HDTitle']))
+    elems.append(Paragraph(
+        f'Generated: {now.strftime("%B %d, %Y at %I:%M %p")} &nbsp;|&nbsp; '
+        f'Order #{now.strftime("%y%m%d")}-{total_bunks:02d}',
+        styles['HDSub'],
+    ))
+    elems.append(HRFlowable(
+        width='100%', thickness=2, color=ACCENT,
+        spaceAfter=10, spaceBefore=2,
+    ))
+
+    # ── SUMMARY BOX ──
+    summary_data = [
+        ['RESTOCK SUMMARY', '', '', ''],
+        ['Bunks to Restock', 'Total Pieces', 'Total Weight', 'Estimated Cost'],
+        [str(total_bunks), f'{total_pieces:,}', f'{total_weight:,} lbs', f'${total_cost:,.2f}'],
+    ]
+    summary_table = Table(summary_data, colWidths=[doc.width / 4] * 4)
+    summary_table.setStyle(TableStyle([
+        ('SPAN', (0, 0), (-1, 0)),
+        ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#f0f0f0')),
+        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (-1, 1), 8),
+        ('TEXTCOLOR', (0, 1), (-1, 1), colors.HexColor('#666666')),
+        ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 2), (-1, 2), 14),
+        ('TEXTCOLOR', (0, 2), (-1, 2), ACCENT),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOX', (0, 0), (-1, -1), 1, ACCENT),
+        ('INNERGRID', (0, 1), (-1, -1), 0.5, colors.HexColor('#dddddd')),
+        ('TOPPADDING', (0, 2), (-1, 2), 8),
+        ('BOTTOMPADDING', (0, 2), (-1, 2), 8),
+    ]))
+    elems.append(summary_table)
+    elems.append(Spacer(1, 14))
+
+    # ── LINE ITEMS TABLE ──
+    elems.append(Paragraph('ORDER LINE ITEMS', styles['SectionHead']))
+
+    # Page-sized chunks keep layout linear and memory flat for large orders
+    with span('tables'):
+        elems.extend(line_item_tables(items, total_pieces, total_weight, total_cost, doc.height))
+    elems.append(Spacer(1, 12))
+
+    # ── TRUCK DIAGRAM ──
+    if truck_image:
+        # Legacy clients still upload a rendered PNG
+        elems.append(PageBreak())
+        elems.append(Paragraph('FLATBED DELIVERY — LOADING PLAN', styles['SectionHead']))
+        try:
+            with span('decode'):
+                img_data = base64.b64decode(truck_image.split(',')[1])
+            img_buf = io.BytesIO(img_data)
+            img = Image(img_buf, width=7.4 * inch, height=4.3 * inch)
+            elems.append(img)
+        except Exception as e:
+            elems.append(Paragraph(f'[Truck diagram error: {e}]', styles['Normal']))
+        elems.append(Spacer(1, 14))
+    elif items:
+        try:
+            with span('diagrams'):
+                diagrams = truck_diagrams(items, doc.width)
+        except (KeyError, TypeError, ValueError) as e:
+            diagrams = [Paragraph(f'[Truck diagram error: {e}]', styles['Normal'])]
+        if diagrams:
+            elems.append(PageBreak())
+            elems.append(Paragraph('FLATBED DELIVERY — LOADING PLAN', styles['SectionHead']))
+            for drawing in diagrams:
+                elems.append(drawing)
+                elems.append(Spacer(1, 8))
+            elems.append(Spacer(1, 6))
+
+    # ── YARD CHART ──
+    if chart_image:
+        # Legacy clients still upload a rendered PNG
+        elems.append(Paragraph('YARD INVENTORY STATUS', styles['SectionHead']))
+        try:
+            with span('decode'):
+                img_data = base64.b64decode(chart_image.split(',')[1])
+            img_buf = io.BytesIO(img_data)
+            img = Image(img_buf, width=6.8 * inch, height=2 * inch)
+            elems.append(img)
+        except Exception as e:
+            elems.append(Paragraph(f'[Chart error: {e}]', styles['Normal']))
+        elems.append(Spacer(1, 14))
+    elif yard:
+        try:
+            with span('chart'):
+                chart = yard_chart(yard, doc.width)
+        except (AttributeError, TypeError, ValueError) as e:
+            chart = Paragraph(f'[Chart error: {e}]', styles['Normal'])
+        if chart is not None:
+            elems.append(Paragraph('YARD INVENTORY STATUS', styles['SectionHead']))
+            elems.append(chart)
+            elems.append(Spacer(1, 14))
+
+    # ── FOOTER ──
+    elems.append(HRFlowable(
+        width='100%', thickness=1, color=MUTED,
+        spaceAfter=6, spaceBefore=6,
+    ))
+    elems.append(Paragraph(
+        'Generated by Lumber Yard Restock Planner — Jason Mitchell | '
+        'mitchellsoftware.dev &nbsp;|&nbsp; Powered by Three.js + ReportLab',
+        styles['Footer'],
+    ))
+
+    with span('build'):
+        doc.build(elems)
+    return download_name(now)
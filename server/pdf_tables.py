@@ -0,0 +1,176 @@
+"""
+PDF tables — order line items split into page-sized, lazily built chunks.
+
+One ReportLab Table holding every line item is re-measured each time it splits
+across a page, which is quadratic in the row count, and all of its cell and
+style objects stay alive until the document is finished. Here each chunk of
+rows is its own Table, built only when the frame lays it out and dropped once
+it has been drawn, so layout is linear and only one chunk is in memory at a time.
+
+Rows have a fixed, pre-measured height so ReportLab never measures cells, and
+the stock-level colors are computed for the whole order in one NumPy pass and
+emitted as one style command per run of equal color.
+"""
+from functools import lru_cache
+
+import numpy as np
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Table, TableStyle
+
+from server.pdf_graphics import ACCENT, FILL_BAND_COLORS, FILL_THRESHOLDS
+
+ROWS_PER_CHUNK = 40        # used when the frame height isn't known
+IN_STOCK_COL = 3
+FRAME_PADDING = 12         # platypus Frame default: 6pt top + 6pt bottom
+
+LINE_ITEM_HEADER = ['#', 'Product', 'Category', 'In Stock', 'Capacity', 'Order Qty',
+                    'Unit $/pc', 'Weight/pc', 'Line Total']
+LINE_ITEM_WIDTHS = [0.3*inch, 1.3*inch, 0.8*inch, 0.6*inch, 0.6*inch,
+                    0.65*inch, 0.65*inch, 0.7*inch, 0.85*inch]
+
+_BASE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
+    ('BOX', (0, 0), (-1, -1), 1, ACCENT),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+]
+ROW_BANDS = [colors.white, colors.HexColor('#fafafa')]
+_TOTALS_STYLE = [
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fff3e0')),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, -1), (-1, -1), ACCENT),
+    ('LINEABOVE', (0, -1), (-1, -1), 2, ACCENT),
+]
+
+
+class LazyTable(Flowable):
+    """Builds its Table when first laid out and releases it once drawn."""
+
+    def __init__(self, build):
+        super().__init__()
+        self._build = build
+        self._table = None
+
+    def _get(self):
+        if self._table is None:
+            self._table = self._build()
+        return self._table
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = self._get().wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        parts = self._get().split(availWidth, availHeight)
+        if parts:
+            # The parts replace this flowable in the story
+            self._table = None
+        return parts
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._get().drawOn(canvas, x, y, _sW)
+        self._table = None
+
+
+@lru_cache(maxsize=1)
+def row_height():
+    """Height of one single-line row, measured once from the header."""
+    t = Table([LINE_ITEM_HEADER], colWidths=LINE_ITEM_WIDTHS)
+    t.setStyle(TableStyle(_BASE_STYLE))
+    return t.wrap(0, 0)[1]
+
+
+def fill_bands(items):
+    """Stock-level band per item (an index into FILL_BAND_COLORS), in one pass."""
+    current = np.array([item['current'] for item in items], dtype=np.float64)
+    capacity = np.array([item['capacity'] for item in items], dtype=np.float64)
+    pct = np.divide(current, capacity, out=np.zeros(len(items)), where=capacity > 0)
+    return np.where(pct > 0, np.searchsorted(FILL_THRESHOLDS, pct, side='right') + 1, 0)
+
+
+def _band_style(bands):
+    """TEXTCOLOR commands for the In Stock column: a default plus one per run."""
+    if not len(bands):
+        return []
+    common = int(np.bincount(bands).argmax())
+    style = [('TEXTCOLOR', (IN_STOCK_COL, 1), (IN_STOCK_COL, len(bands)), FILL_BAND_COLORS[common])]
+    edges = np.flatnonzero(np.diff(bands)) + 1
+    for lo, hi in zip(np.r_[0, edges].tolist(), np.r_[edges, len(bands)].tolist()):
+        band = int(bands[lo])
+        if band != common:
+            style.append(('TEXTCOLOR', (IN_STOCK_COL, lo + 1), (IN_STOCK_COL, hi), FILL_BAND_COLORS[band]))
+    return style
+
+
+def _one_line(value):
+    # Fixed row heights assume single-line cells
+    return str(value).replace('\n', ' ')
+
+
+def _chunk_table(items, start, bands, totals_row=None):
+    columns = (
+        map(str, range(start + 1, start + len(items) + 1)),
+        (_one_line(item['name']) for item in items),
+        (_one_line(item['category']) for item in items),
+        (str(item['current']) for item in items),
+        (str(item['capacity']) for item in items),
+        (str(item['toOrder']) for item in items),
+        ('$' + format(item['unitPrice'], '.2f') for item in items),
+        (f"{item['unitWeight']} lbs" for item in items),
+        ('$' + format(item['totalCost'], ',.2f') for item in items),
+    )
+    rows = [LINE_ITEM_HEADER]
+    rows.extend(map(list, zip(*columns)))
+    last_item_row = -1 if totals_row is None else -2
+    style = _BASE_STYLE + [('ROWBACKGROUNDS', (0, 1), (-1, last_item_row), ROW_BANDS)]
+    style.extend(_band_style(bands))
+    if totals_row is not None:
+        rows.append(totals_row)
+        style.extend(_TOTALS_STYLE)
+    t = Table(rows, colWidths=LINE_ITEM_WIDTHS, rowHeights=[row_height()] * len(rows), repeatRows=1)
+    t.setStyle(TableStyle(style))
+    return t
+
+
+def line_item_tables(items, total_pieces, total_weight, total_cost,
+                     frame_height=None, rows_per_chunk=None):
+    """
+    Build the ORDER LINE ITEMS table as a list of lazily built chunk flowables.
+
+    Args:
+        items: Order line items as posted to /generate-pdf.
+        total_pieces, total_weight, total_cost: Values for the closing totals row.
+        frame_height: Page frame height; chunks are sized to fill one page.
+        rows_per_chunk: Explicit line items per chunk (overrides frame_height).
+
+    Returns:
+        List of LazyTable flowables; the last one carries the totals row.
+    """
+    if rows_per_chunk is None:
+        rows_per_chunk = ROWS_PER_CHUNK
+        if frame_height:
+            # Frame padding, header and totals rows share the page with the items
+            rows_per_chunk = max(int((frame_height - FRAME_PADDING) // row_height()) - 2, 1)
+    totals_row = ['', '', '', '', '', str(total_pieces),
+                  '', f'{total_weight:,} lbs', f'${total_cost:,.2f}']
+    bands = fill_bands(items)
+    starts = range(0, len(items), rows_per_chunk) or [0]
+    last = starts[-1]
+    return [
+        LazyTable(lambda start=start: _chunk_table(
+            items[start:start + rows_per_chunk], start,
+            bands[start:start + rows_per_chunk],
+            totals_row if start == last else None,
+        ))
+        for start in starts
+    ]
@@ -0,0 +1,287 @@
+"""
+Restock planning — order quantities and multi-truck flatbed loading plans.
+
+Takes bunk inventories shaped like the demo's CATALOG entries (capacity,
+current, unitWeight, unitPrice, dims) and decides what to order and how to
+split it across 48,000-lb flatbeds. Quantity, weight and deck-footprint math
+is done on NumPy arrays; the packing itself is best-fit decreasing over a
+sorted list of open trucks, placing identical loads in groups so it stays fast
+for 100k+ bunks.
+"""
+import bisect
+
+import numpy as np
+
+from server.validation import MAX_DIMENSION, MAX_NUMBER, MAX_PIECES
+
+TRUCK_MAX_LBS = 48000
+DECK_LENGTH_IN = 48 * 12     # 48 ft flatbed
+DECK_WIDTH_IN = 102          # 8.5 ft
+STACK_HEIGHT_IN = 48         # max bundle stack height on the deck
+DECK_AREA_SQIN = DECK_LENGTH_IN * DECK_WIDTH_IN
+REORDER_BELOW = 0.5          # same "low" threshold as the yard health panel
+MAX_BUNKS = 200_000
+MAX_TRUCKS = 10_000          # a full MAX_BUNKS yard of the demo catalog needs ~4,500
+
+_NUMERIC_FIELDS = ('capacity', 'current', 'unitWeight', 'unitPrice')
+_DIM_FIELDS = ('w', 'h', 'l')
+_LABEL_COLUMNS = ('id', 'name', 'category', 'flagged')
+_MAXIMUMS = {'capacity': MAX_PIECES, 'current': MAX_PIECES, 'unitWeight': MAX_NUMBER,
+             'unitPrice': MAX_NUMBER, 'w': MAX_DIMENSION, 'h': MAX_DIMENSION, 'l': MAX_DIMENSION}
+_EPS = 1e-9
+
+
+class PlanError(ValueError):
+    """Raised when bunk input can't be planned."""
+
+
+def _columns(bunks):
+    """Normalize record-style or column-style bunk input into arrays."""
+    if isinstance(bunks, dict):
+        cols = dict(bunks)
+        dims = cols.pop('dims', None) or {}
+        if not isinstance(dims, dict):
+            raise PlanError('dims must be an object of columns')
+        capacity = cols.get('capacity', [])
+        if not isinstance(capacity, list):
+            raise PlanError('every column must be a list')
+        n = len(capacity)
+        for key in _LABEL_COLUMNS:
+            if key in cols and (not isinstance(cols[key], list) or len(cols[key]) != n):
+                raise PlanError(f'{key} must be a list with one value per bunk')
+        for key in _DIM_FIELDS:
+            cols.setdefault(key, dims.get(key, [0] * n))
+    elif isinstance(bunks, list):
+        n = len(bunks)
+        try:
+            cols = {key: [b.get(key, 0) for b in bunks] for key in _NUMERIC_FIELDS}
+            cols['id'] = [b.get('id', i) for i, b in enumerate(bunks)]
+            for key in ('name', 'category'):
+                cols[key] = [b.get(key, '') for b in bunks]
+            cols['toOrder'] = [b.get('toOrder', -1) for b in bunks]
+            cols['flagged'] = [bool(b.get('flagged')) for b in bunks]
+            for key in _DIM_FIELDS:
+                cols[key] = [(b.get('dims') or {}).get(key, 0) for b in bunks]
+        except AttributeError:
+            raise PlanError('each bunk must be an object')
+    else:
+        raise PlanError('bunks must be a list of objects or an object of columns')
+
+    if n > MAX_BUNKS:
+        raise PlanError(f'too many bunks (max {MAX_BUNKS:,})')
+
+    try:
+        arrays = {key: np.asarray(cols.get(key, [0] * n), dtype=np.float64)
+                  for key in _NUMERIC_FIELDS + _DIM_FIELDS}
+        to_order = np.asarray(cols.get('toOrder', [-1] * n), dtype=np.float64)
+    except (TypeError, ValueError):
+        raise PlanError('capacity, current, unitWeight, unitPrice and dims must be numbers')
+    if any(a.shape != (n,) for a in arrays.values()) or to_order.shape != (n,):
+        raise PlanError('every column must have one value per bunk')
+    if not all(np.isfinite(a).all() and (a >= 0).all() for a in arrays.values()):
+        raise PlanError('numeric fields must be finite and non-negative')
+    if not np.isfinite(to_order).all():
+        raise PlanError('toOrder must be a number')
+    # Bounded before any int64 conversion, which would silently wrap
+    for key, maximum in _MAXIMUMS.items():
+        if (arrays[key] > maximum).any():
+            raise PlanError(f'{key} must be at most {maximum:,g}')
+    if (to_order > MAX_PIECES).any():
+        raise PlanError(f'toOrder must be at most {MAX_PIECES:,}')
+    arrays['toOrder'] = to_order
+
+    try:
+        flagged = np.asarray(cols.get('flagged', [False] * n), dtype=bool)
+    except (TypeError, ValueError):
+        raise PlanError('flagged must be true or false for each bunk')
+    if flagged.shape != (n,):
+        raise PlanError('flagged must be true or false for each bunk')
+    arrays['flagged'] = flagged
+    ids = cols.get('id') or list(range(n))
+    labels = {key: list(cols.get(key) or [''] * n) for key in ('name', 'category')}
+    return n, ids, labels, arrays
+
+
+def _best_fit_decreasing(weights, areas, max_lbs):
+    """
+    Assign each load to a truck. Loads must already be sorted heaviest first.
+
+    Identical consecutive loads are placed as a group: the tightest truck that
+    fits one copy takes as many copies as it can hold, which is exactly what
+    placing them one at a time would do, at a fraction of the iterations.
+    """
+    n = len(weights)
+    if not n:
+        return np.empty(0, dtype=np.int64), 0
+    starts = np.flatnonzero(np.r_[True, (np.diff(weights) != 0) | (np.diff(areas) != 0)])
+    counts = np.diff(np.r_[starts, n]).tolist()
+    group_w = weights[starts].tolist()
+    group_a = areas[starts].tolist()
+    # Smallest deck footprint still to come; trucks with less room can be closed
+    min_area_left = np.minimum.accumulate(areas[starts][::-1])[::-1].tolist()
+    lightest = group_w[-1]
+
+    open_trucks = []     # sorted (remaining_lbs, truck) for trucks that can still take a load
+    remaining_area = []
+    placed_truck, placed_count = [], []
+    for w, a, c, min_a in zip(group_w, group_a, counts, min_area_left):
+        while c:
+            pos = bisect.bisect_left(open_trucks, (w - _EPS,))
+            while pos < len(open_trucks):
+                room = remaining_area[open_trucks[pos][1]]
+                if room < min_a - _EPS:
+                    del open_trucks[pos]
+                elif room < a - _EPS:
+                    pos += 1
+                else:
+                    break
+            if pos == len(open_trucks):
+                truck = len(remaining_area)
+                left, room = max_lbs, DECK_AREA_SQIN
+                remaining_area.append(room)
+            else:
+                left, truck = open_trucks.pop(pos)
+                room = remaining_area[truck]
+            k = c
+            if w > 0:
+                k = min(k, int((left + _EPS) // w))
+            if a > 0:
+                k = min(k, int((room + _EPS) // a))
+            k = max(k, 1)  # an oversize piece still gets a truck of its own
+            placed_truck.append(truck)
+            placed_count.append(k)
+            c -= k
+            left -= k * w
+            remaining_area[truck] = room - k * a
+            # Loads only get lighter, so a truck that can't fit the lightest one is closed
+            if left >= lightest - _EPS:
+                bisect.insort(open_trucks, (left, truck))
+    assign = np.repeat(np.asarray(placed_truck, dtype=np.int64), placed_count)
+    return assign, len(remaining_area)
+
+
+def plan_restock(bunks, reorder_below=REORDER_BELOW, truck_max_lbs=TRUCK_MAX_LBS, max_trucks=None):
+    """
+    Build a restock order and flatbed loading plan.
+
+    Args:
+        bunks: List of bunk objects, or an object of equal-length columns.
+            Flagged bunks are always restocked; others when below ``reorder_below``.
+            A bunk with an explicit ``toOrder`` is ordered in exactly that quantity.
+        reorder_below: Fill fraction under which a bunk is restocked to capacity.
+        truck_max_lbs: Payload limit per flatbed.
+        max_trucks: List only this many trucks in ``trucks``; ``totals`` still covers all.
+
+    Returns:
+        Dict with order ``items`` (generate-pdf shape), per-truck ``trucks`` and ``totals``.
+    """
+    if not 0 < truck_max_lbs <= MAX_NUMBER:
+        raise PlanError('truck_max_lbs must be a positive number')
+    n, ids, labels, cols = _columns(bunks)
+    capacity, current = cols['capacity'], cols['current']
+    unit_weight, unit_price = cols['unitWeight'], cols['unitPrice']
+
+    # ── order quantities ──
+    pct = np.divide(current, capacity, out=np.ones(n), where=capacity > 0)
+    needs = (capacity > 0) & (cols['flagged'] | (pct < reorder_below))
+    qty = np.where(needs, np.floor(np.maximum(capacity - current, 0)), 0)
+    explicit = cols['toOrder'] >= 0
+    qty = np.where(explicit, np.floor(cols['toOrder']), qty).astype(np.int64)
+    order_idx = np.flatnonzero(qty)
+
+    if (unit_weight[order_idx] > truck_max_lbs).any():
+        raise PlanError('a single piece is heavier than a truck can carry')
+
+    # ── split each order into truck-sized loads ──
+    piece_area = cols['w'] * cols['h'] * cols['l'] / STACK_HEIGHT_IN
+    with np.errstate(divide='ignore'):
+        by_weight = np.floor(np.where(unit_weight > 0, truck_max_lbs / unit_weight, np.inf))
+        by_area = np.floor(np.where(piece_area > 0, DECK_AREA_SQIN / piece_area, np.inf))
+    # No order line exceeds MAX_PIECES, so that is also "the whole line fits"
+    per_truck = np.clip(np.minimum(by_weight, by_area), 1, MAX_PIECES).astype(np.int64)
+
+    # A full load either fills over half a truck or holds a whole order line,
+    # so bounding the lower bound on trucks also bounds the loads built below
+    line_w = qty * unit_weight
+    total_w = float(line_w.sum())
+    total_a = float((qty * piece_area).sum())
+    min_trucks = int(np.ceil(max(total_w / truck_max_lbs, total_a / DECK_AREA_SQIN) - _EPS)) if len(order_idx) else 0
+    if min_trucks > MAX_TRUCKS:
+        raise PlanError(f'order needs at least {min_trucks:,} trucks (max {MAX_TRUCKS:,})')
+
+    oq, opt = qty[order_idx], per_truck[order_idx]
+    full, rest = oq // opt, oq % opt
+    load_src = np.concatenate([np.repeat(order_idx, full), order_idx[rest > 0]])
+    load_pcs = np.concatenate([np.repeat(opt, full), rest[rest > 0]])
+    load_w = load_pcs * unit_weight[load_src]
+    load_a = load_pcs * piece_area[load_src]
+
+    # ── pack heaviest first ──
+    order = np.lexsort((-load_a, -load_w))
+    load_src, load_pcs, load_w, load_a = load_src[order], load_pcs[order], load_w[order], load_a[order]
+    truck_of, n_trucks = _best_fit_decreasing(load_w, load_a, truck_max_lbs)
+
+    truck_w = np.bincount(truck_of, weights=load_w, minlength=n_trucks)
+    truck_a = np.bincount(truck_of, weights=load_a, minlength=n_trucks)
+    truck_pcs = np.bincount(truck_of, weights=load_pcs, minlength=n_trucks)
+
+    by_truck = np.argsort(truck_of, kind='stable')
+    bounds = np.cumsum(np.bincount(truck_of, minlength=n_trucks))[:-1] if n_trucks else []
+    src_l, pcs_l, w_l = load_src.tolist(), load_pcs.tolist(), np.round(load_w, 2).tolist()
+    names, categories = labels['name'], labels['category']
+    trucks = []
+    shown = n_trucks if max_trucks is None else min(n_trucks, max_trucks)
+    for t, members in enumerate(np.split(by_truck, bounds)[:shown] if n_trucks else []):
+        trucks.append({
+            'truck': t + 1,
+            'weight': round(float(truck_w[t]), 2),
+            'pieces': int(truck_pcs[t]),
+            'utilization': round(float(truck_w[t]) / truck_max_lbs, 4),
+            'deckUtilization': round(float(truck_a[t]) / DECK_AREA_SQIN, 4),
+            'loads': [{
+                'id': ids[src_l[m]],
+                'name': names[src_l[m]],
+                'category': categories[src_l[m]],
+                'pieces': pcs_l[m],
+                'weight': w_l[m],
+            } for m in members.tolist()],
+        })
+
+    # ── order lines ──
+    line_cost = qty * unit_price
+    items = [{
+        'id': ids[i],
+        'name': names[i],
+        'category': categories[i],
+        'current': cur,
+        'capacity': cap,
+        'toOrder': q,
+        'unitPrice': up,
+        'unitWeight': uw,
+        'totalWeight': lw,
+        'totalCost': lc,
+    } for i, cur, cap, q, up, uw, lw, lc in zip(
+        order_idx.tolist(),
+        current[order_idx].astype(np.int64).tolist(),
+        capacity[order_idx].astype(np.int64).tolist(),
+        qty[order_idx].tolist(),
+        unit_price[order_idx].tolist(),
+        unit_weight[order_idx].tolist(),
+        np.round(line_w[order_idx], 2).tolist(),
+        np.round(line_cost[order_idx], 2).tolist(),
+    )]
+
+    return {
+        'truckMaxLbs': truck_max_lbs,
+        'items': items,
+        'trucks': trucks,
+        'totals': {
+            'bunks': len(items),
+            'pieces': int(qty.sum()),
+            'weight': round(total_w, 2),
+            'cost': round(float(line_cost.sum()), 2),
+            'trucks': n_trucks,
+            # Lower bound on trucks for this load (weight or deck area)
+            'minTrucks': min_trucks,
+        },
+    }
@@ -0,0 +1,103 @@
+"""
+Production entry point — pre-fork, threaded gunicorn server for server.app.
+
+    python -m server.production
+
+Configuration (environment):
+    PORT               bind port (default 5000)
+    WEB_CONCURRENCY    worker processes (default 2)
+    GUNICORN_THREADS   threads per worker (default 4)
+    GUNICORN_TIMEOUT   worker timeout in seconds (default 60)
+
+Before the app is imported this sets PROMETHEUS_MULTIPROC_DIR so every worker
+writes its metrics to shared files that /metrics aggregates, and SHARED_STATE_DB
+so rate limits and visitor sessions are shared across workers.
+
+Deploying new code: the app is preloaded in the master, so ``kill -HUP`` only
+restarts workers on the code the master already imported. Upgrade the binary
+instead, which re-executes the master and keeps the listening socket:
+
+    kill -USR2 <old master pid>     # new master + workers start on the new code
+    kill -WINCH <old master pid>    # old workers finish in-flight requests and exit
+    kill -TERM <old master pid>     # once the new generation is healthy
+
+(``kill -QUIT`` on the new master instead rolls back while the old one is
+still running.) The re-executed master keeps the metrics directory, which the
+old generation is still writing to.
+"""
+import os
+import shutil
+
+from gunicorn.app.base import BaseApplication
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _prepare_environment():
+    """Point prometheus and shared state at per-deployment storage."""
+    data_dir = os.environ.get('CHAT_DB_DIR', ROOT_DIR)
+    metrics_dir = os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR', os.path.join(data_dir, 'prometheus_multiproc')
+    )
+    # Stale files from a previous run would be summed into the new totals.
+    # GUNICORN_FD marks a USR2 re-exec, whose old workers are still running.
+    if 'GUNICORN_FD' not in os.environ:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ.setdefault('SHARED_STATE_DB', os.path.join(data_dir, 'shared_state.db'))
+
+
+def _child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def build_options():
+    """Gunicorn settings derived from the environment."""
+    return {
+        'bind': f"0.0.0.0:{int(os.environ.get('PORT', 5000))}",
+        'workers': int(os.environ.get('WEB_CONCURRENCY', 2)),
+        'threads': int(os.environ.get('GUNICORN_THREADS', 4)),
+        'worker_class': 'gthread',
+        'timeout': int(os.environ.get('GUNICORN_TIMEOUT', 60)),
+        'graceful_timeout': 30,
+        'keepalive': 5,
+        # Import once in the master: startup counters are restored a single time,
+        # and static assets are hashed and gzipped once, then shared
+        # copy-on-write. Brotli bodies are still built lazily in each worker.
+        # Reload new code with USR2, not HUP (see the module docstring).
+        'preload_app': True,
+        'child_exit': _child_exit,
+        # The structured JSON log (ACCESS_LOG_PATH) replaces gunicorn's own
+        # line, otherwise every request would be logged twice.
+        'accesslog': None if os.environ.get('ACCESS_LOG_PATH') else '-',
+    }
+
+
+class ProductionServer(BaseApplication):
+    """Run server.app under gunicorn without a separate config file."""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from server.app import app
+        return app
+
+
+def main():
+    _prepare_environment()
+    options = build_options()
+    print('\n🚀  MitchellSoftware — Production Server')
+    print(f"   {options['bind']}  ·  {options['workers']} workers × {options['threads']} threads\n")
+    ProductionServer(options).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Request profiling — opt-in stack sampling of slow or randomly chosen requests.
+
+A request is profiled when it is picked at ``PROFILE_SAMPLE_RATE``, or, when
+``PROFILE_SLOW_MS`` is set, always, with the profile kept only if the request
+turns out slower than the threshold. While a request is profiled, one
+background thread snapshots its stack every ``PROFILE_INTERVAL_MS``
+(``sys._current_frames``); the request thread itself does no extra work. The
+last ``PROFILE_BUFFER`` profiles are kept in memory per worker and exported as
+collapsed stacks (flamegraph.pl, speedscope, ...) or speedscope JSON.
+
+Both settings default to 0, which turns profiling off entirely.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as Tally, deque
+
+from prometheus_client import Counter
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_BUFFER = int(os.environ.get('PROFILE_BUFFER', 50))
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+PROFILES_CAPTURED = Counter(
+    'request_profiles_captured_total',
+    'Request profiles kept, by why the request was profiled (sampled, slow)',
+    ['reason']
+)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Active:
+    """A request being sampled."""
+
+    __slots__ = ('ident', 'started', 'wall_started', 'sampled', 'meta', 'stacks')
+
+    def __init__(self, sampled, meta):
+        self.ident = threading.get_ident()
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.sampled = sampled
+        self.meta = meta
+        self.stacks = Tally()
+
+
+class RequestProfiler:
+    """Samples the stacks of in-flight requests and keeps the last N profiles."""
+
+    def __init__(self, sample_rate=PROFILE_SAMPLE_RATE, slow_ms=PROFILE_SLOW_MS,
+                 interval_ms=PROFILE_INTERVAL_MS, capacity=PROFILE_BUFFER, exclude=()):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.exclude = frozenset(exclude)
+        self._profiles = deque(maxlen=capacity)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._sampler_pid = None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.slow_ms > 0
+
+    def start(self, endpoint, **meta):
+        """Begin sampling the current thread if this request should be profiled."""
+        if not self.enabled or endpoint in self.exclude:
+            return None
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and not self.slow_ms:
+            return None
+        active = _Active(sampled, dict(meta, endpoint=endpoint))
+        with self._lock:
+            self._active[active.ident] = active
+        self._ensure_sampler()
+        return active
+
+    def finish(self, active, status):
+        """Stop sampling; keep and return the profile if it was sampled or slow."""
+        with self._lock:
+            if self._active.get(active.ident) is not active:
+                return None      # already finished
+            del self._active[active.ident]
+            stacks = dict(active.stacks)
+        duration_ms = (time.perf_counter() - active.started) * 1000
+        if active.sampled:
+            reason = 'sampled'
+        elif self.slow_ms and duration_ms >= self.slow_ms:
+            reason = 'slow'
+        else:
+            return None
+        profile = dict(
+            active.meta,
+            id=next(self._ids),
+            status=status,
+            reason=reason,
+            started=active.wall_started,
+            duration_ms=round(duration_ms, 2),
+            interval_ms=self.interval * 1000,
+            samples=sum(stacks.values()),
+            stacks={tuple(_frame_name(code) for code in stack): n for stack, n in stacks.items()},
+        )
+        with self._lock:
+            self._profiles.append(profile)
+        PROFILES_CAPTURED.labels(reason=reason).inc()
+        return profile
+
+    def profiles(self):
+        """Kept profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self._profiles if p['id'] == profile_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    # ─── Sampler ──────────────────────────────────────────────
+
+    def _ensure_sampler(self):
+        # One sampler per process; a forked worker starts its own
+        if self._sampler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sampler_pid == os.getpid():
+                return
+            self._sampler_pid = os.getpid()
+        threading.Thread(target=self._sample_forever, name='request-profiler', daemon=True).start()
+
+    def _sample_forever(self):
+        while True:
+            time.sleep(self.interval)
+            if self._active:
+                self.sample()
+
+    def sample(self):
+        """Record one stack sample for every request being profiled."""
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, active in self._active.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if stack:
+                    stack.reverse()      # root first
+                    active.stacks[tuple(stack)] += 1
+
+
+def _frame_name(code):
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+# ─── Export ───────────────────────────────────────────────────
+
+def to_collapsed(profiles):
+    """Brendan Gregg's collapsed-stack format: ``root;child;leaf count`` per line."""
+    total = Tally()
+    for profile in profiles:
+        for stack, n in profile['stacks'].items():
+            total[';'.join(name.replace(';', ':') for name in stack)] += n
+    return ''.join(f'{stack} {n}\n' for stack, n in sorted(total.items()))
+
+
+def to_speedscope(profiles):
+    """A speedscope file with one sampled profile per request."""
+    frames, index = [], {}
+    out = []
+    for profile in profiles:
+        samples, weights = [], []
+        for stack, n in profile['stacks'].items():
+            ids = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    func, _, location = name.partition(' (')
+                    file, _, line = location.rstrip(')').rpartition(':')
+                    frames.append({'name': func, 'file': file, 'line': int(line)})
+                ids.append(index[name])
+            samples.append(ids)
+            weights.append(n * profile['interval_ms'])
+        out.append({
+            'type': 'sampled',
+            'name': f"#{profile['id']} {profile.get('path', profile['endpoint'])} "
+                    f"{profile['duration_ms']:.0f} ms ({profile['reason']})",
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        })
+    return {
+        '$schema': SPEEDSCOPE_SCHEMA,
+        'name': 'MitchellSoftware request profiles',
+        'exporter': 'server.profiling',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': out,
+    }
+
+
+def summary(profile):
+    """A profile without its stacks, for listings."""
+    return {k: v for k, v in profile.items() if k != 'stacks'}
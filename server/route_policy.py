@@ -0,0 +1,87 @@
+"""
+Route classification — decides once per endpoint how much per-request tracking to do.
+
+Every endpoint falls into a class (page, api, static, probe, unknown). The class
+decides whether the request counts as a visitor and what fraction of requests
+record REQUEST_COUNT/REQUEST_LATENCY. Sample rates can be tuned per class with
+``METRICS_SAMPLE_RATE_<CLASS>`` (e.g. ``METRICS_SAMPLE_RATE_STATIC=0.05``); a rate
+of 0 skips metrics for the class entirely.
+"""
+import os
+import random
+
+# Endpoints not listed here are treated as API routes
+ENDPOINT_CLASSES = {
+    'index': 'page',
+    'demo': 'page',
+    'static': 'static',
+    'health': 'probe',
+    'metrics': 'probe',
+}
+
+# class: (counts as a visitor, default metrics sample rate)
+CLASS_DEFAULTS = {
+    'page': (True, 1.0),
+    'api': (True, 1.0),
+    'static': (False, 0.1),
+    'probe': (False, 1.0),
+    'unknown': (False, 1.0),
+}
+
+
+class RoutePolicy:
+    """Tracking decision for one endpoint class."""
+
+    __slots__ = ('name', 'track_visitor', 'sample_rate', 'weight')
+
+    def __init__(self, name, track_visitor, sample_rate):
+        self.name = name
+        self.track_visitor = track_visitor
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        # Sampled requests count for 1/rate so REQUEST_COUNT stays an unbiased total
+        self.weight = 1.0 / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def mode(self):
+        if self.sample_rate >= 1.0:
+            return 'track'
+        return 'sample' if self.sample_rate > 0 else 'skip'
+
+    def sampled(self):
+        """Return True if this request should record request metrics."""
+        rate = self.sample_rate
+        return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+def _rate_from_env(name, default):
+    raw = os.environ.get(f'METRICS_SAMPLE_RATE_{name.upper()}')
+    if raw is None:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        print(f'Warning: ignoring invalid METRICS_SAMPLE_RATE_{name.upper()}={raw!r}')
+        return default
+
+
+class RouteClassifier:
+    """Maps Flask endpoints to cached RoutePolicy objects."""
+
+    def __init__(self, sample_rates=None):
+        sample_rates = sample_rates or {}
+        self._policies = {
+            name: RoutePolicy(name, visitor, sample_rates.get(name, _rate_from_env(name, rate)))
+            for name, (visitor, rate) in CLASS_DEFAULTS.items()
+        }
+        self._by_endpoint = {}
+
+    def policy(self, endpoint):
+        """Return the policy for an endpoint, classifying it on first sight."""
+        policy = self._by_endpoint.get(endpoint)
+        if policy is None:
+            if endpoint is None:
+                name = 'unknown'
+            else:
+                name = ENDPOINT_CLASSES.get(endpoint, 'api')
+            policy = self._by_endpoint[endpoint] = self._policies[name]
+        return policy
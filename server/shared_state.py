@@ -0,0 +1,163 @@
+"""
+Shared request state — visitor sessions and chat rate-limit windows.
+
+With a single process (dev server, tests) state lives in a plain dict. When the
+production launcher runs several workers it sets ``SHARED_STATE_DB`` and every
+worker reads and writes the same SQLite-backed store instead, so rate limits and
+active-session counts agree no matter which worker serves a request.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+
+class LocalState(dict):
+    """Process-local state. A dict, plus the atomic helpers the app relies on."""
+
+    def touch(self, key, now):
+        """Record ``now`` as the latest timestamp for ``key``."""
+        self[key] = now
+
+    def prune(self, cutoff):
+        """Drop entries whose timestamp is older than ``cutoff``; return the size left."""
+        for k in [k for k, v in self.items() if v < cutoff]:
+            del self[k]
+        return len(self)
+
+    def hit_window(self, key, now, window, limit):
+        """Record a hit in a sliding window; return False if ``limit`` is exceeded."""
+        hits = [t for t in self.get(key, ()) if t > now - window]
+        allowed = len(hits) < limit
+        if allowed:
+            hits.append(now)
+        self[key] = hits
+        return allowed
+
+
+class SqliteState(MutableMapping):
+    """Cross-process state in one SQLite table, namespaced per use."""
+
+    def __init__(self, path, namespace):
+        self.path = path
+        self.namespace = namespace
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS shared_state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            ''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_shared_state_updated ON shared_state (namespace, updated)'
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _put(self, conn, key, value, updated):
+        conn.execute(
+            'INSERT OR REPLACE INTO shared_state (namespace, key, value, updated) VALUES (?, ?, ?, ?)',
+            (self.namespace, key, json.dumps(value), updated)
+        )
+
+    # ── MutableMapping ──
+
+    def __getitem__(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM shared_state WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        updated = max(value) if isinstance(value, list) and value else value
+        if not isinstance(updated, (int, float)):
+            updated = 0
+        self._put(self._conn(), key, value, updated)
+
+    def __delitem__(self, key):
+        cur = self._conn().execute(
+            'DELETE FROM shared_state WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        )
+        if not cur.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self):
+        rows = self._conn().execute(
+            'SELECT key FROM shared_state WHERE namespace = ?', (self.namespace,)
+        ).fetchall()
+        return iter([r[0] for r in rows])
+
+    def __len__(self):
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM shared_state WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+
+    def clear(self):
+        self._conn().execute('DELETE FROM shared_state WHERE namespace = ?', (self.namespace,))
+
+    # ── atomic helpers ──
+
+    def touch(self, key, now):
+        self._put(self._conn(), key, now, now)
+
+    def prune(self, cutoff):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'DELETE FROM shared_state WHERE namespace = ? AND updated < ?',
+                (self.namespace, cutoff)
+            )
+            remaining = conn.execute(
+                'SELECT COUNT(*) FROM shared_state WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return remaining
+
+    def hit_window(self, key, now, window, limit):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value FROM shared_state WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+            hits = [t for t in (json.loads(row[0]) if row else ()) if t > now - window]
+            allowed = len(hits) < limit
+            if allowed:
+                hits.append(now)
+            self._put(conn, key, hits, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed
+
+
+def make_state(namespace):
+    """Return the shared store when SHARED_STATE_DB is set, else a LocalState."""
+    path = os.environ.get('SHARED_STATE_DB')
+    if path:
+        return SqliteState(path, namespace)
+    return LocalState()
@@ -0,0 +1,75 @@
+"""
+Startup profile — how long a cold ``import server.app`` takes, and where it goes.
+
+    python -m server.startup_profile [--runs 5] [--top 15] [--target-ms 400]
+
+Each run imports the app in a fresh interpreter and times the import; one
+extra run under ``-X importtime`` gives the per-module breakdown. Prints the
+slowest modules and the median wall time, then exits non-zero if the median is
+over the target or a module meant to load lazily was imported, so it can gate CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import of server.app, measured on the dev container (median of 5 runs)
+STARTUP_TARGET_MS = 400
+
+# Modules that must not load at startup; they are imported on first use
+LAZY_MODULES = ('reportlab', 'numpy', 'openai', 'psutil')
+
+_PROBE = (
+    'import sys, time\n'
+    't = time.perf_counter()\n'
+    'import server.app\n'
+    'print(round((time.perf_counter() - t) * 1000, 1))\n'
+    'print(",".join(m for m in {lazy!r} if m in sys.modules))\n'
+)
+
+
+def profile_once(importtime=False):
+    """Import server.app in a fresh interpreter; return (ms, eager lazy modules, rows)."""
+    flags = ['-X', 'importtime'] if importtime else []
+    proc = subprocess.run(
+        [sys.executable, *flags, '-c', _PROBE.format(lazy=LAZY_MODULES)],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    ms_line, eager_line = proc.stdout.splitlines()[-2:]
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return float(ms_line), [m for m in eager_line.split(',') if m], rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--target-ms', type=float, default=STARTUP_TARGET_MS)
+    args = parser.parse_args(argv)
+
+    timings = [profile_once()[0] for _ in range(args.runs)]
+    median = statistics.median(timings)
+    _, eager, rows = profile_once(importtime=True)
+
+    print(f'{"self ms":>8} {"cumul ms":>9}  module')
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f'{self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}  {name}')
+    print()
+    print(f'import server.app: median {median:.0f} ms over {args.runs} runs '
+          f'(min {min(timings):.0f}, max {max(timings):.0f}); target {args.target_ms:.0f} ms')
+    if eager:
+        print(f'loaded at startup but meant to be lazy: {", ".join(eager)}')
+    return 0 if median <= args.target_ms and not eager else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Static asset pipeline — precompressed, fingerprinted serving for client/.
+
+At startup every file under the client directory is hashed; text assets are
+kept in memory alongside a gzip encoding. Brotli at quality 11 is slow enough to
+dominate cold start, so each file's brotli body is compressed on first request. HTML pages are rewritten so
+their stylesheet/script/icon references point at content-hashed URLs
+(``styles.<hash>.css``), which are served with immutable cache headers. Plain
+URLs keep working and revalidate cheaply through content-hash ETags. Binary
+files (resume.pdf, images) stay on disk and go through ``server.file_sender``.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import Response, request
+
+from server.file_sender import send_large_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip still covers every browser
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.txt', '.xml'}
+MIN_COMPRESS_BYTES = 512
+MAX_CACHED_BYTES = 2 * 1024 * 1024
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+_REF_PATTERN = re.compile(r'(?P<attr>\b(?:src|href)=)"(?P<url>[^"#?:]+)(?:\?[^"#]*)?"')
+
+
+class Asset:
+    """One file from the client directory, with its precomputed encodings."""
+
+    __slots__ = ('path', 'full_path', 'mimetype', 'digest', 'bodies')
+
+    def __init__(self, path, full_path, mimetype, digest, bodies):
+        self.path = path
+        self.full_path = full_path
+        self.mimetype = mimetype
+        self.digest = digest
+        self.bodies = bodies  # { encoding: bytes or None (not compressed yet) }, empty for uncached files
+
+    @property
+    def fingerprinted_path(self):
+        stem, ext = posixpath.splitext(self.path)
+        return f'{stem}.{self.digest}{ext}'
+
+    def encoded(self, encoding):
+        """Body for an encoding, compressing brotli on first use; None if it didn't pay off."""
+        body = self.bodies.get(encoding)
+        if body is None and encoding == 'br':
+            identity = self.bodies['identity']
+            body = brotli.compress(identity, quality=11)
+            if len(body) >= len(identity):
+                self.bodies.pop('br', None)
+                return None
+            self.bodies['br'] = body
+        return body
+
+    def etag(self, encoding):
+        return self.digest if encoding == 'identity' else f'{self.digest}-{encoding}'
+
+
+class AssetCache:
+    """In-memory index of the client directory, built once at startup."""
+
+    def __init__(self, root, watch=False):
+        self.root = root
+        self.watch = watch  # dev mode: rebuild when files change on disk
+        self._assets = {}
+        self._fingerprints = {}
+        self._signature = None
+        self.build()
+
+    def build(self):
+        """Hash, compress and index every file, then rewrite HTML references."""
+        assets = {}
+        for path, full_path in self._walk():
+            with open(full_path, 'rb') as f:
+                data = f.read()
+            assets[path] = self._make_asset(path, full_path, data)
+
+        for asset in list(assets.values()):
+            if asset.path.endswith('.html') and asset.bodies:
+                html = self._rewrite_html(asset, assets)
+                assets[asset.path] = self._make_asset(asset.path, asset.full_path, html)
+
+        self._assets = assets
+        self._fingerprints = {a.fingerprinted_path: a for a in assets.values()}
+        self._signature = self._disk_signature()
+
+    def lookup(self, path):
+        """Resolve a request path to (asset, is_fingerprinted), or (None, False)."""
+        self._maybe_reload()
+        asset = self._assets.get(path)
+        if asset is not None:
+            return asset, False
+        asset = self._fingerprints.get(path)
+        if asset is not None:
+            return asset, True
+        return None, False
+
+    def serve(self, path):
+        """Build the response for a client-relative path, or None if unknown."""
+        asset, fingerprinted = self.lookup(path)
+        if asset is None:
+            return None
+        cache_control = IMMUTABLE_CACHE if fingerprinted else REVALIDATE_CACHE
+
+        if not asset.bodies:
+            return send_large_file(asset.full_path, asset.mimetype, asset.digest, cache_control)
+
+        encoding = self._negotiate(asset)
+        body = asset.encoded(encoding)
+        if body is None:
+            encoding = self._negotiate(asset)
+            body = asset.encoded(encoding)
+        etag = asset.etag(encoding)
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(body, content_type=asset.mimetype)
+            if encoding != 'identity':
+                resp.headers['Content-Encoding'] = encoding
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = cache_control
+        if len(asset.bodies) > 1:
+            resp.vary.add('Accept-Encoding')
+        return resp
+
+    # ── internals ──
+
+    def _walk(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in sorted(filenames):
+                if name.startswith('.'):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                rel = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                yield rel, full_path
+
+    def _disk_signature(self):
+        return tuple(
+            (path, os.stat(full_path).st_mtime_ns) for path, full_path in self._walk()
+        )
+
+    def _maybe_reload(self):
+        if self.watch and self._disk_signature() != self._signature:
+            self.build()
+
+    def _make_asset(self, path, full_path, data):
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if mimetype.startswith('text/') or mimetype in ('application/javascript', 'image/svg+xml'):
+            mimetype += '; charset=utf-8'
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        ext = posixpath.splitext(path)[1].lower()
+
+        bodies = {}
+        if ext in COMPRESSIBLE_EXTENSIONS and len(data) <= MAX_CACHED_BYTES:
+            bodies['identity'] = data
+            if len(data) >= MIN_COMPRESS_BYTES:
+                gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+                # Drop encodings that don't actually save bytes
+                if len(gzipped) < len(data):
+                    bodies['gzip'] = gzipped
+                if brotli is not None:
+                    bodies['br'] = None
+        return Asset(path, full_path, mimetype, digest, bodies)
+
+    def _rewrite_html(self, page, assets):
+        base = posixpath.dirname(page.path)
+        text = page.bodies['identity'].decode('utf-8')
+
+        def replace(match):
+            url = match.group('url')
+            if url.startswith('/'):
+                target = posixpath.normpath(url.lstrip('/'))
+            else:
+                target = posixpath.normpath(posixpath.join(base, url))
+            asset = assets.get(target)
+            if asset is None or target.endswith('.html'):
+                return match.group(0)
+            return f'{match.group("attr")}"/{asset.fingerprinted_path}"'
+
+        return _REF_PATTERN.sub(replace, text).encode('utf-8')
+
+    @staticmethod
+    def _negotiate(asset):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.bodies and accepted[encoding]:
+                return encoding
+        return 'identity'
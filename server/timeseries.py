@@ -0,0 +1,244 @@
+"""
+Time-series analytics — event counts per minute, rolled up to hours and days.
+
+``record()`` only adds to an in-memory tally; a background thread flushes the
+tally every few seconds as one upsert batch into per-minute buckets. A
+periodic compaction rolls complete hours of minute buckets into hourly ones
+and complete days into daily ones, then drops buckets past their resolution's
+retention (minutes after 2 days, hours after 90 days). A watermark per level
+records how far the rollup has got, so compaction is idempotent and safe to
+run from every worker.
+
+Each level is a WITHOUT ROWID table clustered on (series, bucket): a query
+reads the coarse level up to its watermark and the finer levels only for the
+short, not yet rolled up tail, so reading a week or a year costs a few hundred
+rows however much history has accumulated.
+"""
+import sqlite3
+import threading
+import time
+
+from prometheus_client import Counter
+
+# level → bucket width in seconds, finest first
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+LEVELS = tuple(RESOLUTIONS)
+RETENTION = {'minute': 2 * 86400, 'hour': 90 * 86400, 'day': 5 * 365 * 86400}
+DEFAULT_WINDOW = {'minute': 2 * 3600, 'hour': 7 * 86400, 'day': 90 * 86400}
+MAX_POINTS = 2000
+MAX_TIMESTAMP = 253402300799  # 9999-12-31T23:59:59Z
+FLUSH_INTERVAL = 5          # seconds between writes of the in-memory tally
+COMPACT_INTERVAL = 300
+ROLLUP_GRACE = 300          # a bucket is rolled up this long after it closes, once late flushes are in
+
+TIMESERIES_WRITE_ERRORS = Counter(
+    'timeseries_write_errors_total',
+    'Time-series points that could not be written to SQLite'
+)
+
+
+class TimeSeriesError(ValueError):
+    """Raised for an invalid time-series query."""
+
+
+class TimeSeriesStore:
+    """Batched, rolled-up event counts in SQLite."""
+
+    def __init__(self, db_path, series, flush_interval=FLUSH_INTERVAL,
+                 compact_interval=COMPACT_INTERVAL, retention=None, clock=time.time):
+        # db_path is a callable so tests can repoint the database at runtime
+        self._db_path = db_path
+        self.series = tuple(series)
+        self._flush_interval = flush_interval
+        self._compact_interval = compact_interval
+        self._retention = dict(RETENTION, **(retention or {}))
+        self._clock = clock
+        self._pending = {}      # { (series, minute bucket): count }
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._ready = set()
+        self._last_compact = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, series, n=1, at=None):
+        """Count ``n`` events for a series now (or at epoch second ``at``)."""
+        bucket = int(self._clock() if at is None else at) // 60 * 60
+        key = (series, bucket)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + n
+        if self._thread is None:
+            self._ensure_started()
+
+    def flush(self):
+        """Write the pending tally in one transaction; compact if one is due."""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if pending:
+                try:
+                    conn = self._connect()
+                    try:
+                        conn.execute('BEGIN IMMEDIATE')
+                        # A late point whose minute was already rolled up goes
+                        # straight into the level that now holds that time
+                        marks = [(level, _watermark(conn, level)) for level in reversed(LEVELS[1:])]
+                        batches = {level: [] for level in LEVELS}
+                        for (series, bucket), n in pending.items():
+                            level = next((lv for lv, mark in marks if bucket < mark), 'minute')
+                            batches[level].append((series, bucket - bucket % RESOLUTIONS[level], n))
+                        for level, batch in batches.items():
+                            if batch:
+                                conn.executemany(
+                                    f'INSERT INTO ts_{level} (series, bucket, value) VALUES (?, ?, ?) '
+                                    f'ON CONFLICT (series, bucket) DO UPDATE SET value = value + excluded.value',
+                                    batch
+                                )
+                        conn.execute('COMMIT')
+                    finally:
+                        conn.close()
+                except sqlite3.Error as e:
+                    TIMESERIES_WRITE_ERRORS.inc(len(pending))
+                    print(f'Warning: dropped {len(pending)} time-series points: {e}')
+        if time.monotonic() - self._last_compact >= self._compact_interval:
+            self.compact()
+
+    def compact(self, now=None):
+        """Roll complete buckets up a level and apply retention."""
+        now = int(self._clock() if now is None else now)
+        self._last_compact = time.monotonic()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for lower, upper in zip(LEVELS, LEVELS[1:]):
+                    step = RESOLUTIONS[upper]
+                    done = _watermark(conn, upper)
+                    until = (now - ROLLUP_GRACE) // step * step
+                    if until <= done:
+                        continue
+                    conn.execute(
+                        f'INSERT INTO ts_{upper} (series, bucket, value) '
+                        f'SELECT series, bucket - bucket % {step}, SUM(value) FROM ts_{lower} '
+                        f'WHERE bucket >= ? AND bucket < ? GROUP BY series, bucket - bucket % {step} '
+                        f'ON CONFLICT (series, bucket) DO UPDATE SET value = value + excluded.value',
+                        (done, until)
+                    )
+                    conn.execute('INSERT OR REPLACE INTO ts_rollups (level, rolled_until) VALUES (?, ?)',
+                                 (upper, until))
+                # A level's buckets are only dropped once they are rolled up
+                for level, upper in zip(LEVELS, LEVELS[1:] + (None,)):
+                    cutoff = now - self._retention[level]
+                    if upper is not None:
+                        cutoff = min(cutoff, _watermark(conn, upper))
+                    conn.execute(f'DELETE FROM ts_{level} WHERE bucket < ?', (cutoff,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def query(self, series, resolution='hour', since=None, until=None):
+        """
+        Event counts per bucket, zero-filled.
+
+        Returns:
+            (since, until, {series: [[bucket start, count], ...]}) with bounds
+            aligned to the resolution; ``until`` defaults to the end of the
+            current bucket.
+        """
+        if resolution not in RESOLUTIONS:
+            raise TimeSeriesError(f'resolution must be one of {", ".join(LEVELS)}')
+        unknown = [s for s in series if s not in self.series]
+        if unknown or not series:
+            raise TimeSeriesError(f'unknown series {", ".join(unknown)}' if unknown else 'no series given')
+        for name, value in (('since', since), ('until', until)):
+            # Out-of-range ints would overflow SQLite's INTEGER
+            if value is not None and not 0 <= value <= MAX_TIMESTAMP:
+                raise TimeSeriesError(f'{name} must be epoch seconds between 0 and {MAX_TIMESTAMP}')
+        step = RESOLUTIONS[resolution]
+        if until is None:
+            until = int(self._clock()) // step * step + step
+        until = -(-int(until) // step) * step
+        since = until - DEFAULT_WINDOW[resolution] if since is None else int(since) // step * step
+        if since >= until:
+            raise TimeSeriesError('since must be before until')
+        if (until - since) // step > MAX_POINTS:
+            raise TimeSeriesError(f'too many points (max {MAX_POINTS:,}); use a coarser resolution')
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            marks = {level: _watermark(conn, level) for level in LEVELS[1:]}
+            out = {}
+            for name in series:
+                counts = {}
+                # The requested level up to its watermark, then each finer level
+                # for the part not yet rolled up into the one above it
+                k = LEVELS.index(resolution)
+                for j in range(k, -1, -1):
+                    level = LEVELS[j]
+                    lo = since if j == k else max(since, marks[LEVELS[j + 1]])
+                    hi = min(until, marks[level]) if j else until
+                    if lo >= hi:
+                        continue
+                    for bucket, value in conn.execute(
+                            f'SELECT bucket - bucket % {step}, SUM(value) FROM ts_{level} '
+                            f'WHERE series = ? AND bucket >= ? AND bucket < ? GROUP BY 1',
+                            (name, lo, hi)):
+                        counts[bucket] = counts.get(bucket, 0) + value
+                out[name] = [[t, counts.get(t, 0)] for t in range(since, until, step)]
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return since, until, out
+
+    def close(self):
+        """Stop the flusher and write what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.flush()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='timeseries-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f'Warning: time-series compaction failed: {e}')
+
+    def _connect(self):
+        path = self._db_path()
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        if path not in self._ready:
+            with self._lock:
+                for level in LEVELS:
+                    conn.execute(f'''
+                        CREATE TABLE IF NOT EXISTS ts_{level} (
+                            series TEXT NOT NULL,
+                            bucket INTEGER NOT NULL,
+                            value INTEGER NOT NULL,
+                            PRIMARY KEY (series, bucket)
+                        ) WITHOUT ROWID
+                    ''')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS ts_rollups (
+                        level TEXT PRIMARY KEY,
+                        rolled_until INTEGER NOT NULL
+                    )
+                ''')
+                self._ready.add(path)
+        return conn
+
+
+def _watermark(conn, level):
+    """Buckets of the level below ``level`` older than this are rolled into it."""
+    row = conn.execute('SELECT rolled_until FROM ts_rollups WHERE level = ?', (level,)).fetchone()
+    return row[0] if row else 0
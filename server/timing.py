@@ -0,0 +1,97 @@
+"""
+Phase timing — where a request's time goes, below the REQUEST_LATENCY total.
+
+Code marks named phases with ``span``::
+
+    with span('validate'):
+        data = validate(ORDER_PDF, payload)
+
+A request's spans are collected by the PhaseTimer the app starts for it (held
+in a context variable, so code with no Flask dependency like pdf_report can
+record spans too). When the request ends, each phase's total is observed once
+into PHASE_LATENCY, and with ``SERVER_TIMING=1`` the phases are also sent in a
+``Server-Timing`` header, so browser dev tools show the breakdown. Outside a
+timed request ``span`` only costs a context-variable lookup.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Histogram
+
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+PHASE_LATENCY = Histogram(
+    'request_phase_seconds',
+    'Time spent in named phases of a request',
+    ['endpoint', 'phase'],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+)
+
+_current = ContextVar('phase_timer', default=None)
+
+
+class PhaseTimer:
+    """Phase durations for one request; repeated phases add up."""
+
+    __slots__ = ('endpoint', 'started', 'phases')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def observe(self):
+        for phase, seconds in self.phases.items():
+            PHASE_LATENCY.labels(endpoint=self.endpoint, phase=phase).observe(seconds)
+
+    def server_timing(self):
+        """``Server-Timing`` header value: each phase, then the total, in milliseconds."""
+        parts = [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in self.phases.items()]
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def begin(endpoint):
+    """Start timing phases for the current request or job."""
+    timer = PhaseTimer(endpoint)
+    _current.set(timer)
+    return timer
+
+
+def end():
+    """Stop timing and record the phases; returns the timer, or None if none was running."""
+    timer = _current.get()
+    if timer is None:
+        return None
+    _current.set(None)
+    timer.observe()
+    return timer
+
+
+@contextmanager
+def recording(endpoint):
+    """Time the phases of a block of work outside a request, e.g. a background job."""
+    timer = begin(endpoint)
+    try:
+        yield timer
+    finally:
+        end()
+
+
+@contextmanager
+def span(phase):
+    """Add the time spent in the block to ``phase``."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - start)
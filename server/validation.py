@@ -0,0 +1,231 @@
+"""
+Request validation — schemas compiled once at import into plain closures.
+
+Each schema below is built from small field constructors (``string``,
+``number``, ``array``, ``obj``...) that return a checker function. Checking a
+payload is then just a walk of nested function calls with no per-request
+schema interpretation, so it costs microseconds and runs before any expensive
+work (ReportLab, SQLite, OpenAI). A checker returns a cleaned copy of the
+payload, holding only known keys with defaults filled in, or raises
+ValidationError naming the offending field.
+"""
+import math
+import re
+
+MAX_ORDER_ITEMS = 20000
+MAX_YARD_BUNKS = 5000
+MAX_IMAGE_BYTES = 2 * 1024 * 1024      # decoded size of an uploaded PNG/JPEG
+MAX_JOB_POSTING_CHARS = 20000
+MAX_CHAT_MESSAGE_CHARS = 4000
+MAX_CHAT_TURN = 100000
+MAX_TRACK_BATCH = 100
+MAX_PIECES = 10000                     # pieces in one bunk or order line
+MAX_NUMBER = 1e12
+MAX_DIMENSION = 10000                  # inches, any side of a piece
+
+_DATA_URL = re.compile(r'data:image/(?:png|jpeg);base64,')
+
+
+class ValidationError(ValueError):
+    """Raised when a payload does not match its schema."""
+
+    def __init__(self, reason, message=None):
+        super().__init__(reason)
+        self.reason = reason
+        self._message = message
+        self._path = []
+
+    def _within(self, key):
+        # Paths are only built on the way out of a failed check
+        self._path.append(key)
+
+    @property
+    def field(self):
+        """Dotted path of the offending field, e.g. ``items[3].current``."""
+        field = ''
+        for key in reversed(self._path):
+            field += f'[{key}]' if isinstance(key, int) else (f'.{key}' if field else key)
+        return field or None
+
+    def __str__(self):
+        return self._message or f'{self.field or "body"} {self.reason}'
+
+
+# ─── Field constructors ───────────────────────────────────────
+
+def string(max_len, required=False, default='', strip=False, message=None):
+    """A string of at most ``max_len`` characters; blank counts as missing when stripped."""
+    def check(value):
+        if value.__class__ is not str:
+            raise ValidationError('must be a string')
+        if strip:
+            value = value.strip()
+        if len(value) > max_len:
+            raise ValidationError(f'is too long (max {max_len:,} characters)')
+        if required and not value:
+            raise ValidationError('is required', message=message)
+        return value
+    return _field(check, required, default, message)
+
+
+def number(minimum=0, maximum=MAX_NUMBER, required=False, default=0, integer=False):
+    """A finite JSON number in ``[minimum, maximum]`` (booleans are rejected)."""
+    kinds = (int,) if integer else (int, float)
+    kind = 'an integer' if integer else 'a number'
+
+    def check(value):
+        if value.__class__ not in kinds or not minimum <= value <= maximum:
+            if value.__class__ in kinds and math.isfinite(value):
+                raise ValidationError(f'must be between {minimum:g} and {maximum:g}')
+            raise ValidationError(f'must be {kind}')
+        return value
+    check.bounds = (kinds, minimum, maximum)
+    return _field(check, required, default)
+
+
+def boolean(default=False):
+    def check(value):
+        if value.__class__ is not bool:
+            raise ValidationError('must be true or false')
+        return value
+    return _field(check, False, default)
+
+
+def image(max_bytes=MAX_IMAGE_BYTES):
+    """A base64 PNG/JPEG data URL whose decoded size is at most ``max_bytes``."""
+    max_chars = 64 + (max_bytes + 2) // 3 * 4
+
+    def check(value):
+        if value.__class__ is not str:
+            raise ValidationError('must be a data URL')
+        if not value:
+            return value
+        if len(value) > max_chars:
+            raise ValidationError(f'is too large (max {max_bytes // 1024:,} KB)')
+        if not _DATA_URL.match(value):
+            raise ValidationError('must be a PNG or JPEG data URL')
+        return value
+    return _field(check, False, '')
+
+
+def array(item, max_items, required=False):
+    """A list of at most ``max_items`` entries, each checked by ``item``."""
+    def check(value):
+        if value.__class__ is not list:
+            raise ValidationError('must be a list')
+        if len(value) > max_items:
+            raise ValidationError(f'has too many entries (max {max_items:,})')
+        out = []
+        append = out.append
+        i = 0
+        try:
+            for i, v in enumerate(value):
+                append(item(v))
+        except ValidationError as e:
+            e._within(i)
+            raise
+        return out
+    return _field(check, required, list)
+
+
+def obj(fields, required=False, default=None):
+    """An object with the given fields; unknown keys are dropped."""
+    # Number bounds are checked inline: most fields are numbers, and skipping
+    # a function call per field cuts the cost of a line item by about a third
+    plan = tuple((key, f, f.required, f.default, f.message, getattr(f, 'bounds', None))
+                 for key, f in fields.items())
+
+    def check(value):
+        if value.__class__ is not dict:
+            raise ValidationError('must be an object')
+        get = value.get
+        out = {}
+        key = None
+        try:
+            for key, f, is_required, default_value, message, bounds in plan:
+                v = get(key)
+                if v is None:
+                    if is_required:
+                        raise ValidationError('is required', message=message)
+                    out[key] = [] if default_value is list else default_value
+                elif bounds is not None and v.__class__ in bounds[0] and bounds[1] <= v <= bounds[2]:
+                    out[key] = v
+                else:
+                    out[key] = f(v)
+        except ValidationError as e:
+            e._within(key)
+            raise
+        return out
+    return _field(check, required, default)
+
+
+def _field(check, required, default, message=None):
+    check.required = required
+    check.default = default
+    check.message = message
+    return check
+
+
+def validate(schema, payload):
+    """Check a request body against a compiled schema and return the cleaned copy."""
+    if payload is None:
+        raise ValidationError('JSON body required', message='JSON body required')
+    return schema(payload)
+
+
+# ─── Schemas ──────────────────────────────────────────────────
+
+_DIMS = obj({
+    'w': number(maximum=MAX_DIMENSION),
+    'h': number(maximum=MAX_DIMENSION),
+    'l': number(maximum=MAX_DIMENSION),
+})
+
+ORDER_ITEM = obj({
+    'name': string(100, required=True),
+    'category': string(50),
+    'current': number(required=True, integer=True, maximum=MAX_PIECES),
+    'capacity': number(required=True, integer=True, maximum=MAX_PIECES),
+    'toOrder': number(required=True, integer=True, maximum=MAX_PIECES),
+    'unitPrice': number(),
+    'unitWeight': number(),
+    'totalCost': number(),
+    'totalWeight': number(),
+    'color': string(9),
+    'dims': _DIMS,
+})
+
+YARD_BUNK = obj({
+    'name': string(100),
+    'current': number(integer=True, maximum=MAX_PIECES),
+    'capacity': number(integer=True, maximum=MAX_PIECES),
+    'flagged': boolean(),
+})
+
+ORDER_PDF = obj({
+    'items': array(ORDER_ITEM, MAX_ORDER_ITEMS),
+    'yard': array(YARD_BUNK, MAX_YARD_BUNKS),
+    'truckImage': image(),
+    'chartImage': image(),
+    'totalWeight': number(),
+    'totalCost': number(),
+    'totalPieces': number(integer=True, maximum=MAX_PIECES * MAX_ORDER_ITEMS),
+    'totalBunks': number(integer=True, maximum=MAX_ORDER_ITEMS),
+})
+
+CHAT_MESSAGE = obj({
+    'recruiter_name': string(100, required=True, strip=True, message='Please provide your name.'),
+    'message': string(MAX_CHAT_MESSAGE_CHARS, required=True, strip=True,
+                      message='Please provide a message.'),
+    'conversation_id': string(64),
+    'job_posting': string(MAX_JOB_POSTING_CHARS),
+    'turn': number(integer=True, maximum=MAX_CHAT_TURN),
+})
+
+TRACK_EVENT = obj({
+    'event': string(64, required=True, message='unknown event'),
+})
+
+TRACK_BATCH = obj({
+    'events': array(TRACK_EVENT, MAX_TRACK_BATCH, required=True),
+})
@@ -0,0 +1,101 @@
+"""
+Tests for benchmarks/suite.py — percentiles and baseline comparison.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.suite import _percentile, _scenarios, compare
+
+
+def _result(p95=10.0, rps=100.0, errors=0):
+    return {'p95_ms': p95, 'rps': rps, 'errors': errors}
+
+
+# ─── _percentile ──────────────────────────────────────────────
+
+def test_percentile_empty():
+    assert _percentile([], 95) == 0.0
+
+
+def test_percentile_single_value():
+    assert _percentile([7.0], 50) == 7.0
+    assert _percentile([7.0], 99) == 7.0
+
+
+def test_percentile_ends():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert _percentile(values, 0) == 1.0
+    assert _percentile(values, 100) == 4.0
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [float(v) for v in range(1, 11)]
+    assert _percentile(values, 50) == pytest.approx(5.5)
+    assert _percentile(values, 95) == pytest.approx(9.55)
+
+
+# ─── compare ──────────────────────────────────────────────────
+
+def test_compare_within_threshold():
+    baseline = {'a': _result()}
+    assert compare({'a': _result(p95=12.4, rps=76)}, baseline, 0.25) == {}
+
+
+def test_compare_threshold_boundary_is_not_a_regression():
+    baseline = {'a': _result()}
+    assert compare({'a': _result(p95=12.5, rps=75)}, baseline, 0.25) == {}
+
+
+def test_compare_flags_slower_p95():
+    problems = compare({'a': _result(p95=13)}, {'a': _result()}, 0.25)['a']
+    assert problems == ['p95 10.0 → 13.0 ms']
+
+
+def test_compare_flags_lower_rps():
+    problems = compare({'a': _result(rps=70)}, {'a': _result()}, 0.25)['a']
+    assert problems == ['RPS 100 → 70']
+
+
+def test_compare_flags_new_errors():
+    assert compare({'a': _result(errors=2)}, {'a': _result()}, 0.25) == {'a': ['errors 0 → 2']}
+    # A baseline without an error count is treated as error-free
+    assert compare({'a': _result(errors=1)}, {'a': {'p95_ms': 10, 'rps': 100}}, 0.25)
+
+
+def test_compare_lists_every_problem():
+    problems = compare({'a': _result(p95=20, rps=50, errors=1)}, {'a': _result()}, 0.25)['a']
+    assert len(problems) == 3
+
+
+def test_compare_skips_scenarios_missing_from_baseline():
+    assert compare({'new': _result(p95=1000)}, {'a': _result()}, 0.25) == {}
+
+
+def test_compare_ignores_zero_baseline_metrics():
+    baseline = {'a': _result(p95=0, rps=0)}
+    assert compare({'a': _result(p95=50, rps=1)}, baseline, 0.25) == {}
+
+
+def test_compare_respects_threshold():
+    result, baseline = {'a': _result(p95=14)}, {'a': _result()}
+    assert compare(result, baseline, 0.25)
+    assert not compare(result, baseline, 0.5)
+
+
+# ─── _scenarios ───────────────────────────────────────────────
+
+def test_scenario_names_are_unique():
+    names = [s.name for s in _scenarios()]
+    assert len(names) == len(set(names))
+
+
+def test_scenarios_cover_routes():
+    paths = {s.path.split('?')[0] for s in _scenarios()}
+    for path in ('/api/plan', '/api/inventory', '/api/pdf-jobs', '/api/pdf-jobs/{job}/events',
+                 '/api/pdf-jobs/{job}/pdf', '/health', '/styles.css', '/resume.pdf'):
+        assert path in paths
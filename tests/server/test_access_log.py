@@ -0,0 +1,102 @@
+"""
+Tests for server/access_log.py — queued JSON access logs with rotation.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.access_log import ACCESS_LOG_DROPPED, AccessLog, access_entry, hash_ip
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_without_path():
+    assert not AccessLog(path='').enabled
+
+
+def test_entries_written_as_json_lines(tmp_path):
+    path = str(tmp_path / 'logs' / 'access.log')
+    log = AccessLog(path=path)
+    for i in range(3):
+        log.log({'n': i, 'path': '/health'})
+    log.close()
+    assert read_lines(path) == [{'n': 0, 'path': '/health'}, {'n': 1, 'path': '/health'},
+                                {'n': 2, 'path': '/health'}]
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / 'access.log')
+    log = AccessLog(path=path, max_bytes=200, backups=2, batch_max=1)
+    for i in range(40):
+        log.log({'n': i, 'pad': 'x' * 20})
+        log.flush()
+    log.close()
+    assert sorted(os.listdir(tmp_path)) == ['access.log', 'access.log.1', 'access.log.2']
+    assert all(os.path.getsize(tmp_path / name) <= 200 for name in os.listdir(tmp_path))
+    # Newest entries in the live file, older ones in .1 and .2, nothing out of order
+    kept = read_lines(f'{path}.2') + read_lines(f'{path}.1') + read_lines(path)
+    ns = [e['n'] for e in kept]
+    assert ns == sorted(ns) and ns[-1] == 39
+
+
+def test_follows_rotation_by_another_writer(tmp_path):
+    path = str(tmp_path / 'access.log')
+    a = AccessLog(path=path, max_bytes=100, backups=3, batch_max=1)
+    b = AccessLog(path=path, max_bytes=100, backups=3, batch_max=1)
+    for i in range(12):
+        (a if i % 2 else b).log({'n': i, 'pad': 'x' * 20})
+        a.flush()
+        b.flush()
+    a.close()
+    b.close()
+    files = [path] + [f'{path}.{i}' for i in range(1, 4) if os.path.exists(f'{path}.{i}')]
+    ns = sorted(e['n'] for f in files for e in read_lines(f))
+    assert ns == list(range(12 - len(ns), 12))
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    release = threading.Event()
+
+    class SlowLog(AccessLog):
+        def _write(self, data):
+            release.wait(5)
+            super()._write(data)
+
+    path = str(tmp_path / 'access.log')
+    log = SlowLog(path=path, maxsize=2, batch_max=1)
+    dropped = ACCESS_LOG_DROPPED.labels(reason='queue_full')._value.get()
+    start = time.perf_counter()
+    for i in range(20):
+        log.log({'n': i})
+    assert time.perf_counter() - start < 1
+    release.set()
+    log.close()
+    written = len(read_lines(path))
+    assert written < 20
+    assert ACCESS_LOG_DROPPED.labels(reason='queue_full')._value.get() - dropped == 20 - written
+
+
+def test_write_error_is_counted(tmp_path):
+    (tmp_path / 'file').write_text('')
+    log = AccessLog(path=str(tmp_path / 'file' / 'access.log'))
+    dropped = ACCESS_LOG_DROPPED.labels(reason='write_error')._value.get()
+    log.log({'n': 1})
+    log.close()
+    assert ACCESS_LOG_DROPPED.labels(reason='write_error')._value.get() - dropped == 1
+
+
+def test_access_entry_hashes_ip():
+    entry = access_entry(time.perf_counter(), 'chat', 'POST', '/api/chat', 200, 42, '203.0.113.9',
+                         conversation_id='abc', unused=None)
+    assert entry['ip_hash'] == hash_ip('203.0.113.9') != hash_ip('203.0.113.10')
+    assert '203.0.113.9' not in json.dumps(entry)
+    assert entry['conversation_id'] == 'abc' and 'unused' not in entry
+    assert entry['status'] == 200 and entry['bytes'] == 42 and entry['latency_ms'] >= 0
@@ -5,9 +5,11 @@ import json
 import os
 import sys
 import tempfile
+import threading
 import time
 from unittest.mock import patch, MagicMock
 import pytest
+from prometheus_client import REGISTRY
 
 # Ensure project root is on the path
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,18 +26,23 @@ def client(tmp_path):
     original_db = server_module.CHAT_DB_PATH
     server_module.CHAT_DB_PATH = test_db
     server_module._init_chat_db()
+    server_module._metrics_cache.clear()
     app.config['TESTING'] = True
     with app.test_client() as c:
         yield c
+    server_module._chat_writer.flush(timeout=5)
+    server_module._timeseries.flush()
     server_module.CHAT_DB_PATH = original_db
 
 
 @pytest.fixture(autouse=True)
 def _clear_rate_limits():
-    """Reset rate-limit state between tests."""
+    """Reset rate-limit and LLM circuit-breaker state between tests."""
     _chat_rate.clear()
+    server_module._llm.reset()
     yield
     _chat_rate.clear()
+    server_module._llm.reset()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -101,6 +108,24 @@ def test_chat_js_served(client):
     assert resp.status_code == 200
 
 
+def test_portfolio_links_fingerprinted_assets(client):
+    """The portfolio page should reference content-hashed, immutable assets."""
+    html = client.get('/').data.decode()
+    asset, _ = server_module._assets.lookup('styles.css')
+    assert f'/{asset.fingerprinted_path}' in html
+    resp = client.get(f'/{asset.fingerprinted_path}')
+    assert resp.status_code == 200
+    assert 'immutable' in resp.headers['Cache-Control']
+
+
+def test_resume_pdf_supports_range(client):
+    """resume.pdf should answer byte-range requests for resumed downloads."""
+    resp = client.get('/resume.pdf', headers={'Range': 'bytes=0-4'})
+    assert resp.status_code == 206
+    assert resp.data == b'%PDF-'
+    resp.close()
+
+
 def test_nonexistent_route_returns_404(client):
     """Unknown routes should return 404."""
     resp = client.get('/this-does-not-exist')
@@ -220,6 +245,75 @@ def test_track_missing_event_key(client):
     assert resp.status_code == 400
 
 
+@pytest.mark.parametrize('path, body', [
+    ('/api/track', None),
+    ('/api/track', {'foo': 'bar'}),
+    ('/api/track', {'event': 'x' * 65}),
+    ('/api/track/batch', {'events': [{}]}),
+])
+def test_track_validation_errors_keep_ok_flag(client, path, body):
+    """Track clients check ``ok``, so schema errors carry it like unknown events do."""
+    resp = client.post(path, json=body)
+    assert resp.status_code == 400
+    data = resp.get_json()
+    assert data['ok'] is False
+    assert data['error']
+
+
+def test_other_validation_errors_have_no_ok_flag(client):
+    resp = client.post('/api/chat', json={})
+    assert resp.status_code == 400
+    assert 'ok' not in resp.get_json()
+
+
+def _persisted_counter(name):
+    server_module._chat_writer.flush(timeout=5)
+    conn = server_module.sqlite3.connect(server_module.CHAT_DB_PATH)
+    value = conn.execute('SELECT value FROM counters WHERE name = ?', (name,)).fetchone()[0]
+    conn.close()
+    return value
+
+
+def test_track_batch_records_all_events(client):
+    """A batch increments every counter it names, in one transaction."""
+    events = [{'event': 'portfolio_view'}] * 3 + [{'event': 'resume_enjoyed'}]
+    with patch.object(server_module, '_inc_counters', wraps=server_module._inc_counters) as inc:
+        resp = client.post('/api/track/batch', json={'events': events})
+    assert resp.status_code == 200
+    assert resp.get_json() == {'ok': True, 'recorded': 4}
+    inc.assert_called_once_with({'portfolio_views': 3, 'resume_enjoyed': 1})
+    assert _persisted_counter('portfolio_views') == 3
+    assert _persisted_counter('resume_enjoyed') == 1
+    assert client.get('/api/stats').get_json()['portfolio_views'] == 3
+
+
+def test_track_batch_accepts_beacon_text_plain(client):
+    """navigator.sendBeacon may send the JSON as text/plain."""
+    resp = client.post('/api/track/batch', data='{"events": [{"event": "demo_view"}]}',
+                       content_type='text/plain;charset=UTF-8')
+    assert resp.status_code == 200
+    assert _persisted_counter('demo_views') == 1
+
+
+def test_track_batch_unknown_event_rejects_whole_batch(client):
+    resp = client.post('/api/track/batch', json={'events': [{'event': 'demo_view'}, {'event': 'nope'}]})
+    assert resp.status_code == 400
+    assert resp.get_json()['field'] == 'events[1].event'
+    assert _persisted_counter('demo_views') == 0
+
+
+@pytest.mark.parametrize('body', [
+    {}, {'events': 'demo_view'}, {'events': [{'event': 'demo_view'}] * 101}, {'events': [{}]},
+])
+def test_track_batch_invalid(client, body):
+    assert client.post('/api/track/batch', json=body).status_code == 400
+
+
+def test_track_batch_empty(client):
+    resp = client.post('/api/track/batch', json={'events': []})
+    assert resp.get_json() == {'ok': True, 'recorded': 0}
+
+
 # ═══════════════════════════════════════════════════════════════
 # Chat Validation
 # ═══════════════════════════════════════════════════════════════
@@ -257,6 +351,22 @@ def test_chat_whitespace_only_name(client):
     assert resp.status_code == 400
 
 
+@patch('server.app._get_openai_client')
+def test_chat_job_posting_too_long(mock_client, client):
+    """Oversized job postings are rejected before the OpenAI call."""
+    resp = client.post('/api/chat', json={
+        'recruiter_name': 'Sarah', 'message': 'Fit?', 'job_posting': 'x' * 20001,
+    })
+    assert resp.status_code == 400
+    assert resp.get_json()['field'] == 'job_posting'
+    mock_client.assert_not_called()
+
+
+def test_chat_rejects_non_string_message(client):
+    resp = client.post('/api/chat', json={'recruiter_name': 'Sarah', 'message': 42})
+    assert resp.status_code == 400
+
+
 def test_chat_whitespace_only_message(client):
     """Message that's only whitespace should be rejected."""
     resp = client.post('/api/chat',
@@ -328,6 +438,78 @@ def test_chat_continue_conversation(mock_client, client):
     assert r2['conversation_id'] == conv_id
 
 
+@patch.dict(os.environ, {'ADMIN_TOKEN': 'test-secret-token'})
+@patch('server.app._get_openai_client')
+def test_chat_messages_persisted_in_order(mock_client, client):
+    """Queued chat writes should land in SQLite and feed the next turn's history."""
+    create = mock_client.return_value.chat.completions.create
+    create.return_value = _mock_openai_response('First reply')
+    conv_id = client.post('/api/chat', json={
+        'recruiter_name': 'Gina', 'message': 'Hi',
+    }).get_json()['conversation_id']
+    create.return_value = _mock_openai_response('Second reply')
+    client.post('/api/chat', json={
+        'recruiter_name': 'Gina', 'message': 'More', 'conversation_id': conv_id,
+    })
+
+    sent = create.call_args.kwargs['messages']
+    assert [m['content'] for m in sent if m['role'] != 'system'] == ['Hi', 'First reply', 'More']
+
+    logs = client.get('/admin/chat-logs?token=test-secret-token').get_json()
+    conv = next(c for c in logs['conversations'] if c['id'] == conv_id)
+    assert conv['message_count'] == 4
+    assert [m['content'] for m in conv['messages']] == ['Hi', 'First reply', 'More', 'Second reply']
+
+
+@patch('server.app._get_openai_client')
+def test_chat_follow_up_waits_for_uncommitted_turn(mock_client, client):
+    """A follow-up on another worker re-reads SQLite until the echoed turn is committed."""
+    create = mock_client.return_value.chat.completions.create
+    create.return_value = _mock_openai_response('First reply')
+    writer = server_module._chat_writer
+    commit = writer._commit
+
+    def slow_commit(events):
+        time.sleep(0.2)
+        commit(events)
+
+    with patch.object(writer, '_commit', side_effect=slow_commit):
+        first = client.post('/api/chat', json={'recruiter_name': 'Hana', 'message': 'Hi'}).get_json()
+        assert first['turn'] == 2
+        # Another worker has nothing of its own queued for this conversation
+        with patch.object(writer, 'wait_for', return_value=True):
+            second = client.post('/api/chat', json={
+                'recruiter_name': 'Hana', 'message': 'More',
+                'conversation_id': first['conversation_id'], 'turn': first['turn'],
+            }).get_json()
+    sent = create.call_args.kwargs['messages']
+    assert [m['content'] for m in sent if m['role'] != 'system'] == ['Hi', 'First reply', 'More']
+    assert second['turn'] == 4
+
+
+@patch('server.app._get_openai_client')
+def test_chat_stale_history_is_counted(mock_client, client):
+    """History still behind the echoed turn after the wait is reported, not fatal."""
+    mock_client.return_value.chat.completions.create.return_value = _mock_openai_response()
+    conv_id = client.post('/api/chat', json={'recruiter_name': 'Ivy', 'message': 'Hi'}).get_json()['conversation_id']
+    before = REGISTRY.get_sample_value('chat_history_stale_total') or 0
+    with patch.object(server_module, 'CHAT_HISTORY_WAIT', 0.1):
+        resp = client.post('/api/chat', json={
+            'recruiter_name': 'Ivy', 'message': 'More', 'conversation_id': conv_id, 'turn': 10,
+        })
+    assert resp.status_code == 200
+    assert REGISTRY.get_sample_value('chat_history_stale_total') == before + 1
+
+
+@patch('server.app._get_openai_client')
+def test_chat_message_counter_is_current(mock_client, client):
+    """The chat counter goes through the counter service, so its cached total is current."""
+    mock_client.return_value.chat.completions.create.return_value = _mock_openai_response()
+    before = server_module._counters.get('chat_messages')
+    client.post('/api/chat', json={'recruiter_name': 'Jo', 'message': 'Hi'})
+    assert server_module._counters.get('chat_messages') == before + 1
+
+
 @patch('server.app._get_openai_client')
 def test_chat_with_job_posting(mock_client, client):
     """Including a job_posting should still return 200."""
@@ -365,6 +547,22 @@ def test_chat_openai_generic_error(mock_client, client):
     assert 'break' in resp.get_json()['error'].lower() or 'email' in resp.get_json()['error'].lower()
 
 
+@patch('server.app._get_openai_client')
+def test_chat_circuit_breaker_fails_fast(mock_client, client):
+    """After repeated upstream failures chat answers 503 without calling OpenAI."""
+    create = mock_client.return_value.chat.completions.create
+    create.side_effect = TimeoutError('upstream timed out')
+    with patch.object(server_module._llm, 'retries', 0):
+        for i in range(server_module._llm.breaker.failures):
+            client.post('/api/chat', json={'recruiter_name': 'Gil', 'message': f'Hello {i}'})
+    calls = create.call_count
+    resp = client.post('/api/chat', json={'recruiter_name': 'Gil', 'message': 'Still there?'})
+    assert resp.status_code == 503
+    assert 'break' in resp.get_json()['error']
+    assert int(resp.headers['Retry-After']) >= 1
+    assert create.call_count == calls
+
+
 # ═══════════════════════════════════════════════════════════════
 # Admin Auth
 # ═══════════════════════════════════════════════════════════════
@@ -501,6 +699,15 @@ def test_track_visitor_cleans_expired():
     assert '10.0.0.2' in _visitor_log
 
 
+def test_static_assets_bypass_visitor_tracking(client):
+    """CSS/JS fetches should not touch the visitor log; page views should."""
+    _visitor_log.clear()
+    client.get('/styles.css', environ_base={'REMOTE_ADDR': '10.9.9.9'})
+    assert '10.9.9.9' not in _visitor_log
+    client.get('/', environ_base={'REMOTE_ADDR': '10.9.9.9'})
+    assert '10.9.9.9' in _visitor_log
+
+
 def test_check_chat_rate_allows_first():
     """First request from a fresh IP should be allowed."""
     _chat_rate.clear()
@@ -609,10 +816,353 @@ def test_generate_pdf_zero_capacity_item(client):
     assert resp.status_code == 200
 
 
+def test_generate_pdf_large_order_streams(client):
+    """Large orders stream back in chunks with an exact Content-Length."""
+    items = [{
+        'name': f'Product {i}', 'category': 'Dimensional', 'current': i % 100,
+        'capacity': 100, 'toOrder': 100 - i % 100, 'unitPrice': 1.0,
+        'unitWeight': 0, 'totalCost': 1.0,
+    } for i in range(500)]
+    resp = client.post('/generate-pdf', json={
+        'items': items, 'totalWeight': 0, 'totalCost': 500.0,
+        'totalPieces': 0, 'totalBunks': 500,
+    }, buffered=False)
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    body = b''.join(resp.response)
+    resp.close()
+    assert body[:5] == b'%PDF-'
+    assert len(body) == int(resp.headers['Content-Length'])
+    assert 'inline' in resp.headers['Content-Disposition']
+
+
+def test_generate_pdf_draws_loading_plan_without_upload(client):
+    """Without a truckImage the loading plan is drawn server-side."""
+    payload = {
+        'items': [{
+            'name': '2x4x8 SPF', 'category': 'Dimensional', 'current': 0,
+            'capacity': 294, 'toOrder': 294, 'unitPrice': 3.48, 'unitWeight': 9,
+            'totalCost': 1023.12, 'dims': {'w': 3.5, 'h': 1.5, 'l': 96},
+        }],
+        'totalWeight': 2646, 'totalCost': 1023.12, 'totalPieces': 294, 'totalBunks': 1,
+    }
+    resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 200
+    # Loading plan lands on its own page
+    assert b'/Count 2' in resp.data
+
+
+def test_generate_pdf_draws_yard_chart_from_summary(client):
+    """A yard summary replaces the uploaded chartImage PNG."""
+    payload = {
+        'items': [], 'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0, 'totalBunks': 0,
+        'yard': [{'name': f'Bunk {i}', 'current': i * 10, 'capacity': 100, 'flagged': i == 3}
+                 for i in range(10)],
+    }
+    resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 200
+    assert resp.data[:5] == b'%PDF-'
+
+
+def test_generate_pdf_bad_yard_summary(client):
+    """A malformed yard summary is rejected and names the bad field."""
+    payload = {'items': [], 'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0,
+               'totalBunks': 0, 'yard': [{'current': 'lots'}]}
+    resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 400
+    assert resp.get_json()['field'] == 'yard[0].current'
+
+
+def test_generate_pdf_malformed_item(client):
+    """A line item missing a required field is a 400, not a 500."""
+    payload = {'items': [{'name': '2x4', 'capacity': 100, 'toOrder': 10}],
+               'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0, 'totalBunks': 1}
+    with patch.object(server_module, 'build_order_pdf') as build:
+        resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 400
+    assert resp.get_json()['field'] == 'items[0].current'
+    build.assert_not_called()
+
+
+def test_generate_pdf_rejects_non_json(client):
+    resp = client.post('/generate-pdf', data='not json', content_type='application/json')
+    assert resp.status_code == 400
+
+
+def test_generate_pdf_oversized_image(client):
+    """Uploaded images over the size limit are rejected before rendering."""
+    payload = {'items': [], 'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0, 'totalBunks': 0,
+               'chartImage': 'data:image/png;base64,' + 'A' * (3 * 1024 * 1024)}
+    resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 400
+    assert resp.get_json()['field'] == 'chartImage'
+
+
+# ═══════════════════════════════════════════════════════════════
+# PDF Jobs
+# ═══════════════════════════════════════════════════════════════
+
+_PDF_JOB_PAYLOAD = {
+    'items': [{'name': '2x4 Studs', 'category': 'Framing', 'current': 20, 'capacity': 100,
+               'toOrder': 80, 'unitPrice': 3.50, 'unitWeight': 8, 'totalCost': 280.00}],
+    'totalWeight': 640, 'totalCost': 280.00, 'totalPieces': 80, 'totalBunks': 1,
+}
+
+
+def _wait_for_pdf_job(client, status_url, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('PDF job did not finish')
+
+
+def test_pdf_job_lifecycle(client):
+    """POST queues a job (202); once done the PDF downloads from the job URL."""
+    resp = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD)
+    assert resp.status_code == 202
+    job = resp.get_json()
+    assert job['status'] == 'queued'
+    assert resp.headers['Location'] == job['statusUrl']
+
+    done = _wait_for_pdf_job(client, job['statusUrl'])
+    assert done['status'] == 'done'
+    pdf = client.get(done['downloadUrl'])
+    assert pdf.status_code == 200
+    assert pdf.content_type == 'application/pdf'
+    assert pdf.data[:5] == b'%PDF-'
+    assert len(pdf.data) == done['size']
+    assert 'restock-order-' in pdf.headers['Content-Disposition']
+    pdf.close()
+
+
+def test_pdf_job_stored_next_to_chat_db(client):
+    """Rendered PDFs live in a pdf_jobs directory beside the chat database."""
+    job = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD).get_json()
+    _wait_for_pdf_job(client, job['statusUrl'])
+    jobs_dir = os.path.join(os.path.dirname(server_module.CHAT_DB_PATH), 'pdf_jobs')
+    assert os.path.exists(os.path.join(jobs_dir, job['id'] + '.pdf'))
+
+
+def test_pdf_job_events_stream(client):
+    """The SSE stream ends with the job's final status."""
+    job = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD).get_json()
+    with client.get(f"/api/pdf-jobs/{job['id']}/events") as resp:
+        assert resp.content_type.startswith('text/event-stream')
+        events = [json.loads(line[len('data: '):]) for line in resp.get_data(as_text=True).splitlines()
+                  if line.startswith('data: ')]
+    assert events[-1]['status'] == 'done'
+
+
+def test_pdf_job_event_streams_are_capped(client):
+    """Past the per-process cap, streams are refused with 503 so clients poll."""
+    job = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD).get_json()
+    with patch.object(server_module, '_pdf_job_streams', threading.BoundedSemaphore(1)) as slots:
+        slots.acquire()
+        resp = client.get(f"/api/pdf-jobs/{job['id']}/events")
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '1'
+        slots.release()
+        with client.get(f"/api/pdf-jobs/{job['id']}/events") as resp:
+            assert resp.status_code == 200
+            resp.get_data()
+        # The closed stream gave its slot back
+        assert slots.acquire(blocking=False)
+
+
+def test_pdf_job_status_advises_poll_interval(client):
+    """Unfinished jobs carry Retry-After; finished ones don't."""
+    with patch.object(server_module._pdf_jobs, 'status', return_value={'id': 'x', 'status': 'queued'}):
+        assert client.get('/api/pdf-jobs/x').headers['Retry-After'] == '1'
+    job = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD).get_json()
+    _wait_for_pdf_job(client, job['statusUrl'])
+    assert 'Retry-After' not in client.get(job['statusUrl']).headers
+
+
+def test_pdf_job_not_found(client):
+    """Unknown job ids return 404 on every job URL."""
+    for url in ('/api/pdf-jobs/' + '0' * 32, '/api/pdf-jobs/nope/pdf', '/api/pdf-jobs/nope/events'):
+        assert client.get(url).status_code == 404
+
+
+def test_pdf_job_download_before_ready(client):
+    """Downloading an unfinished job returns 409 with its status."""
+    with patch.object(server_module._pdf_jobs, 'result_path', return_value=None):
+        job = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD).get_json()
+        resp = client.get(job['downloadUrl'])
+    assert resp.status_code == 409
+    assert 'status' in resp.get_json()
+    _wait_for_pdf_job(client, job['statusUrl'])
+
+
+def test_pdf_job_rejects_non_json(client):
+    assert client.post('/api/pdf-jobs', data='x').status_code == 400
+
+
+def test_pdf_job_validates_before_queueing(client):
+    """Bad payloads never reach the render queue."""
+    with patch.object(server_module._pdf_jobs, 'submit') as submit:
+        resp = client.post('/api/pdf-jobs', json={'items': 'lots'})
+    assert resp.status_code == 400
+    submit.assert_not_called()
+
+
+def test_pdf_job_queue_full(client):
+    """A full render queue returns 503 with Retry-After."""
+    with patch.object(server_module._pdf_jobs, 'submit',
+                      side_effect=server_module.JobQueueFull('busy')):
+        resp = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD)
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After']
+
+
+# ═══════════════════════════════════════════════════════════════
+# Restock Planning
+# ═══════════════════════════════════════════════════════════════
+
+def test_plan_endpoint(client):
+    """POST /api/plan should return order lines, trucks and totals."""
+    resp = client.post('/api/plan', json={'bunks': [{
+        'id': 'dim-2x4x8', 'name': '2x4x8', 'category': 'Dimensional',
+        'capacity': 294, 'current': 10, 'unitWeight': 9, 'unitPrice': 3.48,
+        'dims': {'w': 3.5, 'h': 1.5, 'l': 96},
+    }]})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['items'][0]['toOrder'] == 284
+    assert data['totals']['trucks'] == 1
+    assert data['trucks'][0]['loads'][0]['id'] == 'dim-2x4x8'
+
+
+def test_plan_endpoint_rejects_bad_input(client):
+    """Malformed bunks or options should return 400."""
+    assert client.post('/api/plan', json={'bunks': 'x'}).status_code == 400
+    assert client.post('/api/plan', json={'bunks': [], 'truckMaxLbs': 'big'}).status_code == 400
+    assert client.post('/api/plan', json=[1, 2, 3]).status_code == 400
+    short_names = {'capacity': [10, 10], 'current': [0, 0], 'name': 'a'}
+    assert client.post('/api/plan', json={'bunks': short_names}).status_code == 400
+    assert client.post('/api/plan', json={'bunks': {'capacity': [10], 'dims': 5}}).status_code == 400
+
+
+def test_plan_endpoint_rejects_oversized_orders(client):
+    """Huge quantities get a clear 400 before any planning work."""
+    bunk = {'id': 'a', 'capacity': 10, 'current': 0, 'unitWeight': 48000}
+    resp = client.post('/api/plan', json={'bunks': [dict(bunk, toOrder=1e6)]})
+    assert resp.status_code == 400
+    assert 'toOrder must be at most' in resp.get_json()['error']
+    resp = client.post('/api/plan', json={'bunks': [dict(bunk, capacity=1e30)]})
+    assert 'capacity must be at most' in resp.get_json()['error']
+
+
+# ═══════════════════════════════════════════════════════════════
+# Inventory
+# ═══════════════════════════════════════════════════════════════
+
+def _inventory_bunk(id, current):
+    return {'id': id, 'name': id, 'category': 'Dimensional', 'capacity': 100,
+            'current': current, 'unitWeight': 9, 'unitPrice': 3.48,
+            'dims': {'w': 3.5, 'h': 1.5, 'l': 96}}
+
+
+@patch.dict(os.environ, {'ADMIN_TOKEN': 'test-secret-token'})
+def _post_inventory(client, body):
+    return client.post('/api/inventory?token=test-secret-token', json=body)
+
+
+@patch.dict(os.environ, {'ADMIN_TOKEN': 'test-secret-token'})
+def test_inventory_writes_need_admin_token(client):
+    """The shared yard can't be overwritten by demo visitors."""
+    body = {'updates': [_inventory_bunk('a', 10)]}
+    assert client.post('/api/inventory', json=body).status_code == 401
+    assert client.post('/api/inventory?token=wrong', json=body).status_code == 401
+    assert client.get('/api/inventory').get_json()['bunks'] == []
+
+
+def test_inventory_since_out_of_range_is_clamped(client):
+    """A since beyond SQLite's integer range reads as "nothing newer"."""
+    _post_inventory(client, {'updates': [_inventory_bunk('a', 10)]})
+    resp = client.get('/api/inventory?since=100000000000000000000000')
+    assert resp.status_code == 200
+    assert resp.get_json()['bunks'] == []
+
+
+def test_inventory_update_and_read(client):
+    """A posted batch is readable from GET /api/inventory."""
+    resp = _post_inventory(client, {'updates': [
+        _inventory_bunk('a', 10), _inventory_bunk('b', 80),
+    ]})
+    assert resp.get_json() == {'version': 1, 'updated': 2}
+    data = client.get('/api/inventory').get_json()
+    assert data['version'] == 1
+    assert [b['id'] for b in data['bunks']] == ['a', 'b']
+
+
+def test_inventory_etag_and_delta(client):
+    """Unchanged yards return 304; deltas carry only changed bunks."""
+    _post_inventory(client, {'updates': [_inventory_bunk('a', 10), _inventory_bunk('b', 80)]})
+    etag = client.get('/api/inventory').headers['ETag']
+    assert client.get('/api/inventory', headers={'If-None-Match': etag}).status_code == 304
+
+    _post_inventory(client, {'updates': [{'id': 'b', 'delta': -30}]})
+    resp = client.get('/api/inventory?since=1', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['version'] == 2
+    assert [(b['id'], b['current']) for b in data['bunks']] == [('b', 50)]
+    assert resp.headers['ETag'] != etag
+
+
+def test_inventory_etag_depends_on_since(client):
+    """A full snapshot's ETag never validates a delta for the same version."""
+    _post_inventory(client, {'updates': [_inventory_bunk('a', 10)]})
+    etag = client.get('/api/inventory').headers['ETag']
+    resp = client.get('/api/inventory?since=1', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['bunks'] == []
+    delta_etag = resp.headers['ETag']
+    assert client.get('/api/inventory?since=1', headers={'If-None-Match': delta_etag}).status_code == 304
+    assert client.get('/api/inventory', headers={'If-None-Match': delta_etag}).status_code == 200
+
+
+def test_inventory_rejects_bad_batch(client):
+    """Invalid updates return 400 and change nothing."""
+    resp = _post_inventory(client, {'updates': [{'id': 'x', 'current': 5}]})
+    assert resp.status_code == 400
+    assert _post_inventory(client, [{'id': 'x', 'capacity': 5}]).status_code == 400
+    bad = dict(_inventory_bunk('a', 10), dims={'w': float('inf'), 'h': 1.5, 'l': 96})
+    assert _post_inventory(client, {'updates': [bad]}).status_code == 400
+    assert client.get('/api/inventory').get_json()['bunks'] == []
+
+
+def test_plan_uses_stored_inventory(client):
+    """POST /api/plan without bunks plans against the persisted yard."""
+    _post_inventory(client, {'updates': [_inventory_bunk('a', 10), _inventory_bunk('b', 80)]})
+    data = client.post('/api/plan', json={}).get_json()
+    assert [(i['id'], i['toOrder']) for i in data['items']] == [('a', 90)]
+
+
 # ═══════════════════════════════════════════════════════════════
 # Request Middleware
 # ═══════════════════════════════════════════════════════════════
 
+def test_init_chat_db_returns_counters(client):
+    """Startup restores every counter from the schema connection's single read."""
+    counters = server_module._init_chat_db()
+    assert counters['pdf_generations'] == 0
+    client.post('/api/track', json={'event': 'demo_view'})
+    assert server_module._init_chat_db()['demo_views'] == 1
+
+
+def test_pdf_subsystem_loaded_on_demand():
+    """get_fill_color stays importable from server.app without an eager ReportLab import."""
+    from server.pdf_graphics import get_fill_color as direct
+    assert server_module.get_fill_color is direct
+    with pytest.raises(AttributeError):
+        server_module.no_such_name
+
+
 def test_request_counter_incremented(client):
     """After a request, http_requests_total should include it."""
     client.get('/health')
@@ -628,3 +1178,338 @@ def test_cors_headers_on_api(client):
     })
     # Flask-CORS should respond to preflight
     assert resp.status_code in (200, 204)
+
+
+# ═══════════════════════════════════════════════════════════════
+# Request Body Limits
+# ═══════════════════════════════════════════════════════════════
+
+def _rejected(endpoint, reason):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(
+        'request_body_rejected_total', {'endpoint': endpoint, 'reason': reason}) or 0
+
+
+def test_oversized_body_rejected_before_parsing(client):
+    """A declared Content-Length over the route limit is a 413, counted by endpoint."""
+    before = _rejected('chat', 'too_large')
+    with patch.object(server_module, 'validate') as validate:
+        resp = client.post('/api/chat', json={
+            'recruiter_name': 'Sarah', 'message': 'Hi', 'job_posting': 'x' * (200 * 1024)})
+    assert resp.status_code == 413
+    assert 'too large' in resp.get_json()['error']
+    validate.assert_not_called()
+    assert _rejected('chat', 'too_large') == before + 1
+
+
+def test_oversized_chunked_body_rejected(client):
+    """Chunked uploads are cut off once they pass the limit."""
+    import io
+    resp = client.post('/api/track', input_stream=io.BytesIO(b'{"event": "' + b'a' * 10000 + b'"}'),
+                       content_type='application/json',
+                       headers={'Transfer-Encoding': 'chunked'},
+                       environ_overrides={'wsgi.input_terminated': True})
+    assert resp.status_code == 413
+
+
+def test_chunked_body_within_limit(client):
+    import io
+    resp = client.post('/api/track', input_stream=io.BytesIO(b'{"event": "demo_view"}'),
+                       content_type='application/json',
+                       headers={'Transfer-Encoding': 'chunked'},
+                       environ_overrides={'wsgi.input_terminated': True})
+    assert resp.status_code == 200
+
+
+def test_body_limits_are_per_route(client):
+    """A body too big for /api/track is fine for /generate-pdf."""
+    padding = {'items': [], 'totalWeight': 0, 'totalCost': 0, 'totalPieces': 0, 'totalBunks': 0,
+               'chartImage': 'data:image/png;base64,' + 'A' * 8000}
+    assert client.post('/api/track', json=dict(padding, event='demo_view')).status_code == 413
+    assert client.post('/generate-pdf', json=padding).status_code == 200
+
+
+def test_inflight_budget_per_ip(client):
+    """A client over its in-flight byte budget gets a 429; others are unaffected."""
+    budget = server_module._body_budget
+    assert budget.acquire('10.9.9.9', budget.per_ip - 10)
+    try:
+        before = _rejected('track_event', 'budget')
+        resp = client.post('/api/track', json={'event': 'demo_view'},
+                           headers={'X-Forwarded-For': '10.9.9.9'})
+        assert resp.status_code == 429
+        assert resp.headers['Retry-After']
+        assert _rejected('track_event', 'budget') == before + 1
+        resp = client.post('/api/track', json={'event': 'demo_view'},
+                           headers={'X-Forwarded-For': '10.9.9.8'})
+        assert resp.status_code == 200
+    finally:
+        budget.release('10.9.9.9', budget.per_ip - 10)
+
+
+def test_inflight_budget_ignores_spoofed_forwarded_for(client):
+    """Rotating the client-supplied leftmost X-Forwarded-For entry doesn't reset the budget."""
+    budget = server_module._body_budget
+    assert budget.acquire('10.9.9.9', budget.per_ip - 10)
+    try:
+        for spoof in ('1.1.1.1', '2.2.2.2'):
+            resp = client.post('/api/track', json={'event': 'demo_view'},
+                               headers={'X-Forwarded-For': f'{spoof}, 10.9.9.9'})
+            assert resp.status_code == 429
+        with patch.object(server_module, 'TRUSTED_PROXIES', 0):
+            resp = client.post('/api/track', json={'event': 'demo_view'},
+                               headers={'X-Forwarded-For': '10.9.9.9'},
+                               environ_base={'REMOTE_ADDR': '10.9.9.6'})
+            assert resp.status_code == 200
+    finally:
+        budget.release('10.9.9.9', budget.per_ip - 10)
+
+
+def test_inflight_budget_released_after_request(client):
+    client.post('/api/track', json={'event': 'demo_view'}, headers={'X-Forwarded-For': '10.9.9.7'})
+    client.post('/api/track', json={'event': 'nope'}, headers={'X-Forwarded-For': '10.9.9.7'})
+    assert server_module._body_budget.used('10.9.9.7') == 0
+
+
+# ═══════════════════════════════════════════════════════════════
+# Chat — local OpenAI-compatible server
+# ═══════════════════════════════════════════════════════════════
+
+def test_chat_through_openai_stub(client):
+    """OPENAI_BASE_URL sends chat over HTTP to a compatible server, without an API key."""
+    from server.openai_stub import OpenAIStub, DEFAULT_REPLY
+    with OpenAIStub(latency_ms=0, distribution='fixed') as stub:
+        env = {'OPENAI_BASE_URL': stub.base_url}
+        with patch.dict(os.environ, env), patch.object(server_module, '_openai_client', None):
+            os.environ.pop('OPENAI_API_KEY', None)
+            resp = client.post('/api/chat', json={'recruiter_name': 'Sarah', 'message': 'Hi'})
+            assert server_module._openai_client.base_url.host == '127.0.0.1'
+    assert resp.status_code == 200
+    assert resp.get_json()['reply'] == DEFAULT_REPLY
+    assert stub.stats()['requests'] == 1
+
+
+def test_openai_client_requires_key_without_base_url():
+    with patch.dict(os.environ), patch.object(server_module, '_openai_client', None):
+        os.environ.pop('OPENAI_API_KEY', None)
+        os.environ.pop('OPENAI_BASE_URL', None)
+        with pytest.raises(ValueError):
+            server_module._get_openai_client()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Request Profiles
+# ═══════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def profiling():
+    profiler = server_module._profiler
+    with patch.object(profiler, 'sample_rate', 1.0), patch.object(profiler, 'interval', 0.001):
+        profiler.clear()
+        yield profiler
+    profiler.clear()
+
+
+def test_admin_profiles_requires_token(client):
+    assert client.get('/admin/profiles').status_code == 401
+    assert client.get('/admin/profiles/1?token=wrong').status_code == 401
+
+
+def test_profiles_disabled_by_default(client):
+    with patch.dict(os.environ, {'ADMIN_TOKEN': 'secret'}):
+        client.get('/api/stats')
+        data = client.get('/admin/profiles?token=secret').get_json()
+    assert data['enabled'] is False
+    assert data['profiles'] == []
+
+
+def test_profiled_request_listed_and_exported(client, profiling):
+    payload = dict(_PDF_JOB_PAYLOAD, items=_PDF_JOB_PAYLOAD['items'] * 200)
+    resp = client.post('/generate-pdf', json=payload)
+    assert resp.status_code == 200
+    with patch.dict(os.environ, {'ADMIN_TOKEN': 'secret'}):
+        listing = client.get('/admin/profiles?token=secret').get_json()
+        (profile,) = [p for p in listing['profiles'] if p['endpoint'] == 'generate_pdf']
+        assert profile['status'] == 200 and profile['path'] == '/generate-pdf'
+        assert profile['samples'] > 0
+
+        collapsed = client.get(f"/admin/profiles/{profile['id']}?token=secret")
+        assert collapsed.mimetype == 'text/plain'
+        assert 'generate_pdf (server/app.py' in collapsed.get_data(as_text=True)
+
+        speedscope = client.get('/admin/profiles?token=secret&format=speedscope&endpoint=generate_pdf')
+        assert speedscope.get_json()['profiles'][0]['name'].startswith(f"#{profile['id']} /generate-pdf")
+        assert 'attachment' in speedscope.headers['Content-Disposition']
+
+        assert client.get('/admin/profiles?token=secret&format=svg').status_code == 400
+        assert client.get('/admin/profiles/99999?token=secret').status_code == 404
+    # The profile endpoints do not profile themselves
+    assert {p['endpoint'] for p in profiling.profiles()} == {'generate_pdf'}
+
+
+# ═══════════════════════════════════════════════════════════════
+# Phase Timing
+# ═══════════════════════════════════════════════════════════════
+
+def _phase_count(endpoint, phase):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(
+        'request_phase_seconds_count', {'endpoint': endpoint, 'phase': phase}) or 0
+
+
+def _server_timing_phases(resp):
+    return [part.split(';')[0] for part in resp.headers['Server-Timing'].split(', ')]
+
+
+def test_server_timing_off_by_default(client):
+    assert 'Server-Timing' not in client.get('/health').headers
+
+
+def test_generate_pdf_phases(client):
+    before = _phase_count('generate_pdf', 'build')
+    with patch('server.timing.SERVER_TIMING', True):
+        resp = client.post('/generate-pdf', json=_PDF_JOB_PAYLOAD)
+    assert resp.status_code == 200
+    assert _server_timing_phases(resp) == ['parse', 'validate', 'tables', 'diagrams', 'build', 'total']
+    assert _phase_count('generate_pdf', 'build') == before + 1
+
+
+@patch('server.app._get_openai_client')
+def test_chat_phases(mock_client, client):
+    mock_client.return_value.chat.completions.create.return_value = _mock_openai_response()
+    with patch('server.timing.SERVER_TIMING', True):
+        first = client.post('/api/chat', json={'recruiter_name': 'Ana', 'message': 'Hi'})
+        second = client.post('/api/chat', json={
+            'recruiter_name': 'Ana', 'message': 'More?', 'conversation_id': first.get_json()['conversation_id'],
+        })
+    assert _server_timing_phases(first) == ['parse', 'validate', 'persist', 'prompt', 'llm', 'total']
+    assert _server_timing_phases(second) == ['parse', 'validate', 'history', 'persist', 'prompt', 'llm', 'total']
+
+
+def test_pdf_job_phases_recorded(client):
+    before = _phase_count('pdf_job', 'build')
+    resp = client.post('/api/pdf-jobs', json=_PDF_JOB_PAYLOAD)
+    _wait_for_pdf_job(client, resp.headers['Location'])
+    assert _phase_count('pdf_job', 'build') == before + 1
+
+
+# ═══════════════════════════════════════════════════════════════
+# Stats — time series
+# ═══════════════════════════════════════════════════════════════
+
+def test_stats_timeseries_counts_tracked_events(client):
+    """Tracked events show up in the current bucket once flushed."""
+    client.post('/api/track/batch', json={'events': [{'event': 'demo_view'}] * 3})
+    client.post('/api/track', json={'event': 'portfolio_view'})
+    server_module._timeseries.flush()
+    resp = client.get('/api/stats/timeseries?series=demo_views,portfolio_views&resolution=minute')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['resolution'] == 'minute'
+    assert data['until'] - data['since'] == 2 * 3600
+    assert data['series']['demo_views'][-1][1] == 3
+    assert data['series']['portfolio_views'][-1][1] == 1
+    assert sum(v for _, v in data['series']['demo_views']) == 3
+
+
+def test_stats_timeseries_defaults_to_every_series(client):
+    data = client.get('/api/stats/timeseries').get_json()
+    assert set(data['series']) == set(server_module.COUNTER_NAMES)
+    assert len(data['series']['chat_messages']) == 7 * 24
+
+
+@pytest.mark.parametrize('query', [
+    'series=nope',
+    'resolution=week',
+    'resolution=minute&since=0',
+    'since=7200&until=3600',
+    'since=10000000000000000000000',
+    'until=10000000000000000000000',
+    'since=-5',
+])
+def test_stats_timeseries_bad_query(client, query):
+    resp = client.get(f'/api/stats/timeseries?{query}')
+    assert resp.status_code == 400
+    assert 'error' in resp.get_json()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Access log
+# ═══════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def access_log(tmp_path):
+    """Route the access log to a temporary file for the test."""
+    from server.access_log import AccessLog
+    log = AccessLog(path=str(tmp_path / 'access.log'))
+    with patch.object(server_module, '_access_log', log):
+        yield log
+    log.close()
+
+
+def _access_entries(log):
+    log.flush(timeout=5)
+    with open(log.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_access_log_records_requests(client, access_log):
+    client.get('/health', headers={'X-Forwarded-For': '203.0.113.9'})
+    client.get('/api/stats/timeseries?series=nope')
+    client.get('/does-not-exist')
+    health, bad, missing = _access_entries(access_log)
+    assert health['endpoint'] == 'health' and health['method'] == 'GET' and health['path'] == '/health'
+    assert health['status'] == 200 and health['bytes'] > 0 and health['latency_ms'] >= 0
+    assert '203.0.113.9' not in json.dumps(health) and len(health['ip_hash']) == 16
+    assert bad['status'] == 400
+    assert missing['status'] == 404 and missing['path'] == '/does-not-exist'
+
+
+def test_access_log_omits_query_string(client, access_log):
+    client.get('/admin/chat-logs?token=secret')
+    (entry,) = _access_entries(access_log)
+    assert entry['path'] == '/admin/chat-logs' and 'secret' not in json.dumps(entry)
+
+
+@patch('server.app._get_openai_client')
+def test_access_log_includes_conversation_id(mock_client, client, access_log):
+    mock_client.return_value.chat.completions.create.return_value = _mock_openai_response()
+    resp = client.post('/api/chat', json={'recruiter_name': 'Alice', 'message': 'Hi'})
+    (entry,) = _access_entries(access_log)
+    assert entry['endpoint'] == 'chat'
+    assert entry['conversation_id'] == resp.get_json()['conversation_id']
+
+
+def test_access_log_off_by_default(client):
+    assert not server_module._access_log.enabled
+
+
+# ═══════════════════════════════════════════════════════════════
+# Metrics — bounded labels and cached exposition
+# ═══════════════════════════════════════════════════════════════
+
+def _sample(name, labels):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_unknown_method_collapses_to_other(client):
+    labels = {'method': 'other', 'endpoint': 'unknown', 'status': '405'}
+    before = _sample('http_requests_total', labels)
+    client.open('/health', method='BREW')
+    assert _sample('http_requests_total', labels) == before + 1
+    assert 'BREW' not in client.get('/metrics').data.decode()
+
+
+def test_probe_latency_has_own_histogram(client):
+    before = _sample('http_probe_request_duration_seconds_count', {'endpoint': 'health'})
+    client.get('/health')
+    assert _sample('http_probe_request_duration_seconds_count', {'endpoint': 'health'}) == before + 1
+
+
+def test_metrics_exposition_is_cached(client):
+    first = client.get('/metrics').data
+    client.post('/api/track', json={'event': 'demo_view'})
+    assert client.get('/metrics').data == first
+    server_module._metrics_cache.clear()
+    assert client.get('/metrics').data != first
@@ -0,0 +1,43 @@
+"""
+Tests for server/body_limits.py — per-route limits and the in-flight byte budget.
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.body_limits import (
+    InflightBudget, body_limit, DEFAULT_BODY_LIMIT, MAX_BODY_LIMIT, ROUTE_BODY_LIMITS,
+)
+
+
+def test_route_limits():
+    assert body_limit('generate_pdf') == ROUTE_BODY_LIMITS['generate_pdf']
+    assert body_limit('track_event') < body_limit('chat') < body_limit('generate_pdf')
+    assert body_limit('no_such_endpoint') == DEFAULT_BODY_LIMIT
+    assert body_limit(None) == DEFAULT_BODY_LIMIT
+    assert MAX_BODY_LIMIT == max(ROUTE_BODY_LIMITS.values())
+
+
+def test_budget_is_per_ip():
+    budget = InflightBudget(per_ip=100)
+    assert budget.acquire('a', 60)
+    assert not budget.acquire('a', 41)
+    assert budget.acquire('a', 40)
+    assert budget.acquire('b', 100)
+    assert budget.used('a') == 100
+
+
+def test_budget_release():
+    budget = InflightBudget(per_ip=100)
+    budget.acquire('a', 70)
+    budget.release('a', 70)
+    assert budget.used('a') == 0
+    assert budget.acquire('a', 100)
+
+
+def test_rejected_acquire_charges_nothing():
+    budget = InflightBudget(per_ip=100)
+    assert not budget.acquire('a', 101)
+    assert budget.used('a') == 0
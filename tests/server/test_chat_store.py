@@ -0,0 +1,114 @@
+"""
+Tests for server/chat_store.py — queued, group-committed chat persistence.
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.chat_store import ChatWriter, CHAT_PERSIST_BACKPRESSURE
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'writer.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, conv TEXT, seq INTEGER)')
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT conv, seq FROM events ORDER BY id').fetchall()
+    conn.close()
+    return rows
+
+
+def _insert(conv, seq):
+    return [('INSERT INTO events (conv, seq) VALUES (?, ?)', (conv, seq))]
+
+
+def test_flush_commits_all_events(db_path):
+    """flush() should return only once every submitted event is committed."""
+    writer = ChatWriter(lambda: db_path)
+    for i in range(50):
+        writer.submit('a', _insert('a', i))
+    assert writer.flush(timeout=5)
+    assert len(_rows(db_path)) == 50
+    writer.close()
+
+
+def test_per_conversation_order_preserved(db_path):
+    """Events for one conversation should commit in submission order."""
+    writer = ChatWriter(lambda: db_path, batch_max=7)
+    for i in range(40):
+        writer.submit('a', _insert('a', i))
+        writer.submit('b', _insert('b', i))
+    writer.flush(timeout=5)
+    rows = _rows(db_path)
+    assert [s for c, s in rows if c == 'a'] == list(range(40))
+    assert [s for c, s in rows if c == 'b'] == list(range(40))
+    writer.close()
+
+
+def test_wait_for_conversation(db_path):
+    """wait_for() should see a conversation's events as committed."""
+    writer = ChatWriter(lambda: db_path)
+    writer.submit('conv-1', _insert('conv-1', 1))
+    assert writer.wait_for('conv-1', timeout=5)
+    assert ('conv-1', 1) in _rows(db_path)
+    writer.close()
+
+
+def test_close_drains_queue(db_path):
+    """close() should durably flush everything still queued."""
+    writer = ChatWriter(lambda: db_path)
+    for i in range(20):
+        writer.submit('a', _insert('a', i))
+    writer.close()
+    assert len(_rows(db_path)) == 20
+    with pytest.raises(RuntimeError):
+        writer.submit('a', _insert('a', 99))
+
+
+def test_bad_event_does_not_drop_batch(db_path):
+    """A failing statement should only lose its own event."""
+    writer = ChatWriter(lambda: db_path)
+    writer.submit('a', _insert('a', 1))
+    writer.submit('a', [('INSERT INTO missing_table VALUES (?)', (1,))])
+    writer.submit('a', _insert('a', 2))
+    writer.flush(timeout=5)
+    assert _rows(db_path) == [('a', 1), ('a', 2)]
+    writer.close()
+
+
+def test_full_queue_applies_backpressure(db_path):
+    """Submitting into a full queue should block and be counted."""
+    gate = threading.Event()
+    writer = ChatWriter(lambda: db_path, maxsize=1, batch_max=1)
+    original_commit = writer._commit
+
+    def slow_commit(events):
+        gate.wait(5)
+        original_commit(events)
+
+    writer._commit = slow_commit
+    before = CHAT_PERSIST_BACKPRESSURE._value.get()
+    writer.submit('a', _insert('a', 1))
+    writer.submit('a', _insert('a', 2))
+    t = threading.Thread(target=writer.submit, args=('a', _insert('a', 3)))
+    t.start()
+    t.join(0.2)
+    gate.set()
+    t.join(5)
+    writer.flush(timeout=5)
+    assert CHAT_PERSIST_BACKPRESSURE._value.get() > before
+    assert len(_rows(db_path)) == 3
+    writer.close()
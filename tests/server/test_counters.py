@@ -0,0 +1,149 @@
+"""
+Tests for server/counters.py — SQLite-backed counters shared by every worker.
+"""
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.counters import CounterCollector, CounterService
+
+NAMES = ('views', 'votes')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _external_add(path, name, n):
+    """Another worker's increment, straight to SQLite."""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute('UPDATE counters SET value = value + ? WHERE name = ?', (n, name))
+    conn.close()
+
+
+def test_add_and_totals(tmp_path):
+    path = str(tmp_path / 'c.db')
+    service = CounterService(lambda: path, NAMES)
+    assert service.totals() == {'views': 0, 'votes': 0}
+    service.add({'views': 3, 'votes': 1})
+    service.add({'views': 1})
+    assert service.totals() == {'views': 4, 'votes': 1}
+    assert service.get('views') == 4
+
+
+def test_reads_are_cached_until_refresh(tmp_path):
+    path = str(tmp_path / 'c.db')
+    clock = Clock()
+    service = CounterService(lambda: path, NAMES, refresh_interval=2, clock=clock)
+    service.totals()
+    _external_add(path, 'views', 5)
+    service.add({'views': 1})                   # own increments show immediately
+    assert service.get('views') == 1
+    clock.now = 2
+    assert service.get('views') == 6
+
+
+def test_restart_does_not_double_count(tmp_path):
+    path = str(tmp_path / 'c.db')
+    CounterService(lambda: path, NAMES).add({'views': 7})
+    for _ in range(3):
+        restarted = CounterService(lambda: path, NAMES)
+        assert restarted.get('views') == 7
+
+
+def test_prime_seeds_cache(tmp_path):
+    path = str(tmp_path / 'c.db')
+    service = CounterService(lambda: path, NAMES, refresh_interval=60)
+    service.prime({'views': 9})
+    assert service.totals() == {'views': 9, 'votes': 0}
+
+
+def test_collector_exports_totals(tmp_path):
+    path = str(tmp_path / 'c.db')
+    service = CounterService(lambda: path, NAMES, refresh_interval=0)
+    registry = CollectorRegistry()
+    registry.register(CounterCollector(service, {'views': ('page_views', 'Page views')}))
+    service.totals()
+    _external_add(path, 'views', 4)
+    body = generate_latest(registry).decode()
+    assert 'page_views_total 4.0' in body
+    assert 'votes' not in body
+
+
+def test_stale_cache_served_when_read_fails(tmp_path):
+    path = str(tmp_path / 'c.db')
+    service = CounterService(lambda: path, NAMES, refresh_interval=0)
+    service.add({'votes': 2})
+    service.totals()
+    os.remove(path)
+    os.mkdir(path)                                # now unreadable as a database
+    assert service.get('votes') == 2
+
+
+# ─── Across processes ─────────────────────────────────────────
+
+def _service_worker(path, barrier, results):
+    service = CounterService(lambda: path, NAMES, refresh_interval=0)
+    for _ in range(25):
+        service.add({'views': 1})
+    barrier.wait(30)
+    results.put(service.totals())
+
+
+def test_totals_agree_across_processes(tmp_path):
+    path = str(tmp_path / 'c.db')
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(4)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_service_worker, args=(path, barrier, results)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    totals = [results.get(timeout=60) for _ in procs]
+    for p in procs:
+        p.join(10)
+    assert totals == [{'views': 100, 'votes': 0}] * 4
+
+
+def _app_worker(data_dir, barrier, results, events):
+    os.environ['CHAT_DB_DIR'] = data_dir
+    import server.app as server_module
+    server_module._counters.refresh_interval = 0
+    client = server_module.app.test_client()
+    for _ in range(events):
+        client.post('/api/track', json={'event': 'demo_view'})
+    barrier.wait(60)
+    metrics = client.get('/metrics').data.decode()
+    line = next(l for l in metrics.splitlines() if l.startswith('demo_page_views_total '))
+    results.put((client.get('/api/stats').get_json()['demo_views'], float(line.split()[1])))
+
+
+def _run_app_workers(data_dir, count, events):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(count)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_app_worker, args=(data_dir, barrier, results, events))
+             for _ in range(count)]
+    for p in procs:
+        p.start()
+    out = [results.get(timeout=120) for _ in procs]
+    for p in procs:
+        p.join(10)
+    return out
+
+
+def test_app_workers_and_restarts_report_same_totals(tmp_path):
+    """Three app processes, then a restart: /api/stats and /metrics match SQLite everywhere."""
+    data_dir = str(tmp_path)
+    assert _run_app_workers(data_dir, 3, 5) == [(15, 15.0)] * 3
+    assert _run_app_workers(data_dir, 2, 0) == [(15, 15.0)] * 2
@@ -0,0 +1,128 @@
+"""
+Tests for server/file_sender.py — Range/If-Range delivery of large static files.
+"""
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.file_sender import send_large_file, STATIC_BYTES_SERVED
+
+DATA = bytes(range(256)) * 4096  # 1 MiB, spans several mmap chunks
+ETAG = 'abc123'
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / 'big.bin'
+    path.write_bytes(DATA)
+    app = Flask(__name__)
+
+    @app.route('/big.bin', methods=['GET', 'HEAD'])
+    def big():
+        return send_large_file(str(path), 'application/octet-stream', ETAG, 'no-cache')
+
+    return app.test_client()
+
+
+def test_full_download(client):
+    """Without Range the whole file is returned with Accept-Ranges."""
+    resp = client.get('/big.bin')
+    assert resp.status_code == 200
+    assert resp.headers['Accept-Ranges'] == 'bytes'
+    assert resp.headers['Content-Length'] == str(len(DATA))
+    assert resp.data == DATA
+
+
+def test_byte_range(client):
+    """A single byte range should return 206 with exactly those bytes."""
+    resp = client.get('/big.bin', headers={'Range': 'bytes=100-299999'})
+    assert resp.status_code == 206
+    assert resp.headers['Content-Range'] == f'bytes 100-299999/{len(DATA)}'
+    assert resp.data == DATA[100:300000]
+
+
+def test_suffix_range(client):
+    """bytes=-N should return the last N bytes."""
+    resp = client.get('/big.bin', headers={'Range': 'bytes=-10'})
+    assert resp.status_code == 206
+    assert resp.data == DATA[-10:]
+
+
+def test_unsatisfiable_range(client):
+    """A range past the end of the file should return 416."""
+    resp = client.get('/big.bin', headers={'Range': f'bytes={len(DATA) + 5}-'})
+    assert resp.status_code == 416
+    assert resp.headers['Content-Range'] == f'bytes */{len(DATA)}'
+
+
+def test_if_range_match_resumes(client):
+    """A matching If-Range ETag should honour the Range."""
+    resp = client.get('/big.bin', headers={'Range': 'bytes=0-9', 'If-Range': f'"{ETAG}"'})
+    assert resp.status_code == 206
+    assert resp.data == DATA[:10]
+
+
+def test_if_range_mismatch_sends_full(client):
+    """A stale If-Range validator should fall back to the full file."""
+    resp = client.get('/big.bin', headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+    assert resp.status_code == 200
+    assert resp.data == DATA
+
+
+def test_multiple_ranges_send_full(client):
+    """Multi-range requests are answered with the full representation."""
+    resp = client.get('/big.bin', headers={'Range': 'bytes=0-9,20-29'})
+    assert resp.status_code == 200
+    assert len(resp.data) == len(DATA)
+
+
+def test_not_modified(client):
+    """A matching If-None-Match should return 304 without a body."""
+    resp = client.get('/big.bin', headers={'If-None-Match': f'"{ETAG}"'})
+    assert resp.status_code == 304
+    assert resp.data == b''
+
+
+def test_head_has_length_without_body(client):
+    """HEAD should report the length without opening the file body."""
+    resp = client.head('/big.bin')
+    assert resp.status_code == 200
+    assert resp.headers['Content-Length'] == str(len(DATA))
+    assert resp.data == b''
+
+
+def test_server_file_wrapper_used(client):
+    """When the server offers wsgi.file_wrapper it receives a positioned file."""
+    wrapped = []
+
+    class FakeWrapper:
+        def __init__(self, filelike, blksize):
+            wrapped.append(filelike)
+            self.filelike = filelike
+
+        def __iter__(self):
+            yield self.filelike.read(50)
+
+        def close(self):
+            self.filelike.close()
+
+    before = STATIC_BYTES_SERVED.labels(method='sendfile')._value.get()
+    resp = client.get('/big.bin', headers={'Range': 'bytes=1000-1049'},
+                      environ_overrides={'wsgi.file_wrapper': FakeWrapper})
+    assert resp.status_code == 206
+    assert resp.data == DATA[1000:1050]
+    resp.close()
+    assert len(wrapped) == 1
+    assert STATIC_BYTES_SERVED.labels(method='sendfile')._value.get() - before == 50
+
+
+def test_mmap_path_records_bytes(client):
+    """The mmap fallback should book the bytes it delivered."""
+    before = STATIC_BYTES_SERVED.labels(method='mmap')._value.get()
+    client.get('/big.bin', headers={'Range': 'bytes=0-999'}).close()
+    assert STATIC_BYTES_SERVED.labels(method='mmap')._value.get() - before == 1000
@@ -0,0 +1,113 @@
+"""
+Tests for server/inventory.py — persisted bunk stock and delta sync.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.inventory import InventoryStore, InventoryError, MAX_BATCH
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'inventory.db')
+    return InventoryStore(lambda: path)
+
+
+def _bunk(id, current=10, capacity=100, **extra):
+    return dict(id=id, name=f'Bunk {id}', category='Dimensional', capacity=capacity,
+                current=current, unitPrice=3.48, unitWeight=9,
+                dims={'w': 3.5, 'h': 1.5, 'l': 96}, **extra)
+
+
+def test_empty_yard(store):
+    """A fresh store is at version 0 with no bunks."""
+    assert store.version() == 0
+    assert store.snapshot() == (0, [])
+
+
+def test_batch_applied_under_one_version(store):
+    """Every bunk in a batch shares the new version."""
+    version, updated = store.apply([_bunk('a'), _bunk('b')])
+    assert (version, updated) == (1, 2)
+    _, bunks = store.snapshot()
+    assert [(b['id'], b['current'], b['version']) for b in bunks] == [('a', 10, 1), ('b', 10, 1)]
+    assert bunks[0]['dims'] == {'w': 3.5, 'h': 1.5, 'l': 96}
+    assert bunks[0]['flagged'] is False
+
+
+def test_since_returns_only_changed_bunks(store):
+    """A delta query skips bunks that haven't changed since the given version."""
+    store.apply([_bunk('a'), _bunk('b'), _bunk('c')])
+    store.apply([{'id': 'b', 'current': 50}])
+    version, bunks = store.snapshot(since=1)
+    assert version == 2
+    assert [(b['id'], b['current']) for b in bunks] == [('b', 50)]
+    assert store.snapshot(since=2) == (2, [])
+
+
+def test_noop_updates_do_not_bump_version(store):
+    """Re-sending identical stock shouldn't make clients re-download it."""
+    store.apply([_bunk('a')])
+    assert store.apply([_bunk('a')]) == (1, 0)
+
+
+def test_delta_adjusts_and_clamps(store):
+    """Relative changes apply to stored stock, clamped to [0, capacity]."""
+    store.apply([_bunk('a', current=10)])
+    store.apply([{'id': 'a', 'delta': -4}, {'id': 'a', 'delta': -4}])
+    assert store.snapshot()[1][0]['current'] == 2
+    store.apply([{'id': 'a', 'delta': 500}])
+    assert store.snapshot()[1][0]['current'] == 100
+    store.apply([{'id': 'a', 'delta': -500}])
+    assert store.snapshot()[1][0]['current'] == 0
+
+
+def test_invalid_batch_applies_nothing(store):
+    """One bad update rejects the whole batch."""
+    store.apply([_bunk('a')])
+    with pytest.raises(InventoryError):
+        store.apply([{'id': 'a', 'current': 5}, {'id': 'b', 'current': 5}])  # b has no capacity
+    with pytest.raises(InventoryError):
+        store.apply([{'id': 'a', 'current': -1}])
+    with pytest.raises(InventoryError):
+        store.apply([{'id': 'a', 'current': 5, 'delta': 1}])
+    with pytest.raises(InventoryError):
+        store.apply([{'id': 'a'}] * (MAX_BATCH + 1))
+    with pytest.raises(InventoryError):
+        store.apply({'id': 'a'})
+    assert store.snapshot()[1][0]['current'] == 10
+    assert store.version() == 1
+
+
+@pytest.mark.parametrize('update', [
+    {'capacity': 1e30},
+    {'current': float('inf')},
+    {'unitPrice': float('nan')},
+    {'unitWeight': True},
+    {'dims': {'w': float('inf'), 'h': 1.5, 'l': 96}},
+    {'dims': {'w': 3.5, 'h': 1.5, 'l': 1e30}},
+    {'dims': [3.5, 1.5, 96]},
+])
+def test_out_of_range_numbers_rejected(store, update):
+    """Every number, including each dims member, must be finite and in range."""
+    with pytest.raises(InventoryError):
+        store.apply([dict(_bunk('a'), **update)])
+    assert store.version() == 0
+
+
+def test_unknown_dims_keys_dropped(store):
+    store.apply([dict(_bunk('a'), dims={'w': 3.5, 'h': 1.5, 'l': 96, 'note': 'x'})])
+    assert store.snapshot()[1][0]['dims'] == {'w': 3.5, 'h': 1.5, 'l': 96}
+
+
+def test_snapshot_feeds_planner(store):
+    """Stored bunks are valid /api/plan input."""
+    from server.planner import plan_restock
+    store.apply([_bunk('a', current=10), _bunk('b', current=90, flagged=True)])
+    plan = plan_restock(store.snapshot()[1])
+    assert [(i['id'], i['toOrder']) for i in plan['items']] == [('a', 90), ('b', 10)]
@@ -0,0 +1,224 @@
+"""
+Tests for server/llm_gateway.py — concurrency cap, deadlines, retries,
+coalescing and the circuit breaker.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.llm_gateway import (
+    LLMGateway, CircuitBreaker, CircuitOpen, LLMBusy, LLMTimeout, make_openai_client, _retryable,
+)
+from server.openai_stub import OpenAIStub
+
+MESSAGES = [{'role': 'user', 'content': 'Hi'}]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+        headers = {'retry-after': retry_after} if retry_after else {}
+        self.response = type('Response', (), {'headers': headers})()
+
+
+class FakeClient:
+    """Answers ``create`` from a script of results and exceptions."""
+
+    def __init__(self, *script, delay=0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = type('Chat', (), {'completions': self})()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+            outcome = self.script.pop(0) if self.script else 'ok'
+        time.sleep(self.delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _gateway(client, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return LLMGateway(lambda: client, **kwargs)
+
+
+def test_passes_request_and_remaining_deadline():
+    client = FakeClient('reply')
+    assert _gateway(client, deadline=5).complete(model='m', messages=MESSAGES) == 'reply'
+    call = client.calls[0]
+    assert call['model'] == 'm' and call['messages'] == MESSAGES
+    assert 0 < call['timeout'] <= 5
+
+
+def test_retries_transient_failures():
+    client = FakeClient(StatusError(503), TimeoutError(), 'reply')
+    assert _gateway(client, retries=2).complete(messages=MESSAGES) == 'reply'
+    assert len(client.calls) == 3
+
+
+def test_gives_up_after_retries():
+    client = FakeClient(StatusError(500), StatusError(500), StatusError(500))
+    with pytest.raises(StatusError):
+        _gateway(client, retries=1).complete(messages=MESSAGES)
+    assert len(client.calls) == 2
+
+
+def test_client_errors_are_not_retried():
+    client = FakeClient(StatusError(400))
+    gateway = _gateway(client)
+    with pytest.raises(StatusError):
+        gateway.complete(messages=MESSAGES)
+    assert len(client.calls) == 1
+    assert not gateway.breaker.is_open
+
+
+def test_retry_after_respected():
+    client = FakeClient(StatusError(429, retry_after='0.2'), 'reply')
+    start = time.monotonic()
+    assert _gateway(client).complete(messages=MESSAGES) == 'reply'
+    assert time.monotonic() - start >= 0.2
+
+
+def test_no_retry_past_deadline():
+    """A Retry-After longer than the remaining deadline ends the call at once."""
+    client = FakeClient(StatusError(429, retry_after='30'), 'reply')
+    start = time.monotonic()
+    with pytest.raises(StatusError):
+        _gateway(client, deadline=1).complete(messages=MESSAGES)
+    assert time.monotonic() - start < 0.5
+
+
+def test_retryable_classification():
+    assert _retryable(StatusError(429)) and _retryable(StatusError(502))
+    assert not _retryable(StatusError(400)) and not _retryable(RuntimeError())
+    assert _retryable(ConnectionResetError())
+
+
+def test_concurrency_cap_and_busy():
+    client = FakeClient(delay=0.3)
+    gateway = _gateway(client, max_concurrent=1, queue_timeout=0.05)
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(gateway.complete, messages=[{'role': 'user', 'content': 'a'}])
+        time.sleep(0.05)
+        second = pool.submit(gateway.complete, messages=[{'role': 'user', 'content': 'b'}])
+        assert first.result() == 'ok'
+        with pytest.raises(LLMBusy):
+            second.result()
+    assert len(client.calls) == 1
+    assert not gateway.breaker.is_open
+
+
+def test_identical_prompts_are_coalesced():
+    client = FakeClient('shared', delay=0.2)
+    gateway = _gateway(client)
+    with ThreadPoolExecutor(5) as pool:
+        results = list(pool.map(lambda _: gateway.complete(model='m', messages=MESSAGES), range(5)))
+    assert results == ['shared'] * 5
+    assert len(client.calls) == 1
+
+
+def test_coalesced_callers_share_the_error():
+    client = FakeClient(StatusError(400), delay=0.2)
+    gateway = _gateway(client)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(gateway.complete, messages=MESSAGES) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(StatusError):
+            future.result()
+    assert len(client.calls) == 1
+
+
+def test_streams_are_not_coalesced():
+    client = FakeClient(delay=0.1)
+    gateway = _gateway(client)
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(lambda _: gateway.complete(messages=MESSAGES, stream=True), range(2)))
+    assert len(client.calls) == 2
+
+
+def test_follower_respects_its_deadline():
+    client = FakeClient(delay=0.5)
+    gateway = _gateway(client)
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(gateway.complete, messages=MESSAGES)
+        time.sleep(0.05)
+        follower = pool.submit(gateway.complete, messages=MESSAGES, deadline=0.1)
+        with pytest.raises(LLMTimeout):
+            follower.result()
+        assert leader.result() == 'ok'
+
+
+def test_unconfigured_client_does_not_trip_breaker():
+    def missing_key():
+        raise ValueError('OPENAI_API_KEY environment variable is not set')
+    gateway = LLMGateway(missing_key, breaker=CircuitBreaker(failures=1))
+    with pytest.raises(ValueError):
+        gateway.complete(messages=MESSAGES)
+    assert not gateway.breaker.is_open
+
+
+def test_circuit_opens_and_recovers():
+    client = FakeClient(TimeoutError(), TimeoutError())
+    gateway = _gateway(client, retries=0, breaker=CircuitBreaker(failures=2, reset_after=0.2))
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            gateway.complete(messages=[{'role': 'user', 'content': str(time.time())}])
+    with pytest.raises(CircuitOpen) as exc:
+        gateway.complete(messages=MESSAGES)
+    assert exc.value.retry_after >= 1
+    assert len(client.calls) == 2
+
+    time.sleep(0.25)
+    assert gateway.complete(messages=MESSAGES) == 'ok'    # the probe
+    assert not gateway.breaker.is_open
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failures=1, reset_after=0.05)
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    with pytest.raises(CircuitOpen):
+        breaker.allow()      # only one probe at a time
+    breaker.failure()
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+
+def test_caps_upstream_concurrency_over_http():
+    """Against the stub server, at most max_concurrent calls reach upstream at once."""
+    with OpenAIStub(latency_ms=100, distribution='fixed') as stub:
+        client = make_openai_client('local', stub.base_url, pool_size=2, timeout=5)
+        gateway = LLMGateway(lambda: client, max_concurrent=2, queue_timeout=5)
+        with ThreadPoolExecutor(8) as pool:
+            replies = list(pool.map(
+                lambda i: gateway.complete(model='m', messages=[{'role': 'user', 'content': str(i)}]),
+                range(8)))
+        stats = stub.stats()
+    assert all(r.choices[0].message.content for r in replies)
+    assert stats['requests'] == 8
+    assert stats['peak_in_flight'] == 2
+    assert stats['connections'] == 2
+
+
+def test_retries_injected_server_errors_over_http():
+    with OpenAIStub(latency_ms=0, distribution='fixed', error_rate=0.5, error=503, seed=3) as stub:
+        client = make_openai_client('local', stub.base_url, timeout=5)
+        gateway = LLMGateway(lambda: client, retries=6, backoff=0.01)
+        for i in range(10):
+            gateway.complete(model='m', messages=[{'role': 'user', 'content': str(i)}])
+        stats = stub.stats()
+    assert stats['errors'] > 0
+    assert stats['requests'] == 10 + stats['errors']
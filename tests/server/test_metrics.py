@@ -0,0 +1,114 @@
+"""
+Tests for server/metrics.py — label bounds, per-class buckets, exposition cache.
+"""
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from prometheus_client import REGISTRY
+
+from server.metrics import (
+    BoundedLabel, ExpositionCache, LATENCY_HISTOGRAMS, REQUEST_LATENCY,
+    method_label, observe_request, status_label,
+)
+from server.route_policy import CLASS_DEFAULTS
+
+
+def test_method_label():
+    assert method_label('GET') == 'GET'
+    assert method_label('BREW') == 'other'
+
+
+def test_status_label():
+    assert status_label(200) == '200'
+    assert status_label(429) == '429'
+    assert status_label(418) == '4xx'
+    assert status_label(599) == '5xx'
+
+
+def test_bounded_label_caps_distinct_values():
+    label = BoundedLabel(3)
+    assert [label(v) for v in 'abcde'] == ['a', 'b', 'c', 'other', 'other']
+    assert label('a') == 'a'
+
+
+def test_every_route_class_has_a_histogram():
+    assert set(CLASS_DEFAULTS) <= set(REQUEST_LATENCY)
+    assert REQUEST_LATENCY['api']._name == 'http_request_duration_seconds'
+    # Static buckets resolve well below the old 10 ms floor
+    assert LATENCY_HISTOGRAMS['static'][1][0] < 0.001
+    assert LATENCY_HISTOGRAMS['api'][1][-1] >= 30
+
+
+def test_observe_request_uses_class_histogram():
+    def bucket(name, le):
+        return REGISTRY.get_sample_value(f'{name}_bucket', {'endpoint': 'metrics_test', 'le': le}) or 0
+
+    before = bucket('http_static_request_duration_seconds', '0.0005')
+    observe_request('static', 'GET', 'metrics_test', 200, 0.0003)
+    assert bucket('http_static_request_duration_seconds', '0.0005') == before + 1
+    assert REGISTRY.get_sample_value(
+        'http_requests_total', {'method': 'GET', 'endpoint': 'metrics_test', 'status': '200'}) >= 1
+
+    observe_request('api', 'BREW', 'metrics_test', 418, 0.2, weight=10)
+    assert REGISTRY.get_sample_value(
+        'http_requests_total', {'method': 'other', 'endpoint': 'metrics_test', 'status': '4xx'}) >= 10
+
+
+def test_exposition_cache_reuses_body_within_ttl():
+    renders = []
+    cache = ExpositionCache(lambda: renders.append(1) or f'body {len(renders)}'.encode(), ttl=60)
+    assert cache.get() == cache.get() == b'body 1'
+    cache.clear()
+    assert cache.get() == b'body 2'
+
+
+def test_exposition_cache_ttl_zero_always_renders():
+    renders = []
+    cache = ExpositionCache(lambda: renders.append(1) or b'x', ttl=0)
+    cache.get()
+    cache.get()
+    assert len(renders) == 2
+
+
+def test_exposition_cache_renders_once_under_concurrency():
+    renders = []
+
+    def render():
+        renders.append(1)
+        time.sleep(0.05)
+        return b'x'
+
+    cache = ExpositionCache(render, ttl=60)
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(renders) == 1
+
+
+def test_exposition_cache_serves_stale_while_refreshing():
+    gate = threading.Event()
+    bodies = iter([b'old', b'new'])
+
+    def render():
+        body = next(bodies)
+        if body == b'new':
+            gate.wait(5)
+        return body
+
+    cache = ExpositionCache(render, ttl=0.01)
+    assert cache.get() == b'old'
+    time.sleep(0.02)
+    refresher = threading.Thread(target=cache.get)
+    refresher.start()
+    time.sleep(0.01)
+    assert cache.get() == b'old'        # does not wait for the slow render
+    gate.set()
+    refresher.join()
+    assert cache._body == b'new'
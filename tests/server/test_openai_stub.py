@@ -0,0 +1,120 @@
+"""
+Tests for server/openai_stub.py — the local OpenAI-compatible server, driven
+through the real OpenAI SDK.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from openai import OpenAI, APITimeoutError, InternalServerError, RateLimitError
+
+from server.openai_stub import OpenAIStub, DEFAULT_REPLY
+
+MESSAGES = [{'role': 'user', 'content': 'Tell me about Jason'}]
+
+
+def _client(stub, **kwargs):
+    return OpenAI(api_key='local', base_url=stub.base_url, max_retries=0, **kwargs)
+
+
+@pytest.fixture
+def stub():
+    with OpenAIStub(latency_ms=0, distribution='fixed') as s:
+        yield s
+
+
+def test_completion(stub):
+    resp = _client(stub).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+    assert resp.choices[0].message.content == DEFAULT_REPLY
+    assert resp.choices[0].finish_reason == 'stop'
+    assert resp.usage.completion_tokens == len(DEFAULT_REPLY.split())
+
+
+def test_max_tokens_truncates(stub):
+    resp = _client(stub).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES, max_tokens=3)
+    assert resp.choices[0].message.content == ' '.join(DEFAULT_REPLY.split()[:3])
+    assert resp.choices[0].finish_reason == 'length'
+
+
+def test_streaming(stub):
+    stream = _client(stub).chat.completions.create(
+        model='gpt-4o-mini', messages=MESSAGES, stream=True, stream_options={'include_usage': True})
+    chunks = list(stream)
+    text = ''.join(c.choices[0].delta.content or '' for c in chunks if c.choices)
+    assert text == DEFAULT_REPLY
+    assert chunks[-1].usage.completion_tokens == len(DEFAULT_REPLY.split())
+
+
+def test_connections_are_reused(stub):
+    client = _client(stub)
+    for _ in range(5):
+        client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+    list(client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES, stream=True))
+    stats = stub.stats()
+    assert stats['requests'] == 6
+    assert stats['connections'] == 1
+
+
+def test_models(stub):
+    assert [m.id for m in _client(stub).models.list()] == ['gpt-4o-mini']
+
+
+def test_latency_and_token_rate():
+    with OpenAIStub(latency_ms=100, distribution='fixed', tokens_per_sec=100, reply='a b c d e') as stub:
+        start = time.perf_counter()
+        _client(stub).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+        assert time.perf_counter() - start >= 0.15
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'lognormal'])
+def test_latency_distribution_mean(distribution):
+    stub = OpenAIStub(latency_ms=200, distribution=distribution, sigma=0.5, seed=1)
+    try:
+        delays = [stub.first_token_delay() for _ in range(5000)]
+    finally:
+        stub.stop()
+    assert min(delays) >= 0
+    assert 0.19 < sum(delays) / len(delays) < 0.21
+    assert len(set(delays)) > 1
+
+
+def test_rate_limit_injection():
+    with OpenAIStub(latency_ms=0, distribution='fixed', error_rate=1.0, error=429) as stub:
+        with pytest.raises(RateLimitError) as exc:
+            _client(stub).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+        assert exc.value.response.headers['Retry-After'] == '1'
+        assert stub.stats()['errors'] == 1
+
+
+def test_server_error_injection():
+    with OpenAIStub(latency_ms=0, distribution='fixed', error_rate=1.0, error=503) as stub:
+        with pytest.raises(InternalServerError):
+            _client(stub).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+
+
+def test_hang_hits_client_timeout():
+    with OpenAIStub(latency_ms=0, distribution='fixed', error_rate=1.0, error='hang') as stub:
+        with pytest.raises(APITimeoutError):
+            _client(stub, timeout=0.3).chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+
+
+def test_error_rate_is_a_fraction():
+    with OpenAIStub(latency_ms=0, distribution='fixed', error_rate=0.3, error=500, seed=7) as stub:
+        client = _client(stub)
+        failures = 0
+        for _ in range(200):
+            try:
+                client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+            except InternalServerError:
+                failures += 1
+    assert 40 < failures < 80
+
+
+def test_rejects_unknown_error():
+    with pytest.raises(ValueError):
+        OpenAIStub(error=418)
@@ -0,0 +1,133 @@
+"""
+Tests for server/pdf_graphics.py — vector truck diagrams and yard chart.
+"""
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from reportlab.graphics.shapes import Drawing, Rect
+
+from server.pdf_graphics import (
+    truck_diagrams, yard_chart, category_color, get_fill_color,
+    _cached_layouts, _layout_cache, _truck_layouts, _item_key, _yard_bars,
+    LAYOUT_CACHE_SIZE, OTHER_COLOR, MAX_CHART_BARS,
+)
+from server.planner import DECK_LENGTH_IN
+
+
+def _item(name, to_order, category='Dimensional', unit_weight=9, dims=None):
+    return {'name': name, 'category': category, 'toOrder': to_order,
+            'unitWeight': unit_weight, 'dims': dims or {'w': 3.5, 'h': 1.5, 'l': 96}}
+
+
+def _rects(node):
+    for child in getattr(node, 'contents', ()):
+        if isinstance(child, Rect):
+            yield child
+        else:
+            yield from _rects(child)
+
+
+def test_one_drawing_per_truck_plus_legend():
+    """A load over one truck's payload should be drawn as several trucks."""
+    drawings = truck_diagrams([_item('2x4x8', 8000)], width=500)
+    assert all(isinstance(d, Drawing) for d in drawings)
+    # 72,000 lbs → two trucks, then the legend
+    assert len(drawings) == 3
+
+
+def test_bunks_colored_by_category():
+    """Each category's bunks should be filled with its color."""
+    drawings = truck_diagrams([
+        _item('2x4x8', 100), _item('Plywood', 20, category='Sheet', unit_weight=70,
+                                   dims={'w': 48, 'h': 0.75, 'l': 96}),
+    ], width=500)
+    fills = {r.fillColor for r in _rects(drawings[0])}
+    assert category_color('Dimensional') in fills
+    assert category_color('Sheet') in fills
+    assert category_color('Nope') == OTHER_COLOR
+
+
+def test_blocks_stay_on_deck():
+    """Overfull trucks are squeezed so every block fits the deck length."""
+    items = [_item(f'Post {i}', 40, dims={'w': 3.5, 'h': 3.5, 'l': 144}) for i in range(12)]
+    for layout in _truck_layouts(_item_key(items), 24)[0]:
+        for block in layout['blocks']:
+            assert block['x'] + block['length'] <= DECK_LENGTH_IN + 1e-6
+
+
+def test_layout_is_cached_and_deterministic():
+    """The same line items should reuse the cached layout."""
+    items = [_item('2x4x8', 500), _item('PT 4x4', 30, category='Treated')]
+    first = _cached_layouts(items, 24)
+    assert _cached_layouts([dict(i) for i in items], 24) is first
+    assert _cached_layouts(items, 1) is not first
+
+
+def test_layout_cache_is_bounded_and_keyed_by_digest():
+    """Large orders are keyed by a fixed-size digest, and old entries are evicted."""
+    big = [_item(f'Bunk {i}', 5) for i in range(2000)]
+    _cached_layouts(big, 24)
+    assert all(len(key) == 32 for key in _layout_cache)
+    for n in range(LAYOUT_CACHE_SIZE + 5):
+        _cached_layouts([_item('2x4x8', n + 1)], 24)
+    assert len(_layout_cache) == LAYOUT_CACHE_SIZE
+
+
+def test_truck_count_capped():
+    """Only max_trucks trucks are drawn; the legend notes the rest."""
+    drawings = truck_diagrams([_item('2x4x8', 10000)], width=500, max_trucks=1)
+    assert len(drawings) == 2
+    notes = [s.text for s in drawings[-1].contents if hasattr(s, 'text')]
+    assert any('more truck' in n for n in notes)
+
+
+def test_only_drawn_trucks_are_laid_out():
+    """A heavy order lays out max_trucks trucks but still reports the full count."""
+    start = time.perf_counter()
+    drawings = truck_diagrams([_item('Beam', 10000, unit_weight=48000)], width=500, max_trucks=3)
+    assert time.perf_counter() - start < 1
+    assert len(drawings) == 4
+    titles = [s.text for s in drawings[0].contents if hasattr(s, 'text')]
+    assert any('OF 10000' in t for t in titles)
+    notes = [s.text for s in drawings[-1].contents if hasattr(s, 'text')]
+    assert any('9997 more trucks' in n for n in notes)
+
+
+def test_nothing_to_ship():
+    """Zero-quantity orders produce no diagrams."""
+    assert truck_diagrams([_item('2x4x8', 0)], width=500) == []
+
+
+def _bunk(name, current, capacity=100, flagged=False):
+    return {'name': name, 'current': current, 'capacity': capacity, 'flagged': flagged}
+
+
+def test_yard_chart_bars_use_fill_thresholds():
+    """Each bunk's bar should be filled with get_fill_color for its stock level."""
+    chart = yard_chart([_bunk('Full', 90), _bunk('Low', 10), _bunk('Empty', 0)], width=500)
+    fills = [r.fillColor for r in _rects(chart)]
+    for pct in (0.9, 0.1):
+        assert get_fill_color(pct) in fills
+
+
+def test_yard_chart_outlines_flagged_bunks():
+    """Flagged bunks get an accent outline."""
+    plain = len(list(_rects(yard_chart([_bunk('A', 50)], width=500))))
+    flagged = len(list(_rects(yard_chart([_bunk('A', 50, flagged=True)], width=500))))
+    assert flagged == plain + 1
+
+
+def test_yard_chart_bins_large_yards():
+    """Yards past MAX_CHART_BARS are binned so bars stay readable."""
+    bars = _yard_bars([_bunk(f'B{i}', 50) for i in range(MAX_CHART_BARS * 3)])
+    assert len(bars) <= MAX_CHART_BARS
+    assert bars[0][1] == 0.5
+
+
+def test_yard_chart_empty():
+    """No bunks means no chart."""
+    assert yard_chart([], width=500) is None
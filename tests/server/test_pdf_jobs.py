@@ -0,0 +1,195 @@
+"""
+Tests for server/pdf_jobs.py — background PDF rendering with on-disk job state.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.pdf_jobs import PdfJobQueue, JobQueueFull
+
+
+def _render(data, out):
+    if data.get('fail'):
+        raise RuntimeError('boom')
+    out.write(b'%PDF-' + data.get('body', b'x'))
+    return 'order.pdf'
+
+
+def _wait(jobs, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.status(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError('job did not finish')
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    q = PdfJobQueue(_render, lambda: str(tmp_path), workers=2)
+    yield q
+    q.close()
+
+
+def test_submit_returns_queued_job(jobs):
+    """submit() returns at once with a queued job id."""
+    job = jobs.submit({})
+    assert job['status'] == 'queued'
+    assert len(job['id']) == 32
+
+
+def test_job_renders_to_disk(jobs):
+    """A finished job records its filename and size and exposes the PDF."""
+    job = _wait(jobs, jobs.submit({})['id'])
+    assert job['status'] == 'done'
+    assert job['filename'] == 'order.pdf'
+    assert job['size'] == 6
+    with open(jobs.result_path(job['id']), 'rb') as f:
+        assert f.read() == b'%PDF-x'
+
+
+def test_failed_render(jobs, tmp_path):
+    """A render error marks the job failed and leaves no partial PDF."""
+    job = _wait(jobs, jobs.submit({'fail': True})['id'])
+    assert job['status'] == 'failed'
+    assert job['error']
+    assert jobs.result_path(job['id']) is None
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(('.pdf', '.tmp'))]
+
+
+def test_unknown_and_malformed_ids(jobs):
+    """Unknown ids and anything that isn't a job id are simply not found."""
+    assert jobs.status('0' * 32) is None
+    assert jobs.status('../../etc/passwd') is None
+    assert jobs.result_path('nope') is None
+
+
+def test_state_visible_to_another_queue(jobs, tmp_path):
+    """Job state lives on disk, so another worker process can read it."""
+    job_id = jobs.submit({})['id']
+    _wait(jobs, job_id)
+    other = PdfJobQueue(_render, lambda: str(tmp_path))
+    assert other.status(job_id)['status'] == 'done'
+    assert other.result_path(job_id)
+
+
+def test_queue_full(tmp_path):
+    """A full queue rejects new jobs without leaving state behind."""
+    gate = threading.Event()
+
+    def slow(data, out):
+        gate.wait(5)
+        return 'order.pdf'
+
+    q = PdfJobQueue(slow, lambda: str(tmp_path), workers=1, maxsize=1)
+    try:
+        q.submit({})
+        deadline = time.time() + 5
+        while q._queue.qsize() and time.time() < deadline:
+            time.sleep(0.01)   # wait for the worker to take the first job
+        q.submit({})
+        before = set(os.listdir(tmp_path))
+        with pytest.raises(JobQueueFull):
+            q.submit({})
+        assert set(os.listdir(tmp_path)) == before
+    finally:
+        gate.set()
+        q.close()
+
+
+def test_cleanup_removes_expired_jobs(jobs, tmp_path):
+    """Files older than the TTL are deleted; fresh ones are kept."""
+    old_id = _wait(jobs, jobs.submit({})['id'])['id']
+    new_id = _wait(jobs, jobs.submit({})['id'])['id']
+    stale = time.time() - 7200
+    for suffix in ('.json', '.pdf'):
+        os.utime(tmp_path / (old_id + suffix), (stale, stale))
+    assert jobs.cleanup(force=True) == 2
+    assert jobs.status(old_id) is None
+    assert jobs.status(new_id)['status'] == 'done'
+
+
+def test_cleanup_is_rate_limited(jobs):
+    """Opportunistic cleanup runs at most once per interval."""
+    jobs.cleanup(force=True)
+    assert jobs.cleanup() == 0
+
+
+def _orphan(tmp_path, pid, status='running', age=0):
+    """Write a job state file as a worker that has since gone away would."""
+    job_id = os.urandom(16).hex()
+    path = tmp_path / (job_id + '.json')
+    path.write_text(json.dumps({'id': job_id, 'status': status, 'createdAt': 0,
+                                'startedAt': None, 'finishedAt': None, 'filename': None,
+                                'size': None, 'error': None, 'pid': pid}))
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return job_id
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_recover_fails_jobs_of_exited_workers(tmp_path):
+    """Unfinished jobs whose owner is gone or silent are failed on startup."""
+    dead = _orphan(tmp_path, _dead_pid())
+    silent = _orphan(tmp_path, os.getppid(), status='queued', age=600)
+    live = _orphan(tmp_path, os.getppid())
+    finished = _orphan(tmp_path, _dead_pid(), status='done', age=600)
+    q = PdfJobQueue(_render, lambda: str(tmp_path), stale_after=60)
+    assert q.recover() == 2
+    for job_id in (dead, silent):
+        job = q.status(job_id)
+        assert job['status'] == 'failed'
+        assert job['error'] == 'PDF worker exited before finishing'
+        assert job['finishedAt']
+    assert q.status(live)['status'] == 'running'
+    assert q.status(finished)['status'] == 'done'
+
+
+def test_status_fails_orphaned_job(tmp_path):
+    """A client polling an orphaned job sees it fail without a restart."""
+    job_id = _orphan(tmp_path, _dead_pid(), status='queued')
+    q = PdfJobQueue(_render, lambda: str(tmp_path))
+    assert q.status(job_id)['status'] == 'failed'
+    with open(tmp_path / (job_id + '.json')) as f:
+        assert json.load(f)['status'] == 'failed'
+
+
+def test_running_jobs_keep_a_fresh_heartbeat(tmp_path):
+    """The owner touches its unfinished jobs, so they are never seen as stale."""
+    gate = threading.Event()
+
+    def slow(data, out):
+        gate.wait(5)
+        return 'order.pdf'
+
+    q = PdfJobQueue(slow, lambda: str(tmp_path), workers=1,
+                    heartbeat_interval=0.02, stale_after=1)
+    try:
+        job_id = q.submit({})['id']
+        path = tmp_path / (job_id + '.json')
+        stale = time.time() - 600
+        os.utime(path, (stale, stale))
+        deadline = time.time() + 5
+        while os.path.getmtime(path) < stale + 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert time.time() - os.path.getmtime(path) < 1
+        assert q.recover() == 0
+        assert q.status(job_id)['status'] in ('queued', 'running')
+    finally:
+        gate.set()
+        q.close()
+    assert q.status(job_id)['status'] == 'done'
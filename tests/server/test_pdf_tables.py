@@ -0,0 +1,86 @@
+"""
+Tests for server/pdf_tables.py — chunked, lazily built line-item tables.
+"""
+import io
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+from reportlab.platypus import SimpleDocTemplate
+
+from server.pdf_graphics import FILL_BAND_COLORS, get_fill_color
+from server.pdf_tables import (
+    line_item_tables, fill_bands, row_height, _band_style, LazyTable, ROWS_PER_CHUNK,
+)
+
+
+def _items(n):
+    return [{'name': f'P{i}', 'category': 'Dimensional', 'current': i % 100, 'capacity': 100,
+             'toOrder': 100 - i % 100, 'unitPrice': 1.0, 'unitWeight': 9, 'totalCost': 1.0}
+            for i in range(n)]
+
+
+def test_items_split_into_chunks():
+    """Line items are split into ROWS_PER_CHUNK-row tables."""
+    chunks = line_item_tables(_items(ROWS_PER_CHUNK * 2 + 1), 0, 0, 0)
+    assert len(chunks) == 3
+    assert all(isinstance(c, LazyTable) for c in chunks)
+
+
+def test_only_last_chunk_has_totals():
+    """Each chunk repeats the header; the totals row closes the last one."""
+    chunks = line_item_tables(_items(5), 123, 456, 7.5, rows_per_chunk=2)
+    tables = [c._get() for c in chunks]
+    assert [t._nrows for t in tables] == [3, 3, 3]
+    assert tables[0]._cellvalues[1][0] == '1'
+    assert tables[2]._cellvalues[1][0] == '5'
+    assert tables[2]._cellvalues[-1][5] == '123'
+
+
+def test_empty_order_still_has_totals_row():
+    """Zero items produce a header plus totals table."""
+    chunks = line_item_tables([], 0, 0, 0)
+    assert len(chunks) == 1
+    assert chunks[0]._get()._nrows == 2
+
+
+def test_tables_built_lazily_and_released():
+    """Chunks build their Table at layout time and drop it once drawn."""
+    chunks = line_item_tables(_items(200), 0, 0, 0)
+    assert all(c._table is None for c in chunks)
+    doc = SimpleDocTemplate(io.BytesIO())
+    doc.build(list(chunks))
+    assert all(c._table is None for c in chunks)
+
+
+def test_fill_bands_match_get_fill_color():
+    """The vectorized bands pick the same colors as get_fill_color."""
+    levels = [0, 1, 19, 20, 21, 49, 50, 51, 79, 80, 81, 100]
+    items = [{'current': c, 'capacity': 100} for c in levels] + [{'current': 5, 'capacity': 0}]
+    bands = fill_bands(items)
+    expected = [get_fill_color(c / 100) for c in levels] + [get_fill_color(0)]
+    assert [FILL_BAND_COLORS[b] for b in bands] == expected
+
+
+def test_band_style_groups_runs():
+    """One default color command plus one per run of a different band."""
+    bands = np.array([4, 4, 4, 1, 1, 4, 2])
+    style = _band_style(bands)
+    assert style[0] == ('TEXTCOLOR', (3, 1), (3, 7), FILL_BAND_COLORS[4])
+    assert style[1:] == [
+        ('TEXTCOLOR', (3, 4), (3, 5), FILL_BAND_COLORS[1]),
+        ('TEXTCOLOR', (3, 7), (3, 7), FILL_BAND_COLORS[2]),
+    ]
+
+
+def test_chunks_sized_to_the_frame():
+    """With the frame height, each chunk fills exactly one page."""
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf)
+    chunks = line_item_tables(_items(500), 0, 0, 0, doc.height)
+    doc.build(list(chunks))
+    assert f'/Count {len(chunks)}'.encode() in buf.getvalue()
+    assert all(h == row_height() for h in chunks[0]._get()._rowHeights)
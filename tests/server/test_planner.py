@@ -0,0 +1,127 @@
+"""
+Tests for server/planner.py — restock quantities and flatbed bin packing.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.planner import plan_restock, PlanError, DECK_AREA_SQIN, MAX_TRUCKS, TRUCK_MAX_LBS
+from benchmarks.bench_planner import make_yard
+
+
+def _bunk(id, capacity, current, unit_weight=10, unit_price=2.0, dims=None, **extra):
+    return dict(id=id, name=f'Bunk {id}', category='Dimensional', capacity=capacity,
+                current=current, unitWeight=unit_weight, unitPrice=unit_price,
+                dims=dims or {'w': 3.5, 'h': 1.5, 'l': 96}, **extra)
+
+
+def test_orders_only_low_bunks():
+    """Bunks below the reorder threshold are filled back to capacity."""
+    plan = plan_restock([_bunk('a', 100, 20), _bunk('b', 100, 90), _bunk('c', 100, 49)])
+    assert [(i['id'], i['toOrder']) for i in plan['items']] == [('a', 80), ('c', 51)]
+    assert plan['totals']['pieces'] == 131
+    assert plan['totals']['weight'] == 1310
+    assert plan['totals']['cost'] == 262.0
+
+
+def test_flagged_bunks_always_ordered():
+    """A flagged bunk is restocked even when above the threshold."""
+    plan = plan_restock([_bunk('a', 100, 90, flagged=True)])
+    assert plan['items'][0]['toOrder'] == 10
+
+
+def test_explicit_to_order_is_used():
+    """An explicit toOrder overrides the fill-to-capacity quantity."""
+    plan = plan_restock([_bunk('a', 100, 90, toOrder=25), _bunk('b', 100, 20, toOrder=0)])
+    assert [(i['id'], i['toOrder']) for i in plan['items']] == [('a', 25)]
+
+
+def test_items_match_generate_pdf_shape():
+    """Order lines should carry every field /generate-pdf reads."""
+    item = plan_restock([_bunk('a', 10, 0)])['items'][0]
+    for key in ('name', 'category', 'current', 'capacity', 'toOrder',
+                'unitPrice', 'unitWeight', 'totalCost'):
+        assert key in item
+
+
+def test_heavy_order_split_across_trucks():
+    """An order heavier than one truck is split into truck-sized loads."""
+    plan = plan_restock([_bunk('a', 10000, 0, unit_weight=10, dims={'w': 1, 'h': 1, 'l': 1})])
+    assert plan['totals']['trucks'] == 3
+    assert [t['weight'] for t in plan['trucks']] == [48000, 48000, 4000]
+
+
+def test_deck_area_limits_light_loads():
+    """Light but bulky loads should be limited by deck footprint, not weight."""
+    bulky = {'w': 48, 'h': 48, 'l': 96}  # one piece covers 4608 sq in of deck
+    plan = plan_restock([_bunk('a', 30, 0, unit_weight=1, dims=bulky)])
+    per_truck = int(DECK_AREA_SQIN // (48 * 48 * 96 / 48))
+    assert plan['trucks'][0]['pieces'] == per_truck
+    assert all(t['deckUtilization'] <= 1.0 for t in plan['trucks'])
+
+
+def test_large_yard_respects_limits_and_near_optimal():
+    """A 20k-bunk yard should never overload a truck and stay near the lower bound."""
+    plan = plan_restock(make_yard(20_000))
+    totals = plan['totals']
+    assert all(t['weight'] <= TRUCK_MAX_LBS for t in plan['trucks'])
+    assert all(t['deckUtilization'] <= 1.0 + 1e-9 for t in plan['trucks'])
+    assert sum(t['pieces'] for t in plan['trucks']) == totals['pieces']
+    assert totals['trucks'] <= totals['minTrucks'] * 1.05
+
+
+def test_columnar_input_matches_records():
+    """Column-oriented input should produce the same plan as records."""
+    bunks = make_yard(500)
+    cols = {k: [b[k] for b in bunks] for k in
+            ('id', 'name', 'category', 'capacity', 'current', 'unitWeight', 'unitPrice')}
+    cols['dims'] = {k: [b['dims'][k] for b in bunks] for k in 'whl'}
+    assert plan_restock(cols) == plan_restock(bunks)
+
+
+def test_empty_input():
+    """No bunks means no trucks."""
+    plan = plan_restock([])
+    assert plan['trucks'] == []
+    assert plan['totals']['trucks'] == 0
+
+
+@pytest.mark.parametrize('bunks', [
+    'nope',
+    [1, 2],
+    [_bunk('a', 'lots', 0)],
+    [_bunk('a', -5, 0)],
+    [_bunk('a', 1e30, 0)],
+    [_bunk('a', 10, 0, toOrder=1_000_000)],
+    [_bunk('a', 10, 0, dims={'w': 1e300, 'h': 1, 'l': 1})],
+    {'capacity': [10, 20], 'current': [1]},
+    {'capacity': [10, 10], 'current': [0, 0], 'name': 'a'},
+    {'capacity': [10, 10], 'current': [0, 0], 'id': [1]},
+    {'capacity': [10, 10], 'current': [0, 0], 'flagged': [True]},
+    {'capacity': [10, 10], 'current': [0, 0], 'flagged': [[True], [False, True]]},
+    {'capacity': [10, 10], 'current': [0, 0], 'dims': 5},
+    {'capacity': 10},
+])
+def test_bad_input_rejected(bunks):
+    """Malformed bunks should raise PlanError."""
+    with pytest.raises(PlanError):
+        plan_restock(bunks)
+
+
+def test_piece_heavier_than_truck_rejected():
+    """A single piece over the payload limit can't be planned."""
+    with pytest.raises(PlanError):
+        plan_restock([_bunk('a', 1, 0, unit_weight=50000)])
+
+
+def test_truck_count_is_bounded():
+    """Orders needing more than MAX_TRUCKS trucks are rejected before packing."""
+    heavy = [_bunk(i, 10_000, 0, unit_weight=TRUCK_MAX_LBS) for i in range(MAX_TRUCKS // 10_000 + 1)]
+    with pytest.raises(PlanError, match='trucks'):
+        plan_restock(heavy)
+    with pytest.raises(PlanError):
+        plan_restock([_bunk('a', 10, 0)], truck_max_lbs=float('inf'))
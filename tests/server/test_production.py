@@ -0,0 +1,65 @@
+"""
+Tests for server/production.py — gunicorn launcher configuration.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.production import ProductionServer, build_options, _prepare_environment
+
+
+def test_options_from_environment():
+    """Workers, threads and port should come from the environment."""
+    env = {'PORT': '8080', 'WEB_CONCURRENCY': '3', 'GUNICORN_THREADS': '6'}
+    with patch.dict(os.environ, env):
+        options = build_options()
+    assert options['bind'] == '0.0.0.0:8080'
+    assert options['workers'] == 3
+    assert options['threads'] == 6
+    assert options['worker_class'] == 'gthread'
+    assert options['preload_app'] is True
+
+
+def test_gunicorn_accesslog_only_without_structured_log():
+    """Gunicorn's access line is dropped when the JSON access log is on."""
+    with patch.dict(os.environ, {'ACCESS_LOG_PATH': ''}):
+        assert build_options()['accesslog'] == '-'
+    with patch.dict(os.environ, {'ACCESS_LOG_PATH': '-'}):
+        assert build_options()['accesslog'] is None
+
+
+def test_prepare_environment_resets_metrics_dir(tmp_path):
+    """Stale multiprocess metric files should be cleared on start."""
+    metrics_dir = tmp_path / 'prom'
+    metrics_dir.mkdir()
+    (metrics_dir / 'counter_123.db').write_bytes(b'stale')
+    env = {'CHAT_DB_DIR': str(tmp_path), 'PROMETHEUS_MULTIPROC_DIR': str(metrics_dir)}
+    with patch.dict(os.environ, env):
+        os.environ.pop('SHARED_STATE_DB', None)
+        _prepare_environment()
+        assert os.environ['SHARED_STATE_DB'] == str(tmp_path / 'shared_state.db')
+    assert metrics_dir.is_dir()
+    assert list(metrics_dir.iterdir()) == []
+
+
+def test_prepare_environment_keeps_metrics_on_reexec(tmp_path):
+    """A USR2 re-exec must not delete files the old workers are still writing."""
+    metrics_dir = tmp_path / 'prom'
+    metrics_dir.mkdir()
+    (metrics_dir / 'counter_123.db').write_bytes(b'live')
+    env = {'CHAT_DB_DIR': str(tmp_path), 'PROMETHEUS_MULTIPROC_DIR': str(metrics_dir),
+           'GUNICORN_FD': '3'}
+    with patch.dict(os.environ, env):
+        _prepare_environment()
+    assert [p.name for p in metrics_dir.iterdir()] == ['counter_123.db']
+
+
+def test_gunicorn_config_applied():
+    """Options should be loaded into gunicorn's config object."""
+    server = ProductionServer({'workers': 5, 'threads': 2, 'bind': '127.0.0.1:9999'})
+    assert server.cfg.workers == 5
+    assert server.cfg.threads == 2
+    assert server.cfg.bind == ['127.0.0.1:9999']
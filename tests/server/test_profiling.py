@@ -0,0 +1,107 @@
+"""
+Tests for server/profiling.py — request stack sampling and profile export.
+"""
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.profiling import RequestProfiler, SPEEDSCOPE_SCHEMA, summary, to_collapsed, to_speedscope
+
+
+def busy_handler(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def _profile(profiler, seconds=0.05, endpoint='generate_pdf'):
+    active = profiler.start(endpoint, method='POST', path='/generate-pdf')
+    if active is None:
+        return None
+    busy_handler(seconds)
+    return profiler.finish(active, 200)
+
+
+def test_disabled_by_default():
+    profiler = RequestProfiler(sample_rate=0, slow_ms=0)
+    assert not profiler.enabled
+    assert profiler.start('generate_pdf') is None
+
+
+def test_sampled_request_captures_stacks():
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=1)
+    profile = _profile(profiler)
+    assert profile['reason'] == 'sampled'
+    assert profile['endpoint'] == 'generate_pdf' and profile['path'] == '/generate-pdf'
+    assert profile['status'] == 200
+    assert profile['samples'] > 5
+    leaves = [stack[-1] for stack in profile['stacks']]
+    assert any('busy_handler' in frame for stack in profile['stacks'] for frame in stack)
+    assert all('test_profiling.py' in leaf or '(' in leaf for leaf in leaves)
+
+
+def test_slow_threshold_keeps_only_slow_requests():
+    profiler = RequestProfiler(sample_rate=0, slow_ms=30, interval_ms=1)
+    assert _profile(profiler, seconds=0.001) is None
+    profile = _profile(profiler, seconds=0.05)
+    assert profile['reason'] == 'slow'
+    assert profile['duration_ms'] >= 30
+    assert [p['id'] for p in profiler.profiles()] == [profile['id']]
+
+
+def test_excluded_endpoints_are_not_profiled():
+    profiler = RequestProfiler(sample_rate=1.0, exclude=('admin_profiles',))
+    assert profiler.start('admin_profiles') is None
+
+
+def test_ring_buffer_keeps_newest():
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=1, capacity=3)
+    ids = [_profile(profiler, seconds=0.002)['id'] for _ in range(5)]
+    assert [p['id'] for p in profiler.profiles()] == ids[:1:-1]
+    assert profiler.get(ids[0]) is None
+    assert profiler.get(ids[-1])['id'] == ids[-1]
+
+
+def test_sample_records_current_stack():
+    """sample() reads the registered thread's stack, root first."""
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=60000)
+    active = profiler.start('chat')
+    profiler.sample()
+    profile = profiler.finish(active, 200)
+    (stack,) = profile['stacks']
+    assert 'sample' in stack[-1]
+    assert 'test_sample_records_current_stack' in stack[-2]
+
+
+def test_collapsed_format():
+    profile = {'stacks': {('main (a.py:1)', 'render (b.py:5)'): 3, ('main (a.py:1)',): 1}}
+    assert to_collapsed([profile, profile]) == (
+        'main (a.py:1) 2\n'
+        'main (a.py:1);render (b.py:5) 6\n'
+    )
+
+
+def test_speedscope_format():
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=1)
+    profiles = [_profile(profiler), _profile(profiler)]
+    doc = json.loads(json.dumps(to_speedscope(profiles)))
+    assert doc['$schema'] == SPEEDSCOPE_SCHEMA
+    assert len(doc['profiles']) == 2
+    frames = doc['shared']['frames']
+    assert any(f['name'] == 'busy_handler' and f['file'].endswith('test_profiling.py') for f in frames)
+    for p in doc['profiles']:
+        assert p['type'] == 'sampled' and p['unit'] == 'milliseconds'
+        assert len(p['samples']) == len(p['weights'])
+        assert all(0 <= i < len(frames) for sample in p['samples'] for i in sample)
+        assert p['endValue'] == sum(p['weights'])
+
+
+def test_summary_drops_stacks():
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=1)
+    profile = _profile(profiler, seconds=0.002)
+    assert 'stacks' not in summary(profile)
+    assert summary(profile)['id'] == profile['id']
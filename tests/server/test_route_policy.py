@@ -0,0 +1,67 @@
+"""
+Tests for server/route_policy.py — per-endpoint tracking decisions.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.route_policy import RouteClassifier, RoutePolicy
+
+
+def test_static_skips_visitor_tracking():
+    """Static assets should not count as visitors and should be sampled."""
+    policy = RouteClassifier().policy('static')
+    assert policy.name == 'static'
+    assert policy.track_visitor is False
+    assert policy.mode == 'sample'
+
+
+def test_pages_and_api_tracked():
+    """Pages and API routes should be fully tracked."""
+    classifier = RouteClassifier()
+    for endpoint in ('index', 'demo', 'chat', 'track_event'):
+        policy = classifier.policy(endpoint)
+        assert policy.track_visitor is True
+        assert policy.mode == 'track'
+
+
+def test_unknown_endpoint_not_a_visitor():
+    """Unrouted requests (404s) should not count as visitors."""
+    policy = RouteClassifier().policy(None)
+    assert policy.name == 'unknown'
+    assert policy.track_visitor is False
+
+
+def test_policy_cached_per_endpoint():
+    """Classification should happen once and be reused."""
+    classifier = RouteClassifier()
+    assert classifier.policy('health') is classifier.policy('health')
+    assert classifier.policy('health') is classifier.policy('metrics')
+
+
+def test_sample_rate_from_env():
+    """METRICS_SAMPLE_RATE_<CLASS> should override the default rate."""
+    with patch.dict(os.environ, {'METRICS_SAMPLE_RATE_STATIC': '0'}):
+        policy = RouteClassifier().policy('static')
+    assert policy.mode == 'skip'
+    assert policy.sampled() is False
+
+
+def test_invalid_env_rate_ignored():
+    """A malformed rate should fall back to the default."""
+    with patch.dict(os.environ, {'METRICS_SAMPLE_RATE_API': 'lots'}):
+        policy = RouteClassifier().policy('chat')
+    assert policy.sample_rate == 1.0
+
+
+def test_sampled_weight_keeps_count_unbiased():
+    """Sampled requests should carry a weight of 1/rate."""
+    policy = RoutePolicy('static', False, 0.25)
+    assert policy.weight == 4.0
+    with patch('server.route_policy.random.random', return_value=0.1):
+        assert policy.sampled() is True
+    with patch('server.route_policy.random.random', return_value=0.9):
+        assert policy.sampled() is False
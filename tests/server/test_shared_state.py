@@ -0,0 +1,91 @@
+"""
+Tests for server/shared_state.py — process-local and SQLite-shared request state.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.shared_state import LocalState, SqliteState, make_state
+
+
+@pytest.fixture(params=['local', 'sqlite'])
+def state(request, tmp_path):
+    if request.param == 'local':
+        return LocalState()
+    return SqliteState(str(tmp_path / 'state.db'), 'test')
+
+
+def test_dict_interface(state):
+    """Both stores should behave like a mapping."""
+    state['a'] = 1.5
+    state['b'] = [1.0, 2.0]
+    assert 'a' in state
+    assert state['b'] == [1.0, 2.0]
+    assert len(state) == 2
+    del state['a']
+    assert 'a' not in state
+    state.clear()
+    assert len(state) == 0
+
+
+def test_prune_drops_old_entries(state):
+    """prune() should remove entries older than the cutoff and return the size."""
+    now = time.time()
+    state.touch('old', now - 1000)
+    state.touch('new', now)
+    assert state.prune(now - 900) == 1
+    assert 'old' not in state
+    assert 'new' in state
+
+
+def test_hit_window_enforces_limit(state):
+    """hit_window() should allow ``limit`` hits per window and then refuse."""
+    now = time.time()
+    assert all(state.hit_window('ip', now, 60, 3) for _ in range(3))
+    assert state.hit_window('ip', now, 60, 3) is False
+    assert state.hit_window('ip', now + 61, 60, 3) is True
+
+
+def test_namespaces_isolated(tmp_path):
+    """Two namespaces in one database should not see each other's keys."""
+    path = str(tmp_path / 'state.db')
+    a, b = SqliteState(path, 'a'), SqliteState(path, 'b')
+    a['k'] = 1
+    assert 'k' not in b
+    b.clear()
+    assert a['k'] == 1
+
+
+def test_make_state_selects_backend(tmp_path):
+    """SHARED_STATE_DB should switch make_state() to the SQLite store."""
+    assert isinstance(make_state('x'), LocalState)
+    with patch.dict(os.environ, {'SHARED_STATE_DB': str(tmp_path / 's.db')}):
+        assert isinstance(make_state('x'), SqliteState)
+
+
+def _hammer(path, results):
+    store = SqliteState(path, 'rate')
+    now = time.time()
+    results.put(sum(store.hit_window('1.2.3.4', now, 60, 10) for _ in range(10)))
+
+
+def test_rate_limit_shared_across_processes(tmp_path):
+    """Several processes hitting one key should share a single limit."""
+    path = str(tmp_path / 'state.db')
+    SqliteState(path, 'rate')
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_hammer, args=(path, results)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    allowed = sum(results.get(timeout=30) for _ in procs)
+    for p in procs:
+        p.join(10)
+    assert allowed == 10
@@ -0,0 +1,24 @@
+"""
+Tests for server/startup_profile.py — cold-start import profile.
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.startup_profile import profile_once
+
+
+def test_heavy_modules_load_lazily():
+    """Importing server.app must not pull in ReportLab, NumPy, OpenAI or psutil."""
+    ms, eager, _ = profile_once()
+    assert ms > 0
+    assert eager == []
+
+
+def test_importtime_rows():
+    _, _, rows = profile_once(importtime=True)
+    names = [name.strip() for _, _, name in rows]
+    assert 'server.app' in names
+    assert all(cumulative >= self_us for self_us, cumulative, _ in rows)
@@ -0,0 +1,135 @@
+"""
+Tests for server/static_assets.py — precompressed, fingerprinted client assets.
+"""
+import gzip
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.static_assets import AssetCache, IMMUTABLE_CACHE, brotli
+
+CSS = 'body { color: #e2e8f0; }\n' * 100
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'demo').mkdir()
+    (tmp_path / 'styles.css').write_text(CSS)
+    (tmp_path / 'demo' / 'app.js').write_text('console.log("yard");\n' * 50)
+    (tmp_path / 'doc.pdf').write_bytes(b'%PDF-1.4 fake')
+    (tmp_path / 'index.html').write_text(
+        '<link rel="stylesheet" href="styles.css">\n'
+        '<script src="/demo/app.js?v=2"></script>\n'
+        '<a href="/demo">Demo</a>\n'
+        '<a href="https://example.com/styles.css">CDN</a>\n'
+    )
+    cache = AssetCache(str(tmp_path))
+    app = Flask(__name__)
+
+    @app.route('/<path:filename>')
+    def serve(filename):
+        return cache.serve(filename) or ('missing', 404)
+
+    return cache, app.test_client()
+
+
+def test_html_references_rewritten(site):
+    """HTML pages should point at fingerprinted URLs for local assets only."""
+    cache, client = site
+    html = client.get('/index.html').data.decode()
+    css, _ = cache.lookup('styles.css')
+    js, _ = cache.lookup('demo/app.js')
+    assert f'href="/{css.fingerprinted_path}"' in html
+    assert f'src="/{js.fingerprinted_path}"' in html
+    assert 'href="/demo"' in html
+    assert 'https://example.com/styles.css' in html
+
+
+def test_fingerprinted_url_is_immutable(site):
+    """Content-hashed URLs should be cacheable forever."""
+    cache, client = site
+    css, _ = cache.lookup('styles.css')
+    resp = client.get('/' + css.fingerprinted_path)
+    assert resp.status_code == 200
+    assert resp.headers['Cache-Control'] == IMMUTABLE_CACHE
+    assert resp.data == CSS.encode()
+
+
+def test_plain_url_revalidates_with_etag(site):
+    """Plain URLs should revalidate and answer 304 on a matching ETag."""
+    _, client = site
+    resp = client.get('/styles.css')
+    assert resp.headers['Cache-Control'] == 'no-cache'
+    etag = resp.headers['ETag']
+    again = client.get('/styles.css', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+
+
+def test_gzip_served_when_accepted(site):
+    """gzip-only clients should get the precompressed gzip body."""
+    _, client = site
+    resp = client.get('/styles.css', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert gzip.decompress(resp.data) == CSS.encode()
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli not installed')
+def test_brotli_preferred(site):
+    """Brotli should win when the client accepts it."""
+    _, client = site
+    resp = client.get('/styles.css', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert resp.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(resp.data) == CSS.encode()
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli not installed')
+def test_brotli_compressed_on_first_request(site):
+    """Brotli bodies are built lazily so startup only pays for gzip."""
+    cache, client = site
+    asset, _ = cache.lookup('styles.css')
+    assert asset.bodies['br'] is None
+    client.get('/styles.css', headers={'Accept-Encoding': 'br'})
+    assert brotli.decompress(asset.bodies['br']) == CSS.encode()
+
+
+def test_identity_without_accept_encoding(site):
+    """Clients that don't advertise encodings get the raw bytes."""
+    _, client = site
+    resp = client.get('/styles.css')
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.data == CSS.encode()
+
+
+def test_binary_files_served_from_disk(site):
+    """Non-text files stay out of memory but still get content-hash ETags."""
+    cache, client = site
+    pdf, _ = cache.lookup('doc.pdf')
+    assert pdf.bodies == {}
+    resp = client.get('/doc.pdf')
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] == f'"{pdf.digest}"'
+
+
+def test_unknown_path(site):
+    """Unknown paths should not resolve."""
+    cache, client = site
+    assert cache.lookup('nope.css') == (None, False)
+    assert client.get('/../secret').status_code == 404
+
+
+def test_watch_mode_rebuilds_on_change(tmp_path):
+    """In watch mode an edited file gets a new fingerprint."""
+    (tmp_path / 'a.css').write_text(CSS)
+    cache = AssetCache(str(tmp_path), watch=True)
+    before = cache.lookup('a.css')[0].digest
+    path = tmp_path / 'a.css'
+    path.write_text(CSS + 'p {}\n')
+    os.utime(path, ns=(1, 1))
+    assert cache.lookup('a.css')[0].digest != before
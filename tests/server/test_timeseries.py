@@ -0,0 +1,148 @@
+"""
+Tests for server/timeseries.py — batched per-minute counts and their rollups.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.timeseries import MAX_POINTS, MAX_TIMESTAMP, ROLLUP_GRACE, TimeSeriesError, TimeSeriesStore
+
+DAY = 86400
+T0 = 1_700_006_400          # a UTC midnight
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    clock = Clock(T0 + 10 * DAY)
+    path = str(tmp_path / 'ts.db')
+    s = TimeSeriesStore(lambda: path, ('views', 'chats'), compact_interval=float('inf'), clock=clock)
+    s.clock = clock
+    s.path = path
+    yield s
+    s.close()
+
+
+def rows(store, level):
+    conn = sqlite3.connect(store.path)
+    try:
+        return conn.execute(f'SELECT series, bucket, value FROM ts_{level} ORDER BY 1, 2').fetchall()
+    finally:
+        conn.close()
+
+
+def test_record_batches_until_flush(store):
+    for _ in range(3):
+        store.record('views', at=T0 + 65)
+    store.record('views', 2, at=T0 + 119)
+    store.record('chats', at=T0 + 120)
+    store.flush()
+    store.record('views', at=T0 + 61)
+    store.flush()
+    assert rows(store, 'minute') == [('chats', T0 + 120, 1), ('views', T0 + 60, 6)]
+
+
+def test_query_reads_raw_minutes_before_compaction(store):
+    store.record('views', at=T0 + 30)
+    store.record('views', at=T0 + 3600 + 30)
+    store.flush()
+    since, until, points = store.query(['views'], 'hour', since=T0, until=T0 + 3 * 3600)
+    assert (since, until) == (T0, T0 + 3 * 3600)
+    assert points['views'] == [[T0, 1], [T0 + 3600, 1], [T0 + 7200, 0]]
+
+
+def test_compaction_rolls_up_and_queries_match(store):
+    # One event every 10 minutes over three days
+    for t in range(T0, T0 + 3 * DAY, 600):
+        store.record('views', at=t)
+    store.flush()
+    before = {res: store.query(['views'], res, since=T0, until=T0 + 3 * DAY)[2]
+              for res in ('hour', 'day')}
+
+    store.compact(now=T0 + 2 * DAY + 12 * 3600)
+    assert [r[1:] for r in rows(store, 'day')] == [(T0, 144), (T0 + DAY, 144)]
+    assert len(rows(store, 'hour')) == 2 * 24 + 11     # kept after their days are rolled up
+    for res, points in before.items():
+        assert store.query(['views'], res, since=T0, until=T0 + 3 * DAY)[2] == points
+    assert before['day']['views'] == [[T0, 144], [T0 + DAY, 144], [T0 + 2 * DAY, 144]]
+
+
+def test_compaction_is_idempotent(store):
+    for t in range(T0, T0 + DAY, 60):
+        store.record('views', at=t)
+    store.flush()
+    now = T0 + DAY + ROLLUP_GRACE
+    store.compact(now=now)
+    store.compact(now=now)
+    assert rows(store, 'day') == [('views', T0, 1440)]
+    assert sum(r[2] for r in rows(store, 'hour')) == 1440
+
+
+def test_incomplete_hour_waits_for_grace_period(store):
+    store.record('views', at=T0 + 30)
+    store.flush()
+    store.compact(now=T0 + 3600 + ROLLUP_GRACE - 1)
+    assert rows(store, 'hour') == []
+    store.compact(now=T0 + 3600 + ROLLUP_GRACE)
+    assert rows(store, 'hour') == [('views', T0, 1)]
+
+
+def test_retention_drops_only_rolled_up_buckets(store):
+    for t in range(T0, T0 + 10 * DAY, 3600):
+        store.record('views', at=t)
+    store.flush()
+    store.compact(now=T0 + 10 * DAY)
+    minutes = rows(store, 'minute')
+    assert minutes and min(r[1] for r in minutes) >= T0 + 8 * DAY
+    # Old days are still complete once their minutes are gone
+    _, _, points = store.query(['views'], 'day', since=T0, until=T0 + 10 * DAY)
+    assert [v for _, v in points['views']] == [24] * 10
+
+
+def test_late_flush_after_rollup_is_still_counted(store):
+    store.compact(now=T0 + DAY)
+    store.record('views', at=T0 + 30)        # lands below the hour watermark
+    store.flush()
+    store.compact(now=T0 + 2 * DAY)
+    _, _, points = store.query(['views'], 'day', since=T0, until=T0 + DAY)
+    assert points['views'] == [[T0, 1]]
+
+
+def test_query_defaults_and_errors(store):
+    since, until, points = store.query(['views', 'chats'], 'minute')
+    assert until == store.clock.now + 60 and until - since == 2 * 3600
+    assert set(points) == {'views', 'chats'}
+    with pytest.raises(TimeSeriesError):
+        store.query(['nope'])
+    with pytest.raises(TimeSeriesError):
+        store.query(['views'], 'week')
+    with pytest.raises(TimeSeriesError):
+        store.query(['views'], 'minute', since=T0, until=T0 + (MAX_POINTS + 1) * 60)
+    with pytest.raises(TimeSeriesError):
+        store.query(['views'], 'hour', since=T0 + 3600, until=T0)
+    with pytest.raises(TimeSeriesError, match='epoch seconds'):
+        store.query(['views'], 'day', since=10 ** 22)
+    with pytest.raises(TimeSeriesError, match='epoch seconds'):
+        store.query(['views'], 'day', since=T0, until=MAX_TIMESTAMP + 1)
+
+
+def test_background_flusher_writes_pending(tmp_path):
+    path = str(tmp_path / 'ts.db')
+    s = TimeSeriesStore(lambda: path, ('views',), flush_interval=0.01, compact_interval=float('inf'))
+    s.record('views')
+    s.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT SUM(value) FROM ts_minute').fetchone()[0] == 1
+    conn.close()
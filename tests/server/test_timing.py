@@ -0,0 +1,80 @@
+"""
+Tests for server/timing.py — request phase spans and the Server-Timing header.
+"""
+import os
+import sys
+import time
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from prometheus_client import REGISTRY
+
+from server import timing
+from server.timing import span
+
+
+def _observed(endpoint, phase):
+    return REGISTRY.get_sample_value(
+        'request_phase_seconds_count', {'endpoint': endpoint, 'phase': phase}) or 0
+
+
+def test_span_without_timer_is_a_no_op():
+    assert timing.end() is None
+    with span('anything'):
+        pass
+    assert timing.end() is None
+
+
+def test_phases_recorded_once_per_request():
+    before = _observed('unit_test', 'work')
+    timing.begin('unit_test')
+    for _ in range(3):
+        with span('work'):
+            time.sleep(0.01)
+    with span('other'):
+        pass
+    timer = timing.end()
+    assert set(timer.phases) == {'work', 'other'}
+    assert timer.phases['work'] >= 0.03
+    assert _observed('unit_test', 'work') == before + 1
+    assert timing.end() is None
+
+
+def test_span_records_when_block_raises():
+    timing.begin('unit_test')
+    try:
+        with span('failing'):
+            raise KeyError('x')
+    except KeyError:
+        pass
+    assert 'failing' in timing.end().phases
+
+
+def test_server_timing_header():
+    timer = timing.PhaseTimer('unit_test')
+    timer.add('validate', 0.0012)
+    timer.add('build', 0.25)
+    header = timer.server_timing()
+    parts = header.split(', ')
+    assert parts[:2] == ['validate;dur=1.20', 'build;dur=250.00']
+    assert parts[2].startswith('total;dur=')
+
+
+def test_recording_context():
+    with timing.recording('unit_job') as timer:
+        with span('render'):
+            pass
+    assert 'render' in timer.phases
+    assert timing.end() is None
+
+
+def test_timers_are_per_thread():
+    timing.begin('unit_test')
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(timing.end()))
+    thread.start()
+    thread.join()
+    assert seen == [None]
+    assert timing.end() is not None
@@ -0,0 +1,121 @@
+"""
+Tests for server/validation.py — precompiled request schemas.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from server.validation import (
+    ValidationError, validate, number, string, obj,
+    ORDER_PDF, CHAT_MESSAGE, TRACK_EVENT, TRACK_BATCH, MAX_IMAGE_BYTES, MAX_ORDER_ITEMS,
+    MAX_PIECES,
+)
+
+
+def _item(**overrides):
+    item = {'name': '2x4x8', 'category': 'Dimensional', 'current': 10, 'capacity': 100,
+            'toOrder': 90, 'unitPrice': 3.48, 'unitWeight': 9, 'totalCost': 313.2}
+    item.update(overrides)
+    return item
+
+
+def test_order_defaults_filled_and_unknown_keys_dropped():
+    """Cleaned payloads hold every known key and nothing else."""
+    data = validate(ORDER_PDF, {'items': [_item(extra='x')], 'debug': True})
+    assert 'debug' not in data
+    assert 'extra' not in data['items'][0]
+    assert data['yard'] == []
+    assert data['truckImage'] == ''
+    assert data['totalBunks'] == 0
+    assert data['items'][0]['dims'] is None
+
+
+@pytest.mark.parametrize('bad, field', [
+    ({'current': '10'}, 'items[0].current'),
+    ({'current': True}, 'items[0].current'),
+    ({'capacity': -1}, 'items[0].capacity'),
+    ({'toOrder': float('nan')}, 'items[0].toOrder'),
+    ({'toOrder': 12.5}, 'items[0].toOrder'),
+    ({'toOrder': 500000}, 'items[0].toOrder'),
+    ({'capacity': 1e30}, 'items[0].capacity'),
+    ({'name': 'x' * 101}, 'items[0].name'),
+    ({'dims': {'w': 'wide'}}, 'items[0].dims.w'),
+])
+def test_order_item_errors_name_the_field(bad, field):
+    with pytest.raises(ValidationError) as exc:
+        validate(ORDER_PDF, {'items': [_item(**bad)]})
+    assert exc.value.field == field
+
+
+def test_piece_counts_are_bounded_integers():
+    with pytest.raises(ValidationError, match='between 0 and 10000'):
+        validate(ORDER_PDF, {'items': [_item(toOrder=MAX_PIECES + 1)]})
+    with pytest.raises(ValidationError, match='must be an integer') as exc:
+        validate(ORDER_PDF, {'yard': [{'name': 'a', 'current': 1.5, 'capacity': 10}]})
+    assert exc.value.field == 'yard[0].current'
+    data = validate(ORDER_PDF, {'items': [_item(toOrder=MAX_PIECES)]})
+    assert data['items'][0]['toOrder'] == MAX_PIECES
+
+
+def test_missing_required_field():
+    item = _item()
+    del item['toOrder']
+    with pytest.raises(ValidationError) as exc:
+        validate(ORDER_PDF, {'items': [item]})
+    assert exc.value.field == 'items[0].toOrder'
+
+
+def test_item_count_limit():
+    with pytest.raises(ValidationError, match='too many'):
+        validate(ORDER_PDF, {'items': [_item()] * (MAX_ORDER_ITEMS + 1)})
+
+
+def test_image_limits():
+    """Images must be PNG/JPEG data URLs within the size limit."""
+    ok = 'data:image/png;base64,' + 'A' * 100
+    assert validate(ORDER_PDF, {'truckImage': ok})['truckImage'] == ok
+    with pytest.raises(ValidationError, match='too large'):
+        validate(ORDER_PDF, {'truckImage': 'data:image/png;base64,' + 'A' * (MAX_IMAGE_BYTES * 2)})
+    with pytest.raises(ValidationError, match='data URL'):
+        validate(ORDER_PDF, {'chartImage': 'data:text/html;base64,PGI+'})
+
+
+def test_body_must_be_an_object():
+    with pytest.raises(ValidationError):
+        validate(ORDER_PDF, None)
+    with pytest.raises(ValidationError):
+        validate(ORDER_PDF, [1, 2])
+
+
+def test_chat_strips_and_requires_name_and_message():
+    data = validate(CHAT_MESSAGE, {'recruiter_name': '  Sarah ', 'message': ' Hi '})
+    assert data == {'recruiter_name': 'Sarah', 'message': 'Hi',
+                    'conversation_id': '', 'job_posting': '', 'turn': 0}
+    with pytest.raises(ValidationError, match='your name'):
+        validate(CHAT_MESSAGE, {'recruiter_name': '   ', 'message': 'Hi'})
+    with pytest.raises(ValidationError, match='a message'):
+        validate(CHAT_MESSAGE, {'recruiter_name': 'Sarah'})
+
+
+def test_track_event_must_be_string():
+    assert validate(TRACK_EVENT, {'event': 'demo_view'}) == {'event': 'demo_view'}
+    with pytest.raises(ValidationError):
+        validate(TRACK_EVENT, {'event': ['demo_view']})
+
+
+def test_track_batch_names_the_failing_event():
+    with pytest.raises(ValidationError) as exc:
+        validate(TRACK_BATCH, {'events': [{'event': 'demo_view'}, {'event': 7}]})
+    assert exc.value.field == 'events[1].event'
+
+
+def test_integer_and_range_checks():
+    check = obj({'n': number(minimum=1, maximum=5, integer=True), 's': string(3)})
+    assert check({'n': 3}) == {'n': 3, 's': ''}
+    for bad in ({'n': 2.5}, {'n': 0}, {'n': 6}, {'s': 'long'}):
+        with pytest.raises(ValidationError):
+            check(bad)